@@ -1,9 +1,13 @@
-from typing import Union
+from typing import Optional, Tuple, Union
 
 import numpy as np
 from pyflyer import Aircraft
 from simple_pid import PID
 
+from flyer_env.aircraft.dynamics import STATE_FEATURES
+from flyer_env.aircraft.lqr import LQRController, gain_schedule
+from flyer_env.aircraft.tracking import TrackPoints
+from flyer_env.aircraft.trim import trim_table
 from flyer_env.utils import Vector
 
 
@@ -12,22 +16,51 @@ class ControlledAircraft:
     A wrapper around a pyflyer::Aircraft that allows for various preplanned controller actions
     """
 
+    # Actions the LQR backend flies, any other action is flown by the PID cascade
+    LQR_ACTIONS = {"heading", "alt", "speed"}
+
     def __init__(
         self,
         aircraft: Aircraft,
         dt: float,
-        trim: Vector = [0.0, 0.04055471935347572, 0.6730648623679762, 0.0],
+        trim: Optional[Vector] = None,
         update_rate: dict = {
             "low_level": 1 / 1000.0,
             "mid_level": 1 / 100.0,
             "high_level": 1 / 10.0,
         },
+        aircraft_name: str = "TO",
+        controller: str = "pid",
     ):
+        """
+        Wrap an aircraft with its autopilot
+
+        :param aircraft: the pyflyer aircraft, or a ModelAircraft flown through the wind
+        :param dt: timestep the autopilot is called at [s]
+        :param trim: fixed (aileron, elevator, tla, rudder) trim, if None the trim is fed forward from the aircraft's
+            trim table at the current airspeed and altitude
+        :param update_rate: update periods of the low, mid and high level controllers [s]
+        :param aircraft_name: name of the aircraft data file, used to find its trim table
+        :param controller: autopilot backend flying heading, altitude and speed commands, "pid" for the PID cascade or
+            "lqr" for the gain-scheduled LQR controller
+        """
 
         self.dt = dt
         self.aircraft = aircraft
         self.update_rate = update_rate
 
+        self.trim_table = None
+        if trim is None:
+            self.trim_table = trim_table(aircraft_name)
+            trim = self._scheduled_trim(aircraft.dict)
+
+        if controller == "pid":
+            self.lqr = None
+        elif controller == "lqr":
+            self.lqr = LQRController(gain_schedule(aircraft_name, dt))
+        else:
+            raise ValueError(f"Unknown controller {controller}")
+
         # path = os.path.join(*[os.path.dirname(os.path.realpath(__file__)), "..", "envs", "data/"])
         # self.aircraft = Aircraft(data_path=path)
         # self.aircraft.reset(position, heading, speed)
@@ -60,11 +93,18 @@ class ControlledAircraft:
         self.mid_time_since_alt_update = 0.0
         self.mid_time_since_hdg_update = 0.0
         self.high_time_since_update = 0.0
+        self.high_time_since_trim_update = 0.0
+        self.high_time_since_gain_update = np.inf
 
         self.u_alt = 0.0
         self.u_hdg = 0.0
         self.hdg = 0.0
 
+        self.tracker = None
+        self.track_points = None
+        self.track_alts = None
+        self.track_alt = 0.0
+
     def act(self, action: Union[dict, str] = None) -> None:
 
         self.low_time_since_pitch_update += self.dt
@@ -73,10 +113,23 @@ class ControlledAircraft:
         self.mid_time_since_alt_update += self.dt
         self.mid_time_since_hdg_update += self.dt
         self.high_time_since_update += self.dt
+        self.high_time_since_trim_update += self.dt
+        self.high_time_since_gain_update += self.dt
+        aircraft_dict = self.dict
+        if (
+            self.trim_table is not None
+            and self.high_time_since_trim_update >= self.update_rate["high_level"]
+        ):
+            self._trim = self._scheduled_trim(aircraft_dict)
+            self.high_time_since_trim_update = 0.0
         next_aileron, next_elevator, next_tla, next_rudder = self._trim
-        aircraft_dict = self.aircraft.dict
 
-        if action:
+        if action and self.lqr is not None and self.LQR_ACTIONS.issuperset(action):
+            next_aileron, next_elevator, next_tla, next_rudder = self.lqr_controller(
+                action, aircraft_dict
+            )
+
+        elif action:
 
             # Low level controllers
             if "pitch" in action:
@@ -129,9 +182,13 @@ class ControlledAircraft:
                 tgt_points = action["track_points"]
                 next_aileron, next_elevator = self.track_controller(
                     tgt_points,
+                    np.array(
+                        [aircraft_dict["x"], aircraft_dict["y"], aircraft_dict["z"]]
+                    ),
                     aircraft_dict["yaw"],
                     aircraft_dict["pitch"],
                     aircraft_dict["roll"],
+                    radius=action.get("track_radius", 500.0),
                 )
 
         action = {
@@ -143,6 +200,36 @@ class ControlledAircraft:
 
         self.aircraft.act(action)
 
+    def lqr_controller(self, action: dict, aircraft_dict: dict) -> Vector:
+        """
+        Gain-scheduled LQR heading, altitude and speed controller
+
+        Commands missing from the action are held at the aircraft's current value. The gains are rescheduled on the
+        commanded airspeed and altitude at the high level update rate.
+
+        :param action: dict of commanded "heading" [rad], "alt" NED altitude [m] and "speed" [m/s]
+        :param aircraft_dict: the aircraft's state
+        :return: aileron, elevator, tla and rudder controls
+        """
+        state = np.array([[aircraft_dict[feature] for feature in STATE_FEATURES]])
+        if self.high_time_since_gain_update >= self.update_rate["high_level"]:
+            airspeed = action.get("speed", np.linalg.norm(state[0, 6:9]))
+            self.lqr.update_schedule(airspeed, -action.get("alt", aircraft_dict["z"]))
+            self.high_time_since_gain_update = 0.0
+        controls = self.lqr(
+            state,
+            action.get("heading", aircraft_dict["yaw"]),
+            action.get("alt", aircraft_dict["z"]),
+        )
+        return controls[0]
+
+    def _scheduled_trim(self, aircraft_dict: dict) -> list:
+        """Level flight trim controls at the aircraft's current airspeed and altitude"""
+        airspeed = np.sqrt(
+            aircraft_dict["u"] ** 2 + aircraft_dict["v"] ** 2 + aircraft_dict["w"] ** 2
+        )
+        return list(self.trim_table.controls(airspeed, -aircraft_dict["z"]))
+
     def pitch_controller(self, pitch_err: float) -> float:
         """
         PID based pitch controller
@@ -225,23 +312,73 @@ class ControlledAircraft:
         aileron = self.heading_controller(hdg_err, ac_bank)
         return aileron
 
-    # TODO: Find if there is a way to integrate this into the action space
-    # def track_controller(self, track_points: Vector, ac_heading: float, ac_pitch: float, ac_bank: float) -> Vector:
-    #     """
-    #     Controller to track along a series of points
-
-    #     :param track_points:
-    #     :return:
-    #     """
-
-    #     [heading, altitude], flag = self.nav_track.arc_path()
+    def track_controller(
+        self,
+        track_points: Vector,
+        ac_pos: Vector,
+        ac_hdg: float,
+        ac_pitch: float,
+        ac_bank: float,
+        radius: float = 500.0,
+    ) -> Tuple[float, float]:
+        """
+        Controller to track along a series of waypoints
+
+        The track runs from the aircraft's position when the waypoints are first commanded through each waypoint, with
+        fillets of the given radius between legs. It is kept for as long as the same waypoints are commanded, so the
+        geometry is only built when the waypoints change. Lateral guidance follows the track heading from
+        TrackPoints and vertical guidance interpolates the altitude linearly along each leg.
+
+        :param track_points: (x, y, z) waypoints, as an (N, 3) array or flattened to (3N,) [m]
+        :param ac_pos: (x, y, z) aircraft position [m]
+        :param ac_hdg: aircraft heading [rad]
+        :param ac_pitch: aircraft pitch attitude [rad]
+        :param ac_bank: aircraft bank angle [rad]
+        :param radius: radius of the fillets between legs [m]
+        :return: aileron and elevator deflections [rad]
+        """
+        track_points = np.reshape(np.asarray(track_points, dtype=float), (-1, 3))
+        if (
+            self.tracker is None
+            or self.tracker.radius != radius
+            or not np.array_equal(self.track_points, track_points)
+        ):
+            self._build_track(track_points, ac_pos, radius)
+            self.high_time_since_update = self.update_rate["high_level"]
 
-    #     hdg_err = heading - ac_heading
-    #     aileron = self.heading_controller(hdg_err, ac_bank)
+        if self.high_time_since_update >= self.update_rate["high_level"]:
+            self.hdg = self.tracker.arc_path(ac_pos)
+            self.track_alt = self._track_altitude(ac_pos)
+            self.high_time_since_update = 0.0
 
-    #     alt_err = altitude - self.position[-1]
-    #     elevator = self.alt_controller(alt_err, ac_pitch)
-    #     return aileron, elevator
+        hdg_err = np.arctan2(np.sin(self.hdg - ac_hdg), np.cos(self.hdg - ac_hdg))
+        aileron = self.heading_controller(hdg_err, ac_bank)
+        elevator = self.alt_controller(ac_pos[2] - self.track_alt, ac_pitch)
+        return aileron, elevator
+
+    def _build_track(
+        self, track_points: np.ndarray, ac_pos: Vector, radius: float
+    ) -> None:
+        """Build the track from the aircraft's position through the waypoints"""
+        points = np.vstack([np.asarray(ac_pos, dtype=float)[:3], track_points])
+        self.tracker = TrackPoints(
+            {idx: point[:2] for (idx, point) in enumerate(points)}, radius=radius
+        )
+        self.track_points = track_points
+        self.track_alts = points[:, 2]
+
+    def _track_altitude(self, ac_pos: Vector) -> float:
+        """Commanded altitude [m] along the current leg of the track"""
+        start = self.tracker.goal_state
+        end = start + 1
+        if self.tracker.control_state == 1:
+            return self.track_alts[end]
+        leg = self.tracker.points[end] - self.tracker.points[start]
+        progress = np.dot(np.asarray(ac_pos)[:2] - self.tracker.points[start], leg)
+        progress = np.clip(progress / np.dot(leg, leg), 0.0, 1.0)
+        return self.track_alts[start] + progress * (
+            self.track_alts[end] - self.track_alts[start]
+        )
 
     # # TODO: Is there a more elegant way of solving this, it's a little slow
     # def rate_limit(self, next_controls):
@@ -253,11 +390,17 @@ class ControlledAircraft:
     #     self.controls = controls
     #     return controls
 
-    def step(self, dt: float):
+    def step(self, dt: float, wind: Optional[Vector] = None):
         """
         Use the step class found in PyAircraft
+
+        :param dt: timestep [s]
+        :param wind: (3,) NED wind velocity [m/s], only taken by aircraft flown through the wind, a ModelAircraft
         """
-        self.aircraft.step(dt)
+        if wind is None:
+            self.aircraft.step(dt)
+        else:
+            self.aircraft.step(dt, wind)
 
     @property
     def dict(self):
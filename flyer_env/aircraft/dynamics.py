@@ -0,0 +1,387 @@
+import functools
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import yaml
+
+from flyer_env.utils import cache_digest
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), "..", "envs", "data"
+)
+GRAVITY = 9.81
+STATE_FEATURES = [
+    "x",
+    "y",
+    "z",
+    "roll",
+    "pitch",
+    "yaw",
+    "u",
+    "v",
+    "w",
+    "p",
+    "q",
+    "r",
+]
+CONTROLS = ["aileron", "elevator", "tla", "rudder"]
+
+
+@functools.lru_cache(maxsize=None)
+def _load_parameters(aircraft_name: str, data_path: str) -> Dict[str, float]:
+    with open(os.path.join(data_path, f"{aircraft_name}.yaml")) as f:
+        return yaml.safe_load(f)
+
+
+def air_density(altitude):
+    """
+    International standard atmosphere density in the troposphere
+
+    :param altitude: altitude above sea level [m]
+    :return: air density [kg/m^3]
+    """
+    return 1.225 * np.power(1.0 - 2.25577e-5 * np.asarray(altitude), 4.2559)
+
+
+class AircraftModel:
+    """
+    A vectorized NumPy model of the rigid-body aircraft dynamics
+
+    Uses the same polynomial aerodynamic coefficients as pyflyer, read from the aircraft's yaml data file, and evaluates
+    the equations of motion for a whole batch of states and controls in one call. This is an approximation of the
+    pyflyer model for batched analysis (trim, linearisation, reachability) and for the traffic. It flies the ego aircraft
+    of the environments only when wind is configured, as pyflyer has no wind input.
+
+    States are ordered as in STATE_FEATURES, (x, y, z) NED position, (roll, pitch, yaw) Euler angles, (u, v, w) body
+    velocity and (p, q, r) body rates. Controls are ordered as in CONTROLS, (aileron, elevator, tla, rudder).
+    """
+
+    # Static thrust per unit thrust lever angle as a fraction of the aircraft's weight, calibrated so the model trims at
+    # the same thrust lever angle as pyflyer for the Twin Otter at 100 m/s, 1000 m
+    THRUST_TO_WEIGHT = 0.64
+    # Version of the equations of motion, bumped when they change so results cached from the model are rebuilt
+    VERSION = 1
+
+    def __init__(
+        self,
+        aircraft_name: str = "TO",
+        data_path: str = DATA_DIR,
+        parameters: Optional[Dict[str, float]] = None,
+    ) -> None:
+        """
+        Create an aircraft model
+
+        :param aircraft_name: name of the aircraft data file
+        :param data_path: directory containing the aircraft data files
+        :param parameters: parameters overriding those in the data file
+        """
+        self.aircraft_name = aircraft_name
+        self.parameters = dict(_load_parameters(aircraft_name, data_path))
+        if parameters:
+            self.parameters.update(parameters)
+        self.parameters.setdefault(
+            "max_thrust",
+            self.THRUST_TO_WEIGHT * self.parameters["mass"] * GRAVITY,
+        )
+
+    def __getitem__(self, item: str) -> float:
+        return self.parameters[item]
+
+    def digest(self) -> str:
+        """Digest of the model's equations and parameters, identifying results cached from it"""
+        return cache_digest(self.VERSION, self.THRUST_TO_WEIGHT, self.parameters)
+
+    def stall_alpha(self) -> Tuple[float, float]:
+        """
+        Angles of attack either side of zero where the slope of the lift curve vanishes
+
+        :return: the negative and positive stall angles of attack [rad]
+        """
+        c = self.parameters
+        roots = np.roots(
+            [
+                4.0 * c["c_L_alpha4"],
+                3.0 * c["c_L_alpha3"],
+                2.0 * c["c_L_alpha2"],
+                c["c_L_alpha"],
+            ]
+        )
+        roots = roots[np.isreal(roots)].real
+        lower = roots[roots < 0.0].max() if np.any(roots < 0.0) else -np.pi / 2
+        upper = roots[roots > 0.0].min() if np.any(roots > 0.0) else np.pi / 2
+        return float(lower), float(upper)
+
+    def forces_and_moments(self, state: np.ndarray, controls: np.ndarray):
+        """
+        Body-axis aerodynamic and propulsive forces and moments
+
+        :param state: (..., 12) states
+        :param controls: (..., 4) controls
+        :return: (..., 3) forces [N] and (..., 3) moments [Nm]
+        """
+        c = self.parameters
+        u, v, w = state[..., 6], state[..., 7], state[..., 8]
+        p, q, r = state[..., 9], state[..., 10], state[..., 11]
+        da, de, tla, dr = (
+            controls[..., 0],
+            controls[..., 1],
+            controls[..., 2],
+            controls[..., 3],
+        )
+
+        airspeed = np.sqrt(u * u + v * v + w * w)
+        alpha = np.arctan2(w, u)
+        beta = np.arcsin(np.clip(v / airspeed, -1.0, 1.0))
+        dyn_pressure = 0.5 * air_density(-state[..., 2]) * airspeed * airspeed
+        p_hat = p * c["wing_span"] / (2.0 * airspeed)
+        q_hat = q * c["mac"] / (2.0 * airspeed)
+        r_hat = r * c["wing_span"] / (2.0 * airspeed)
+        alpha2, alpha3 = alpha * alpha, alpha * alpha * alpha
+        alpha4 = alpha2 * alpha2
+
+        c_d = (
+            c["c_D_0"]
+            + c["c_D_alpha"] * alpha
+            + c["c_D_alpha_q"] * alpha * q_hat
+            + c["c_D_alpha_deltae"] * alpha * de
+            + c["c_D_alpha2"] * alpha2
+            + c["c_D_alpha2_q"] * alpha2 * q_hat
+            + c["c_D_alpha2_deltae"] * alpha2 * de
+            + c["c_D_alpha3"] * alpha3
+            + c["c_D_alpha3_q"] * alpha3 * q_hat
+            + c["c_D_alpha4"] * alpha4
+        )
+        c_y = (
+            c["c_Y_beta"] * beta
+            + c["c_Y_p"] * p_hat
+            + c["c_Y_r"] * r_hat
+            + c["c_Y_deltaa"] * da
+            + c["c_Y_deltar"] * dr
+        )
+        c_l = (
+            c["c_L_0"]
+            + c["c_L_alpha"] * alpha
+            + c["c_L_q"] * q_hat
+            + c["c_L_deltae"] * de
+            + c["c_L_alpha_q"] * alpha * q_hat
+            + c["c_L_alpha2"] * alpha2
+            + c["c_L_alpha3"] * alpha3
+            + c["c_L_alpha4"] * alpha4
+        )
+        c_roll = (
+            c["c_l_beta"] * beta
+            + c["c_l_p"] * p_hat
+            + c["c_l_r"] * r_hat
+            + c["c_l_deltaa"] * da
+            + c["c_l_deltar"] * dr
+        )
+        c_pitch = (
+            c["c_m_0"]
+            + c["c_m_alpha"] * alpha
+            + c["c_m_q"] * q_hat
+            + c["c_m_deltae"] * de
+            + c["c_m_alpha_q"] * alpha * q_hat
+            + c["c_m_alpha2_q"] * alpha2 * q_hat
+            + c["c_m_alpha2_deltae"] * alpha2 * de
+            + c["c_m_alpha3_q"] * alpha3 * q_hat
+            + c["c_m_alpha3_deltae"] * alpha3 * de
+            + c["c_m_alpha4"] * alpha4
+        )
+        c_yaw = (
+            c["c_n_beta"] * beta
+            + c["c_n_p"] * p_hat
+            + c["c_n_r"] * r_hat
+            + c["c_n_deltaa"] * da
+            + c["c_n_deltar"] * dr
+            + c["c_n_beta2"] * beta * beta
+            + c["c_n_beta3"] * beta * beta * beta
+        )
+
+        qs = dyn_pressure * c["wing_area"]
+        drag, side, lift = qs * c_d, qs * c_y, qs * c_l
+        cos_a, sin_a = np.cos(alpha), np.sin(alpha)
+        forces = np.stack(
+            [
+                lift * sin_a - drag * cos_a + tla * c["max_thrust"],
+                side,
+                -lift * cos_a - drag * sin_a,
+            ],
+            axis=-1,
+        )
+        moments = np.stack(
+            [
+                qs * c["wing_span"] * c_roll,
+                qs * c["mac"] * c_pitch,
+                qs * c["wing_span"] * c_yaw,
+            ],
+            axis=-1,
+        )
+        return forces, moments
+
+    def derivatives(
+        self,
+        state: np.ndarray,
+        controls: np.ndarray,
+        wind: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        State derivatives of the rigid-body equations of motion
+
+        :param state: (..., 12) states
+        :param controls: (..., 4) controls
+        :param wind: (..., 3) NED wind velocities [m/s], the aerodynamics act on the velocity relative to the air
+        :return: (..., 12) state derivatives
+        """
+        c = self.parameters
+        state = np.asarray(state, dtype=float)
+        controls = np.asarray(controls, dtype=float)
+        if wind is not None:
+            wind = np.asarray(wind, dtype=float)
+            batch = np.broadcast_shapes(state.shape[:-1], wind.shape[:-1])
+            state = np.broadcast_to(state, batch + (12,))
+
+        phi, theta, psi = state[..., 3], state[..., 4], state[..., 5]
+        u, v, w = state[..., 6], state[..., 7], state[..., 8]
+        p, q, r = state[..., 9], state[..., 10], state[..., 11]
+        s_phi, c_phi = np.sin(phi), np.cos(phi)
+        s_theta, c_theta = np.sin(theta), np.cos(theta)
+        s_psi, c_psi = np.sin(psi), np.cos(psi)
+        mass = c["mass"]
+
+        air_state = state
+        if wind is not None:
+            air_state = np.concatenate(
+                [state[..., :6], self.air_velocity(state, wind), state[..., 9:]],
+                axis=-1,
+            )
+        forces, moments = self.forces_and_moments(air_state, controls)
+
+        u_dot = r * v - q * w - GRAVITY * s_theta + forces[..., 0] / mass
+        v_dot = p * w - r * u + GRAVITY * c_theta * s_phi + forces[..., 1] / mass
+        w_dot = q * u - p * v + GRAVITY * c_theta * c_phi + forces[..., 2] / mass
+
+        ixx, iyy, izz, ixz = c["ixx"], c["iyy"], c["izz"], c["ixz"]
+        gamma = ixx * izz - ixz * ixz
+        l_net = moments[..., 0] + ixz * p * q - (izz - iyy) * q * r
+        n_net = moments[..., 2] - ixz * q * r - (iyy - ixx) * p * q
+        p_dot = (izz * l_net + ixz * n_net) / gamma
+        q_dot = (moments[..., 1] - (ixx - izz) * p * r - ixz * (p * p - r * r)) / iyy
+        r_dot = (ixz * l_net + ixx * n_net) / gamma
+
+        phi_dot = p + (q * s_phi + r * c_phi) * np.tan(theta)
+        theta_dot = q * c_phi - r * s_phi
+        psi_dot = (q * s_phi + r * c_phi) / c_theta
+
+        x_dot = (
+            c_theta * c_psi * u
+            + (s_phi * s_theta * c_psi - c_phi * s_psi) * v
+            + (c_phi * s_theta * c_psi + s_phi * s_psi) * w
+        )
+        y_dot = (
+            c_theta * s_psi * u
+            + (s_phi * s_theta * s_psi + c_phi * c_psi) * v
+            + (c_phi * s_theta * s_psi - s_phi * c_psi) * w
+        )
+        z_dot = -s_theta * u + s_phi * c_theta * v + c_phi * c_theta * w
+
+        return np.stack(
+            [
+                x_dot,
+                y_dot,
+                z_dot,
+                phi_dot,
+                theta_dot,
+                psi_dot,
+                u_dot,
+                v_dot,
+                w_dot,
+                p_dot,
+                q_dot,
+                r_dot,
+            ],
+            axis=-1,
+        )
+
+    @staticmethod
+    def air_velocity(state: np.ndarray, wind: np.ndarray) -> np.ndarray:
+        """
+        Body velocity relative to the air, the velocity the aerodynamics act on
+
+        :param state: (..., 12) states, their (u, v, w) body velocities relative to the ground
+        :param wind: (..., 3) NED wind velocities [m/s]
+        :return: (..., 3) (u, v, w) body velocities relative to the air [m/s]
+        """
+        state = np.asarray(state, dtype=float)
+        wind = np.asarray(wind, dtype=float)
+        s_phi, c_phi = np.sin(state[..., 3]), np.cos(state[..., 3])
+        s_theta, c_theta = np.sin(state[..., 4]), np.cos(state[..., 4])
+        s_psi, c_psi = np.sin(state[..., 5]), np.cos(state[..., 5])
+        w_n, w_e, w_d = wind[..., 0], wind[..., 1], wind[..., 2]
+        return np.stack(
+            [
+                state[..., 6]
+                - (c_theta * c_psi * w_n + c_theta * s_psi * w_e - s_theta * w_d),
+                state[..., 7]
+                - (
+                    (s_phi * s_theta * c_psi - c_phi * s_psi) * w_n
+                    + (s_phi * s_theta * s_psi + c_phi * c_psi) * w_e
+                    + s_phi * c_theta * w_d
+                ),
+                state[..., 8]
+                - (
+                    (c_phi * s_theta * c_psi + s_phi * s_psi) * w_n
+                    + (c_phi * s_theta * s_psi - s_phi * c_psi) * w_e
+                    + c_phi * c_theta * w_d
+                ),
+            ],
+            axis=-1,
+        )
+
+    def step(
+        self,
+        state: np.ndarray,
+        controls: np.ndarray,
+        dt: float,
+        wind: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Advance a batch of states by one fourth-order Runge-Kutta step
+
+        :param state: (..., 12) states
+        :param controls: (..., 4) controls, held over the step
+        :param dt: timestep [s]
+        :param wind: (..., 3) NED wind velocities, held over the step [m/s]
+        :return: (..., 12) states after the step
+        """
+        k1 = self.derivatives(state, controls, wind)
+        k2 = self.derivatives(state + 0.5 * dt * k1, controls, wind)
+        k3 = self.derivatives(state + 0.5 * dt * k2, controls, wind)
+        k4 = self.derivatives(state + dt * k3, controls, wind)
+        return state + dt / 6.0 * (k1 + 2.0 * k2 + 2.0 * k3 + k4)
+
+    @staticmethod
+    def trim_state(
+        airspeed, altitude, gamma, pitch, heading: float = 0.0
+    ) -> np.ndarray:
+        """
+        Wings-level state flying at a given airspeed and flight-path angle
+
+        :param airspeed: airspeed [m/s]
+        :param altitude: altitude [m]
+        :param gamma: flight-path angle, positive climbing [rad]
+        :param pitch: pitch attitude [rad]
+        :param heading: heading [rad]
+        :return: (..., 12) states
+        """
+        airspeed, altitude, gamma, pitch = np.broadcast_arrays(
+            *(np.asarray(a, dtype=float) for a in (airspeed, altitude, gamma, pitch))
+        )
+        alpha = pitch - gamma
+        state = np.zeros(airspeed.shape + (12,))
+        state[..., 2] = -altitude
+        state[..., 4] = pitch
+        state[..., 5] = heading
+        state[..., 6] = airspeed * np.cos(alpha)
+        state[..., 8] = airspeed * np.sin(alpha)
+        return state
@@ -0,0 +1,191 @@
+import functools
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+from flyer_env.aircraft.dynamics import AircraftModel
+from flyer_env.aircraft.trim import solve_trim
+from flyer_env.utils import cache_digest, defaults
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "flyer_env", "linear")
+# Version of the cached files, bumped when their contents or the way they are built change
+CACHE_VERSION = 1
+
+
+def linearise(
+    model: AircraftModel,
+    state: np.ndarray,
+    controls: np.ndarray,
+    dt: Optional[float] = None,
+    eps: float = 1e-5,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Linearise the dynamics about one or more operating points with central finite differences
+
+    All 2 x (12 + 4) perturbations of every operating point are evaluated in one call to the vectorized model.
+
+    :param model: the aircraft model
+    :param state: (..., 12) states to linearise about
+    :param controls: (..., 4) controls to linearise about
+    :param dt: timestep of the discrete model x[k+1] = A x[k] + B u[k] [s], if None the continuous model
+        x_dot = A x + B u is returned
+    :param eps: perturbation size, relative to the magnitude of each state and control
+    :return: the (..., 12, 12) A and (..., 12, 4) B matrices
+    """
+    state = np.asarray(state, dtype=float)
+    controls = np.asarray(controls, dtype=float)
+    n_x, n_u = state.shape[-1], controls.shape[-1]
+    batch = np.broadcast_shapes(state.shape[:-1], controls.shape[:-1])
+    point = np.concatenate(
+        [
+            np.broadcast_to(state, batch + (n_x,)),
+            np.broadcast_to(controls, batch + (n_u,)),
+        ],
+        axis=-1,
+    )
+    step = eps * np.maximum(1.0, np.abs(point))
+    perturbations = np.eye(n_x + n_u) * step[..., None, :]
+    perturbed = point[..., None, :] + np.concatenate(
+        [perturbations, -perturbations], axis=-2
+    )
+
+    if dt is None:
+        outputs = model.derivatives(perturbed[..., :n_x], perturbed[..., n_x:])
+    else:
+        outputs = model.step(perturbed[..., :n_x], perturbed[..., n_x:], dt)
+    n = n_x + n_u
+    jacobian = (outputs[..., :n, :] - outputs[..., n:, :]) / (2.0 * step[..., None])
+    jacobian = np.swapaxes(jacobian, -1, -2)
+    return jacobian[..., :n_x], jacobian[..., n_x:]
+
+
+class LinearModel:
+    """
+    A state-space model of the aircraft linearised about a trim point
+
+    The model acts on deviations from the trim state and controls, dx = x - state and du = u - controls, and predicts
+    offset + A dx + B du, where offset is the next state, or state derivative, at the trim point itself.
+    """
+
+    def __init__(
+        self,
+        A: np.ndarray,
+        B: np.ndarray,
+        state: np.ndarray,
+        controls: np.ndarray,
+        dt: Optional[float] = None,
+        offset: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Create a linear model
+
+        :param A: (12, 12) state matrix
+        :param B: (12, 4) control matrix
+        :param state: (12,) trim state
+        :param controls: (4,) trim controls
+        :param dt: timestep of a discrete model [s], None for a continuous model
+        :param offset: (12,) next state, or state derivative, at the trim point, defaults to the trim state, or zero
+        """
+        self.A = np.asarray(A, dtype=float)
+        self.B = np.asarray(B, dtype=float)
+        self.state = np.asarray(state, dtype=float)
+        self.controls = np.asarray(controls, dtype=float)
+        self.dt = dt
+        if offset is None:
+            offset = np.zeros_like(self.state) if dt is None else self.state
+        self.offset = np.asarray(offset, dtype=float)
+
+    def predict(self, state: np.ndarray, controls: np.ndarray) -> np.ndarray:
+        """
+        Predict the next state, or the state derivative of a continuous model, for a batch of states and controls
+
+        :param state: (..., 12) states
+        :param controls: (..., 4) controls
+        :return: (..., 12) next states, or state derivatives
+        """
+        dx = np.asarray(state) - self.state
+        du = np.asarray(controls) - self.controls
+        return self.offset + dx @ self.A.T + du @ self.B.T
+
+    def save(self, path: str) -> None:
+        """Save the model to an .npz file"""
+        np.savez(
+            path,
+            A=self.A,
+            B=self.B,
+            state=self.state,
+            controls=self.controls,
+            dt=np.nan if self.dt is None else self.dt,
+            offset=self.offset,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "LinearModel":
+        """Load a model saved with save"""
+        with np.load(path) as data:
+            dt = float(data["dt"])
+            return cls(
+                data["A"],
+                data["B"],
+                data["state"],
+                data["controls"],
+                None if np.isnan(dt) else dt,
+                data["offset"],
+            )
+
+
+@functools.lru_cache(maxsize=256)
+def linear_model(
+    aircraft_name: str = "TO",
+    airspeed: float = 100.0,
+    altitude: float = 1000.0,
+    gamma: float = 0.0,
+    dt: Optional[float] = None,
+    cache_dir: Optional[str] = CACHE_DIR,
+) -> LinearModel:
+    """
+    Get the model of an aircraft linearised about wings-level trim, caching it on disk
+
+    Cached files are named by a digest of the aircraft model and the defaults of the trim and linearisation, so
+    changes to either are rebuilt rather than loaded stale.
+
+    :param aircraft_name: name of the aircraft data file
+    :param airspeed: trim airspeed [m/s]
+    :param altitude: trim altitude [m]
+    :param gamma: trim flight-path angle [rad]
+    :param dt: timestep of the discrete model [s], if None the continuous model
+    :param cache_dir: directory models are cached in, if None models are not stored
+    :return: the linear model
+    """
+    model = AircraftModel(aircraft_name)
+    path = None
+    if cache_dir is not None:
+        digest = cache_digest(
+            CACHE_VERSION, model.digest(), defaults(solve_trim), defaults(linearise)
+        )
+        name = (
+            f"{aircraft_name}_{airspeed:.3f}_{altitude:.3f}_{gamma:.6f}_{dt}_"
+            f"{digest}.npz"
+        )
+        path = os.path.join(cache_dir, name)
+        if os.path.exists(path):
+            return LinearModel.load(path)
+
+    trim, _ = solve_trim(model, airspeed, altitude, gamma)
+    state = model.trim_state(airspeed, altitude, gamma, trim[0])
+    controls = np.array([0.0, trim[1], trim[2], 0.0])
+    A, B = linearise(model, state, controls, dt)
+    if dt is None:
+        offset = model.derivatives(state, controls)
+    else:
+        offset = model.step(state, controls, dt)
+    linear = LinearModel(A, B, state, controls, dt, offset)
+
+    if path is not None:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            linear.save(path)
+        except OSError:
+            pass
+    return linear
@@ -0,0 +1,255 @@
+import functools
+import os
+from typing import Optional
+
+import numpy as np
+from scipy.linalg import solve_discrete_are
+
+from flyer_env.aircraft.dynamics import AircraftModel
+from flyer_env.aircraft.linear import linearise
+from flyer_env.aircraft.trim import solve_trim_batch
+from flyer_env.utils import cache_digest, defaults
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "flyer_env", "lqr")
+# Version of the cached files, bumped when their contents or the way they are built change
+CACHE_VERSION = 1
+
+AIRSPEEDS = np.arange(60.0, 141.0, 10.0)
+ALTITUDES = np.arange(0.0, 5001.0, 1000.0)
+
+# The regulated states, every state bar the (x, y) position which does not affect the dynamics
+STATES = [2, 3, 4, 5, 6, 7, 8, 9, 10, 11]
+# Bryson's rule maximum deviations of the regulated states, [z, roll, pitch, yaw, u, v, w, p, q, r]
+MAX_STATE = np.array([10.0, 0.3, 0.2, 0.2, 5.0, 5.0, 5.0, 0.5, 0.5, 0.5])
+# Bryson's rule maximum deviations of the controls, [aileron, elevator, tla, rudder]
+MAX_CONTROL = np.array([0.1, 0.1, 0.3, 0.1])
+
+
+class GainSchedule:
+    """
+    Discrete LQR gains of an aircraft on a grid of airspeed and altitude
+
+    Each grid point holds the wings-level trim state and controls and the gain K of the regulator
+    u = u_trim - K (x - x_ref) over the regulated STATES, designed on the model linearised about that trim point.
+    """
+
+    def __init__(
+        self,
+        airspeeds: np.ndarray,
+        altitudes: np.ndarray,
+        gains: np.ndarray,
+        states: np.ndarray,
+        controls: np.ndarray,
+        dt: float,
+    ) -> None:
+        """
+        Create a gain schedule
+
+        :param airspeeds: (A,) increasing airspeeds [m/s]
+        :param altitudes: (H,) increasing altitudes [m]
+        :param gains: (A, H, 4, 10) gain matrices
+        :param states: (A, H, 12) trim states
+        :param controls: (A, H, 4) trim controls
+        :param dt: timestep the gains were designed for [s]
+        """
+        self.airspeeds = np.asarray(airspeeds, dtype=float)
+        self.altitudes = np.asarray(altitudes, dtype=float)
+        self.gains = np.asarray(gains, dtype=float)
+        self.states = np.asarray(states, dtype=float)
+        self.controls = np.asarray(controls, dtype=float)
+        self.dt = dt
+
+    @classmethod
+    def build(
+        cls,
+        model: AircraftModel,
+        dt: float,
+        airspeeds: np.ndarray = AIRSPEEDS,
+        altitudes: np.ndarray = ALTITUDES,
+        max_state: np.ndarray = MAX_STATE,
+        max_control: np.ndarray = MAX_CONTROL,
+    ) -> "GainSchedule":
+        """
+        Design the gains of every grid point
+
+        :param model: the aircraft model
+        :param dt: timestep the controller runs at [s]
+        :param airspeeds: (A,) increasing airspeeds [m/s]
+        :param altitudes: (H,) increasing altitudes [m]
+        :param max_state: maximum deviations of the regulated states, weighting Q by Bryson's rule
+        :param max_control: maximum deviations of the controls, weighting R by Bryson's rule
+        :return: the gain schedule
+        """
+        airspeed, altitude = np.meshgrid(airspeeds, altitudes, indexing="ij")
+        trim, _ = solve_trim_batch(model, airspeed, altitude)
+        states = model.trim_state(airspeed, altitude, 0.0, trim[..., 0])
+        controls = np.zeros(airspeed.shape + (4,))
+        controls[..., 1:3] = trim[..., 1:3]
+
+        A, B = linearise(model, states, controls, dt)
+        A = A[..., STATES, :][..., STATES]
+        B = B[..., STATES, :]
+        Q = np.diag(1.0 / np.square(max_state))
+        R = np.diag(1.0 / np.square(max_control))
+        gains = np.zeros(airspeed.shape + (4, len(STATES)))
+        for idx in np.ndindex(airspeed.shape):
+            P = solve_discrete_are(A[idx], B[idx], Q, R)
+            gains[idx] = np.linalg.solve(
+                R + B[idx].T @ P @ B[idx], B[idx].T @ P @ A[idx]
+            )
+        return cls(airspeeds, altitudes, gains, states, controls, dt)
+
+    def save(self, path: str) -> None:
+        """Save the schedule to an .npz file"""
+        np.savez(
+            path,
+            airspeeds=self.airspeeds,
+            altitudes=self.altitudes,
+            gains=self.gains,
+            states=self.states,
+            controls=self.controls,
+            dt=self.dt,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "GainSchedule":
+        """Load a schedule saved with save"""
+        with np.load(path) as data:
+            return cls(
+                data["airspeeds"],
+                data["altitudes"],
+                data["gains"],
+                data["states"],
+                data["controls"],
+                float(data["dt"]),
+            )
+
+    def lookup(self, airspeed, altitude):
+        """
+        Interpolate the schedule bilinearly, clamping to the edges of the grid
+
+        :param airspeed: (N,) airspeeds [m/s]
+        :param altitude: (N,) altitudes [m]
+        :return: the (N, 4, 10) gains, (N, 12) trim states and (N, 4) trim controls
+        """
+        idx, weights = [], []
+        for axis, value in zip((self.airspeeds, self.altitudes), (airspeed, altitude)):
+            value = np.clip(np.asarray(value, dtype=float), axis[0], axis[-1])
+            lower = np.clip(np.searchsorted(axis, value) - 1, 0, len(axis) - 2)
+            idx.append(lower)
+            weights.append((value - axis[lower]) / (axis[lower + 1] - axis[lower]))
+
+        def interpolate(table):
+            result = 0.0
+            for da in (0, 1):
+                for dh in (0, 1):
+                    weight = (weights[0] if da else 1.0 - weights[0]) * (
+                        weights[1] if dh else 1.0 - weights[1]
+                    )
+                    weight = weight.reshape(weight.shape + (1,) * (table.ndim - 2))
+                    result = result + weight * table[idx[0] + da, idx[1] + dh]
+            return result
+
+        return (
+            interpolate(self.gains),
+            interpolate(self.states),
+            interpolate(self.controls),
+        )
+
+
+@functools.lru_cache(maxsize=None)
+def gain_schedule(
+    aircraft_name: str = "TO", dt: float = 0.01, cache_dir: Optional[str] = CACHE_DIR
+) -> GainSchedule:
+    """
+    Get the gain schedule of an aircraft, caching it on disk
+
+    Cached files are named by a digest of the aircraft model and the defaults of the schedule's design, so changes to
+    either are rebuilt rather than loaded stale.
+
+    :param aircraft_name: name of the aircraft data file
+    :param dt: timestep the controller runs at [s]
+    :param cache_dir: directory schedules are cached in, if None schedules are not stored
+    :return: the gain schedule
+    """
+    model = AircraftModel(aircraft_name)
+    path = None
+    if cache_dir is not None:
+        digest = cache_digest(
+            CACHE_VERSION,
+            model.digest(),
+            STATES,
+            defaults(GainSchedule.build),
+            defaults(solve_trim_batch),
+            defaults(linearise),
+        )
+        path = os.path.join(cache_dir, f"{aircraft_name}_{dt}_{digest}.npz")
+        if os.path.exists(path):
+            return GainSchedule.load(path)
+
+    schedule = GainSchedule.build(model, dt)
+
+    if path is not None:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            schedule.save(path)
+        except OSError:
+            pass
+    return schedule
+
+
+class LQRController:
+    """
+    Gain-scheduled LQR autopilot holding a commanded heading, altitude and airspeed
+
+    The gains and reference trim are interpolated from the schedule when schedule is called, which the caller does at a
+    low rate, so each tick of __call__ is one batched matrix-vector multiply.
+    """
+
+    # Limits on the tracked errors, so large commanded changes are flown at a bounded rate
+    ERROR_LIMITS = np.array([20.0, 0.5, 0.5, 0.3, 10.0, 10.0, 10.0, 1.0, 1.0, 1.0])
+    CONTROL_LIMITS = (
+        np.array([-0.35, -0.35, 0.0, -0.35]),
+        np.array([0.35, 0.35, 1.0, 0.35]),
+    )
+
+    def __init__(self, schedule: GainSchedule, n_aircraft: int = 1) -> None:
+        """
+        Create an LQR controller
+
+        :param schedule: the gain schedule
+        :param n_aircraft: number of aircraft controlled in each batch
+        """
+        self.schedule = schedule
+        self.gains = np.zeros((n_aircraft, 4, len(STATES)))
+        self.trim_states = np.zeros((n_aircraft, 12))
+        self.trim_controls = np.zeros((n_aircraft, 4))
+
+    def update_schedule(self, airspeed, altitude) -> None:
+        """
+        Select the gains and reference trim for the commanded airspeeds and altitudes
+
+        :param airspeed: (N,) commanded airspeeds [m/s]
+        :param altitude: (N,) commanded altitudes, positive up [m]
+        """
+        self.gains, self.trim_states, self.trim_controls = self.schedule.lookup(
+            np.atleast_1d(airspeed), np.atleast_1d(altitude)
+        )
+
+    def __call__(self, states: np.ndarray, heading, z) -> np.ndarray:
+        """
+        Controls of a batch of aircraft
+
+        :param states: (N, 12) aircraft states
+        :param heading: (N,) commanded headings [rad]
+        :param z: (N,) commanded NED altitudes, negative up [m]
+        :return: (N, 4) (aileron, elevator, tla, rudder) controls
+        """
+        reference = self.trim_states[:, STATES]
+        reference[:, 0] = z
+        reference[:, 3] = heading
+        error = np.asarray(states)[:, STATES] - reference
+        error[:, 3] = np.arctan2(np.sin(error[:, 3]), np.cos(error[:, 3]))
+        error = np.clip(error, -self.ERROR_LIMITS, self.ERROR_LIMITS)
+        controls = self.trim_controls - np.einsum("nij,nj->ni", self.gains, error)
+        return np.clip(controls, *self.CONTROL_LIMITS)
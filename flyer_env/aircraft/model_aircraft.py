@@ -0,0 +1,147 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from flyer_env.aircraft.dynamics import (
+    CONTROLS,
+    DATA_DIR,
+    STATE_FEATURES,
+    AircraftModel,
+)
+from flyer_env.aircraft.trim import solve_trim
+from flyer_env.utils import Vector
+
+
+class ModelAircraft:
+    """
+    A single aircraft flown by the vectorized AircraftModel, in place of a pyflyer::Aircraft when there is wind
+
+    pyflyer has no wind input, so the environments fly their aircraft by AircraftModel when wind is configured. It takes
+    the same act and step calls and exposes the same dict, position and heading as a pyflyer aircraft, so the actions,
+    autopilots, observations and rewards are unchanged. The wind acts on the aerodynamics, disturbing the attitude and
+    airspeed, and carries the aircraft over the ground. The (u, v, w) velocities of dict are relative to the air, as
+    pyflyer's are, so the autopilots hold airspeed.
+
+    The aircraft crashes as a pyflyer aircraft does, below sea level or on meeting the ground within GROUND_HEIGHT of
+    it too fast, descending too fast, or pitched or banked beyond the limits below, and stays crashed until reset.
+    """
+
+    # Crash limits near the ground
+    GROUND_HEIGHT = 5.0  # height below which the aircraft is on the ground [m]
+    MAX_GROUND_SPEED = 100.0  # forward speed [m/s]
+    MAX_SINK_RATE = 5.0  # descent rate [m/s]
+    # Nose strike and tail strike pitch [rad]
+    PITCH_LIMITS = (np.radians(-5.0), np.radians(20.0))
+    MAX_BANK = np.radians(5.0)  # wingtip strike [rad]
+
+    def __init__(
+        self,
+        aircraft_name: str = "TO",
+        data_path: str = DATA_DIR,
+        display=None,
+    ) -> None:
+        """
+        Create an aircraft, in trim once reset
+
+        :param aircraft_name: name of the aircraft data file
+        :param data_path: directory containing the aircraft data files
+        :param display: pyflyer aircraft moved to the aircraft's position by drawn, for the world's renderer
+        """
+        self.model = AircraftModel(aircraft_name, data_path)
+        self.display = display
+        self.state = np.zeros(12)
+        self.controls = np.zeros(4)
+        self.wind = np.zeros(3)
+        self._crashed = False
+
+    def reset(self, pos: Vector, heading: float, airspeed: float) -> None:
+        """
+        Place the aircraft in wings-level trim
+
+        :param pos: (3,) NED position [m]
+        :param heading: heading [rad]
+        :param airspeed: airspeed [m/s]
+        """
+        altitude = -float(pos[2])
+        trim, _ = solve_trim(self.model, airspeed, altitude)
+        self.state = self.model.trim_state(airspeed, altitude, 0.0, trim[0], heading)
+        self.state[0:2] = pos[0:2]
+        self.controls = np.array([0.0, trim[1], trim[2], 0.0])
+        self.wind = np.zeros(3)
+        self._crashed = False
+        self._check_crash()
+
+    def act(self, action: Dict[str, float]) -> None:
+        """Set the (aileron, elevator, tla, rudder) controls, held until the next act"""
+        self.controls = np.array([action[name] for name in CONTROLS], dtype=float)
+
+    def step(self, dt: float, wind: Optional[Vector] = None) -> None:
+        """
+        Step the aircraft by one timestep
+
+        :param dt: timestep [s]
+        :param wind: (3,) NED wind velocity, held over the step [m/s]
+        """
+        self.wind = np.zeros(3) if wind is None else np.asarray(wind, dtype=float)
+        self.state = self.model.step(self.state, self.controls, dt, self.wind)
+        self.state[5] = np.arctan2(np.sin(self.state[5]), np.cos(self.state[5]))
+        self._check_crash()
+
+    def _check_crash(self) -> None:
+        """Latch a crash if the aircraft is below sea level or has met the ground outside the limits"""
+        z, roll, pitch = self.state[2:5]
+        u, v, w = self.state[6:9]
+        if z > 0.0:
+            self._crashed = True
+        elif -z < self.GROUND_HEIGHT:
+            sink_rate = (
+                -np.sin(pitch) * u
+                + np.sin(roll) * np.cos(pitch) * v
+                + np.cos(roll) * np.cos(pitch) * w
+            )
+            self._crashed |= bool(
+                u > self.MAX_GROUND_SPEED
+                or sink_rate > self.MAX_SINK_RATE
+                or not self.PITCH_LIMITS[0] <= pitch <= self.PITCH_LIMITS[1]
+                or abs(roll) > self.MAX_BANK
+            )
+
+    @property
+    def dict(self) -> Dict[str, float]:
+        """State ordered as STATE_FEATURES, the (u, v, w) body velocities relative to the air"""
+        state = self.state.copy()
+        state[6:9] = self.model.air_velocity(self.state, self.wind)
+        return dict(zip(STATE_FEATURES, state.tolist()))
+
+    @property
+    def position(self) -> List[float]:
+        """(3,) NED position [m]"""
+        return self.state[0:3].tolist()
+
+    @property
+    def heading(self) -> float:
+        """Heading [rad]"""
+        return float(self.state[5])
+
+    @property
+    def airspeed(self) -> float:
+        """Airspeed [m/s]"""
+        return float(np.linalg.norm(self.model.air_velocity(self.state, self.wind)))
+
+    @property
+    def crashed(self) -> bool:
+        """True once the aircraft has crashed"""
+        return self._crashed
+
+    def goal_dist(self, goal: Vector) -> float:
+        """Distance to a goal position [m]"""
+        return float(
+            np.linalg.norm(self.state[0:3] - np.asarray(goal, dtype=float)[:3])
+        )
+
+    def drawn(self):
+        """The display aircraft, moved to the aircraft's position and heading"""
+        self.display.reset(
+            pos=self.position, heading=self.heading, airspeed=self.airspeed
+        )
+        return self.display
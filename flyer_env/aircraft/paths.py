@@ -0,0 +1,451 @@
+import functools
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from scipy.interpolate import CubicSpline, make_interp_spline
+
+from flyer_env.aircraft.trajectory import ReferenceTrajectory
+from flyer_env.utils import Vector
+
+# Headings follow the aircraft yaw convention, measured from the x-axis towards the y-axis. A positive curvature
+# increases heading, which is a right turn in the north-east-down frame. Heights are positive up, so a climb decreases z.
+
+
+class Segment:
+    """A piece of a path that is sampled onwards from the end pose of the previous piece"""
+
+    def sample(
+        self, position: np.ndarray, heading: float, ds: float
+    ) -> Tuple[np.ndarray, float]:
+        """
+        Densely sample the segment from a start pose
+
+        :param position: (3,) start position [m]
+        :param heading: start heading [rads]
+        :param ds: maximum horizontal spacing between samples [m]
+        :return: (k, 3) sampled positions excluding the start position and the end heading [rads]
+        """
+        raise NotImplementedError
+
+
+class CurvatureSegment(Segment):
+
+    def __init__(
+        self,
+        length: float,
+        curvature_start: float = 0.0,
+        curvature_end: Optional[float] = None,
+        climb: float = 0.0,
+    ):
+        """
+        A segment with curvature varying linearly along its horizontal length, with a constant climb gradient
+
+        Covers straight lines, circular arcs, helices and clothoids.
+
+        :param length: horizontal length [m]
+        :param curvature_start: curvature at the start of the segment [1/m]
+        :param curvature_end: curvature at the end of the segment [1/m], defaults to curvature_start
+        :param climb: height gained over the segment [m]
+        """
+        self.length = length
+        self.curvature_start = curvature_start
+        self.curvature_end = curvature_start if curvature_end is None else curvature_end
+        self.climb = climb
+
+    def heading(self, s: np.ndarray, heading: float) -> np.ndarray:
+        """Heading at horizontal distance s along the segment, in closed form [rads]"""
+        dk = (
+            (self.curvature_end - self.curvature_start) / self.length
+            if self.length > 0.0
+            else 0.0
+        )
+        return heading + self.curvature_start * s + 0.5 * dk * s**2
+
+    def sample(
+        self, position: np.ndarray, heading: float, ds: float
+    ) -> Tuple[np.ndarray, float]:
+        n = max(int(np.ceil(self.length / ds)), 1)
+        s = np.linspace(0.0, self.length, n + 1)
+        step = self.length / n
+        # Midpoint integration of the heading for the horizontal position
+        psi_mid = self.heading(0.5 * (s[:-1] + s[1:]), heading)
+        samples = np.empty((n, 3))
+        samples[:, 0] = position[0] + np.cumsum(np.cos(psi_mid) * step)
+        samples[:, 1] = position[1] + np.cumsum(np.sin(psi_mid) * step)
+        samples[:, 2] = position[2] - self.climb * s[1:] / self.length
+        return samples, float(self.heading(self.length, heading))
+
+
+def straight(length: float, climb: float = 0.0) -> CurvatureSegment:
+    """Straight line of horizontal length [m], optionally climbing by climb [m]"""
+    return CurvatureSegment(length, climb=climb)
+
+
+def arc(radius: float, angle: float, climb: float = 0.0) -> CurvatureSegment:
+    """Circular arc turning through a signed angle [rads], positive increases heading"""
+    return CurvatureSegment(
+        radius * np.abs(angle), np.sign(angle) / radius, climb=climb
+    )
+
+
+def helix(radius: float, angle: float, height: float) -> CurvatureSegment:
+    """Helical climb turning through a signed angle [rads] while gaining height [m]"""
+    return arc(radius, angle, climb=height)
+
+
+def clothoid(
+    length: float, curvature_start: float, curvature_end: float, climb: float = 0.0
+) -> CurvatureSegment:
+    """Clothoid (Euler spiral) transition between two curvatures [1/m]"""
+    return CurvatureSegment(length, curvature_start, curvature_end, climb=climb)
+
+
+class DubinsSegment(Segment):
+
+    WORDS: List[str] = ["LSL", "RSR", "LSR", "RSL", "RLR", "LRL"]
+
+    def __init__(
+        self,
+        end_position: Vector,
+        end_heading: float,
+        radius: float,
+    ):
+        """
+        Shortest path of bounded curvature between the start pose and an end pose
+
+        Here "L" turns increase heading and "R" turns decrease heading. If end_position has a third component the
+        height change is spread evenly over the path's length.
+
+        :param end_position: (x, y) or (x, y, z) end position [m]
+        :param end_heading: end heading [rads]
+        :param radius: minimum turn radius [m]
+        """
+        self.end_position = np.asarray(end_position, dtype=np.float64)
+        self.end_heading = end_heading
+        self.radius = radius
+
+    @staticmethod
+    def _mod(angle):
+        return np.mod(angle, 2.0 * np.pi)
+
+    def _word(
+        self, word: str, d: float, a: float, b: float
+    ) -> Optional[Tuple[float, float, float]]:
+        """Normalised (t, p, q) segment lengths of a Dubins word, or None if the word is infeasible"""
+        sa, sb, ca, cb = np.sin(a), np.sin(b), np.cos(a), np.cos(b)
+        cab = np.cos(a - b)
+        if word == "LSL":
+            p2 = 2.0 + d**2 - 2.0 * cab + 2.0 * d * (sa - sb)
+            if p2 < 0.0:
+                return None
+            tmp = np.arctan2(cb - ca, d + sa - sb)
+            return self._mod(-a + tmp), np.sqrt(p2), self._mod(b - tmp)
+        if word == "RSR":
+            p2 = 2.0 + d**2 - 2.0 * cab + 2.0 * d * (sb - sa)
+            if p2 < 0.0:
+                return None
+            tmp = np.arctan2(ca - cb, d - sa + sb)
+            return self._mod(a - tmp), np.sqrt(p2), self._mod(-b + tmp)
+        if word == "LSR":
+            p2 = -2.0 + d**2 + 2.0 * cab + 2.0 * d * (sa + sb)
+            if p2 < 0.0:
+                return None
+            p = np.sqrt(p2)
+            tmp = np.arctan2(-ca - cb, d + sa + sb) - np.arctan2(-2.0, p)
+            return self._mod(-a + tmp), p, self._mod(-self._mod(b) + tmp)
+        if word == "RSL":
+            p2 = -2.0 + d**2 + 2.0 * cab - 2.0 * d * (sa + sb)
+            if p2 < 0.0:
+                return None
+            p = np.sqrt(p2)
+            tmp = np.arctan2(ca + cb, d - sa - sb) - np.arctan2(2.0, p)
+            return self._mod(a - tmp), p, self._mod(b - tmp)
+        if word == "RLR":
+            tmp = (6.0 - d**2 + 2.0 * cab + 2.0 * d * (sa - sb)) / 8.0
+            if np.abs(tmp) > 1.0:
+                return None
+            p = self._mod(2.0 * np.pi - np.arccos(tmp))
+            t = self._mod(a - np.arctan2(ca - cb, d - sa + sb) + 0.5 * p)
+            return t, p, self._mod(a - b - t + p)
+        if word == "LRL":
+            tmp = (6.0 - d**2 + 2.0 * cab + 2.0 * d * (sb - sa)) / 8.0
+            if np.abs(tmp) > 1.0:
+                return None
+            p = self._mod(2.0 * np.pi - np.arccos(tmp))
+            t = self._mod(-a - np.arctan2(ca - cb, d + sa - sb) + 0.5 * p)
+            return t, p, self._mod(self._mod(b) - a - t + p)
+        raise ValueError(f"Unknown Dubins word {word}")
+
+    def segments(self, position: np.ndarray, heading: float) -> List[CurvatureSegment]:
+        """Resolve the shortest Dubins word from a start pose into curvature segments"""
+        delta = self.end_position[:2] - position[:2]
+        theta = np.arctan2(delta[1], delta[0])
+        d = np.hypot(delta[0], delta[1]) / self.radius
+        a = self._mod(heading - theta)
+        b = self._mod(self.end_heading - theta)
+
+        best = None
+        for word in self.WORDS:
+            lengths = self._word(word, d, a, b)
+            if lengths is not None and (best is None or sum(lengths) < sum(best[1])):
+                best = (word, lengths)
+        if best is None:
+            raise ValueError("No feasible Dubins path")
+
+        word, lengths = best
+        total = sum(lengths) * self.radius
+        climb = 0.0
+        if len(self.end_position) > 2:
+            climb = position[2] - self.end_position[2]
+        curvature = {"L": 1.0 / self.radius, "R": -1.0 / self.radius, "S": 0.0}
+        return [
+            CurvatureSegment(
+                length * self.radius,
+                curvature[letter],
+                climb=climb * length * self.radius / total if total > 0.0 else 0.0,
+            )
+            for letter, length in zip(word, lengths)
+            if length * self.radius > 1e-9
+        ]
+
+    def sample(
+        self, position: np.ndarray, heading: float, ds: float
+    ) -> Tuple[np.ndarray, float]:
+        samples = [np.empty((0, 3))]
+        for segment in self.segments(position, heading):
+            points, heading = segment.sample(position, heading, ds)
+            samples.append(points)
+            position = points[-1]
+        return np.concatenate(samples), heading
+
+
+def dubins(end_position: Vector, end_heading: float, radius: float) -> DubinsSegment:
+    """Shortest bounded curvature path to an end pose, see DubinsSegment"""
+    return DubinsSegment(end_position, end_heading, radius)
+
+
+class SplineSegment(Segment):
+
+    def __init__(self, waypoints: Sequence[Vector], kind: str = "cubic"):
+        """
+        Smooth curve through absolute waypoints, parameterised by chord length
+
+        The curve starts from the end of the previous segment, which is prepended to the waypoints.
+
+        :param waypoints: (m, 3) positions to pass through [m]
+        :param kind: "cubic" for a natural cubic spline or "bspline" for a cubic B-spline
+        """
+        self.waypoints = np.asarray(waypoints, dtype=np.float64)
+        self.kind = kind
+
+    def sample(
+        self, position: np.ndarray, heading: float, ds: float
+    ) -> Tuple[np.ndarray, float]:
+        points = np.vstack([position[None, :3], self.waypoints])
+        chord = np.concatenate(
+            [[0.0], np.cumsum(np.linalg.norm(np.diff(points, axis=0), axis=1))]
+        )
+        if self.kind == "cubic":
+            curve = CubicSpline(chord, points, axis=0, bc_type="natural")
+        elif self.kind == "bspline":
+            curve = make_interp_spline(chord, points, k=min(3, len(points) - 1), axis=0)
+        else:
+            raise ValueError(f"Unknown spline kind {self.kind}")
+        n = max(int(np.ceil(chord[-1] / ds)), 1)
+        samples = curve(np.linspace(0.0, chord[-1], n + 1)[1:])
+        tangent = samples[-1] - samples[-2] if n > 1 else samples[-1] - position
+        return samples, float(np.arctan2(tangent[1], tangent[0]))
+
+
+def spline(waypoints: Sequence[Vector], kind: str = "cubic") -> SplineSegment:
+    """Smooth curve through waypoints, see SplineSegment"""
+    return SplineSegment(waypoints, kind)
+
+
+class Path:
+
+    def __init__(self, positions: np.ndarray, resolution: float = 1.0):
+        """
+        A reference path tabulated on a uniform arc-length grid
+
+        Position, unit tangent and horizontal curvature are precomputed at every resolution metres of 3D arc length,
+        so evaluating the path at any number of arc lengths or times is a vectorized table interpolation.
+
+        :param positions: (n, 3) dense ordered samples of the path [m]
+        :param resolution: arc-length spacing of the table [m]
+        """
+        positions = np.asarray(positions, dtype=np.float64)
+        step = np.linalg.norm(np.diff(positions, axis=0), axis=1)
+        keep = np.concatenate([[True], step > 0.0])
+        positions = positions[keep]
+        arc_length = np.concatenate([[0.0], np.cumsum(step[keep[1:]])])
+        if arc_length[-1] <= 0.0:
+            raise ValueError("Path has zero length")
+
+        self.length = arc_length[-1]
+        n = int(np.ceil(self.length / resolution)) + 1
+        self.s = np.linspace(0.0, self.length, n)
+        self.resolution = self.s[1]
+        self.positions = np.stack(
+            [np.interp(self.s, arc_length, positions[:, idx]) for idx in range(3)],
+            axis=1,
+        )
+
+        tangents = np.gradient(self.positions, self.s, axis=0)
+        self.tangents = tangents / np.linalg.norm(tangents, axis=1, keepdims=True)
+        self.headings = np.unwrap(np.arctan2(self.tangents[:, 1], self.tangents[:, 0]))
+        horizontal = np.hypot(self.tangents[:, 0], self.tangents[:, 1])
+        self.curvatures = np.gradient(self.headings, self.s) / np.maximum(
+            horizontal, 1e-9
+        )
+
+    @classmethod
+    def from_segments(
+        cls,
+        segments: Sequence[Union[Segment, Sequence[Segment]]],
+        start_position: Vector,
+        start_heading: float = 0.0,
+        resolution: float = 1.0,
+    ) -> "Path":
+        """
+        Build a composite path by chaining segments from a start pose
+
+        :param segments: segments to chain, nested lists are flattened
+        :param start_position: (3,) start position [m]
+        :param start_heading: start heading [rads]
+        :param resolution: arc-length spacing of the table [m]
+        :return: the tabulated path
+        """
+        position = np.asarray(start_position, dtype=np.float64)
+        heading = start_heading
+        samples = [position[None, :]]
+        ds = 0.25 * resolution
+        for segment in _flatten(segments):
+            points, heading = segment.sample(position, heading, ds)
+            if len(points) > 0:
+                samples.append(points)
+                position = points[-1]
+        return cls(np.concatenate(samples), resolution=resolution)
+
+    @classmethod
+    def from_config(
+        cls, config: dict, start_position: Vector, start_heading: float = 0.0
+    ) -> "Path":
+        """
+        Build a path from a trajectory configuration, e.g.
+        {"name": "path", "segments": [{"type": "straight", "length": 500.0}, ...], "resolution": 1.0}
+
+        Paths are cached, so episodes with the same configuration and start pose reuse the same tables.
+
+        :param config: trajectory configuration with a list of segment configurations
+        :param start_position: (3,) start position [m]
+        :param start_heading: start heading [rads]
+        :return: the tabulated path
+        """
+        return _path_from_config(
+            _freeze(config["segments"]),
+            tuple(float(p) for p in start_position),
+            float(start_heading),
+            float(config.get("resolution", 1.0)),
+        )
+
+    def _interp(self, table: np.ndarray, s) -> np.ndarray:
+        s = np.clip(np.asarray(s, dtype=np.float64), 0.0, self.length)
+        index = np.minimum((s / self.resolution).astype(int), len(self.s) - 2)
+        weight = s / self.resolution - index
+        if table.ndim > 1:
+            weight = weight[..., None]
+        return table[index] * (1.0 - weight) + table[index + 1] * weight
+
+    def position(self, s) -> np.ndarray:
+        """Position at arc length(s) s [m], clipped to the ends of the path"""
+        return self._interp(self.positions, s)
+
+    def tangent(self, s) -> np.ndarray:
+        """Unit tangent at arc length(s) s"""
+        tangent = self._interp(self.tangents, s)
+        return tangent / np.linalg.norm(tangent, axis=-1, keepdims=True)
+
+    def heading(self, s) -> np.ndarray:
+        """Heading at arc length(s) s [rads]"""
+        return self._interp(self.headings, s)
+
+    def curvature(self, s) -> np.ndarray:
+        """Signed horizontal curvature at arc length(s) s [1/m]"""
+        return self._interp(self.curvatures, s)
+
+    def reference(
+        self, speed: float, dt: float, n_steps: int, start_time: float = 0.0
+    ) -> ReferenceTrajectory:
+        """
+        Tabulate flying the path at a constant speed into a time-indexed reference trajectory
+
+        :param speed: speed along the path [m/s]
+        :param dt: time step between ticks [s]
+        :param n_steps: number of ticks after the start
+        :param start_time: time at the start of the path [s]
+        :return: the reference trajectory, finishing once the end of the path is reached
+        """
+        times = np.cumsum(np.concatenate([[start_time], np.full(n_steps, dt)]))
+        s = speed * (times - start_time)
+        return ReferenceTrajectory(
+            dt,
+            times,
+            self.position(s),
+            self.heading(s),
+            start_time + self.length / speed,
+        )
+
+
+def _flatten(segments):
+    for segment in segments:
+        if isinstance(segment, Segment):
+            yield segment
+        else:
+            yield from _flatten(segment)
+
+
+def _freeze(config):
+    """Convert nested dicts and lists into hashable tuples"""
+    if isinstance(config, dict):
+        return tuple((key, _freeze(value)) for key, value in sorted(config.items()))
+    if isinstance(config, (list, tuple, np.ndarray)):
+        return tuple(_freeze(value) for value in config)
+    return config
+
+
+@functools.lru_cache(maxsize=32)
+def _path_from_config(
+    segments: tuple,
+    start_position: Tuple[float, float, float],
+    start_heading: float,
+    resolution: float,
+) -> Path:
+    return Path.from_segments(
+        [segment_factory(dict(segment)) for segment in segments],
+        start_position,
+        start_heading,
+        resolution=resolution,
+    )
+
+
+def segment_factory(config: dict) -> Segment:
+    if config["type"] == "straight":
+        return straight(config["length"], config.get("climb", 0.0))
+    elif config["type"] == "arc":
+        return arc(config["radius"], config["angle"], config.get("climb", 0.0))
+    elif config["type"] == "helix":
+        return helix(config["radius"], config["angle"], config["height"])
+    elif config["type"] == "clothoid":
+        return clothoid(
+            config["length"],
+            config["curvature_start"],
+            config["curvature_end"],
+            config.get("climb", 0.0),
+        )
+    elif config["type"] == "dubins":
+        return dubins(config["end_position"], config["end_heading"], config["radius"])
+    elif config["type"] == "spline":
+        return spline(config["waypoints"], config.get("kind", "cubic"))
+    else:
+        raise ValueError("Unknown segment type")
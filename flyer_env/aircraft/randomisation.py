@@ -0,0 +1,126 @@
+import os
+import shutil
+import tempfile
+import weakref
+from typing import Dict, List, Optional
+
+import numpy as np
+import yaml
+
+from flyer_env.aircraft.dynamics import DATA_DIR, AircraftModel, _load_parameters
+
+# Relative half-range of the uniform perturbation applied to each randomised parameter
+DEFAULT_SCALES = {
+    "mass": 0.1,
+    "ixx": 0.1,
+    "iyy": 0.1,
+    "izz": 0.1,
+    "ixz": 0.1,
+    "c_D_0": 0.1,
+    "c_D_alpha": 0.1,
+    "c_D_alpha2": 0.1,
+    "c_L_0": 0.1,
+    "c_L_alpha": 0.1,
+    "c_L_deltae": 0.1,
+    "c_m_0": 0.1,
+    "c_m_alpha": 0.1,
+    "c_m_q": 0.1,
+    "c_m_deltae": 0.1,
+    "c_Y_beta": 0.1,
+    "c_l_beta": 0.1,
+    "c_l_p": 0.1,
+    "c_l_deltaa": 0.1,
+    "c_n_beta": 0.1,
+    "c_n_r": 0.1,
+    "c_n_deltar": 0.1,
+}
+
+
+class ParameterRandomiser:
+    """
+    Randomise the mass, inertia and aerodynamic parameters of an aircraft
+
+    The nominal parameters are parsed once and perturbation sets are sampled for a whole batch at once as an (N, P)
+    array, each parameter scaled by a uniform factor in [1 - scale, 1 + scale]. Samples can be turned into an in-memory
+    (and batched) AircraftModel directly. pyflyer aircraft can only be built from a data file, so a pool of samples is
+    written to a temporary directory once, up front, and each reset picks an aircraft from the pool.
+    """
+
+    def __init__(
+        self,
+        aircraft_name: str = "TO",
+        scales: Optional[Dict[str, float]] = None,
+        data_path: str = DATA_DIR,
+    ) -> None:
+        """
+        Create a parameter randomiser
+
+        :param aircraft_name: name of the aircraft data file
+        :param scales: relative half-range of the perturbation of each randomised parameter
+        :param data_path: directory containing the aircraft data files
+        """
+        scales = DEFAULT_SCALES if scales is None else scales
+        self.aircraft_name = aircraft_name
+        self.nominal = _load_parameters(aircraft_name, data_path)
+        self.names: List[str] = list(scales)
+        self.base = np.array([self.nominal[name] for name in self.names], dtype=float)
+        self.scales = np.array([scales[name] for name in self.names], dtype=float)
+
+        self.pool = None
+        self.pool_dir = None
+
+    def sample(self, np_random, n: int) -> np.ndarray:
+        """
+        Sample perturbed parameter sets
+
+        :param np_random: random number generator
+        :param n: number of parameter sets
+        :return: (n, P) parameter values, ordered as names
+        """
+        factors = 1.0 + self.scales * np_random.uniform(-1.0, 1.0, (n, len(self.names)))
+        return self.base * factors
+
+    def parameters(self, values: np.ndarray) -> Dict[str, float]:
+        """
+        Full parameter dict of the aircraft with sampled values
+
+        :param values: (P,) parameter values, or (N, P) for batched parameters
+        :return: the parameter dict, randomised entries are arrays when values are batched
+        """
+        values = np.asarray(values, dtype=float)
+        parameters = dict(self.nominal)
+        for idx, name in enumerate(self.names):
+            parameters[name] = values[..., idx]
+        return parameters
+
+    def model(self, values: np.ndarray) -> AircraftModel:
+        """
+        Vectorized aircraft model with sampled parameters, with (N, P) values it evaluates a batch of N aircraft
+
+        :param values: (P,) or (N, P) parameter values
+        :return: the aircraft model
+        """
+        return AircraftModel(self.aircraft_name, parameters=self.parameters(values))
+
+    def write_pool(self, np_random, size: int) -> None:
+        """
+        Sample a pool of parameter sets and write them as data files pyflyer aircraft can be built from
+
+        :param np_random: random number generator
+        :param size: number of parameter sets in the pool
+        """
+        self.pool = self.sample(np_random, size)
+        root = "/dev/shm" if os.path.isdir("/dev/shm") else None
+        self.pool_dir = tempfile.mkdtemp(prefix="flyer_env_", dir=root)
+        weakref.finalize(self, shutil.rmtree, self.pool_dir, True)
+        for idx, values in enumerate(self.pool):
+            parameters = dict(self.nominal)
+            parameters.update(zip(self.names, values.tolist()))
+            with open(
+                os.path.join(self.pool_dir, self.pool_name(idx) + ".yaml"), "w"
+            ) as f:
+                yaml.safe_dump(parameters, f)
+
+    def pool_name(self, idx: int) -> str:
+        """Name of the data file of a pool member"""
+        return f"{self.aircraft_name}_{idx}"
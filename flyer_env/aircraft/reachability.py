@@ -0,0 +1,367 @@
+import functools
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+from flyer_env.aircraft.dynamics import GRAVITY, AircraftModel, air_density
+from flyer_env.utils import cache_digest, defaults
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "flyer_env", "reachability")
+# Version of the cached files, bumped when their contents or the way they are built change
+CACHE_VERSION = 1
+
+AIRSPEEDS = np.arange(40.0, 141.0, 10.0)
+HEIGHTS = np.array([0.0, 50.0, 100.0, 200.0, 400.0, 700.0, 1000.0, 1500.0, 2000.0])
+HEIGHTS = np.concatenate([HEIGHTS, np.arange(3000.0, 5001.0, 1000.0)])
+BEARINGS = np.linspace(0.0, np.pi, 19)
+
+
+def trimmed_aerodynamics(
+    model: AircraftModel, airspeed, altitude, alpha
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lift and drag of the unpowered aircraft with the elevator trimming the pitching moment
+
+    The pitching moment is linear in the elevator at zero pitch rate, so the trim elevator is found from two
+    evaluations of the model.
+
+    :param model: the aircraft model
+    :param airspeed: (...) airspeeds [m/s]
+    :param altitude: (...) altitudes [m]
+    :param alpha: (...) angles of attack [rad]
+    :return: the (...) lift and drag [N]
+    """
+    airspeed, altitude, alpha = np.broadcast_arrays(
+        *(np.asarray(a, dtype=float) for a in (airspeed, altitude, alpha))
+    )
+    state = model.trim_state(airspeed, altitude, 0.0, alpha)
+    controls = np.zeros((2,) + airspeed.shape + (4,))
+    controls[1, ..., 1] = 1.0
+    _, moments = model.forces_and_moments(state, controls)
+    elevator = -moments[0, ..., 1] / (moments[1, ..., 1] - moments[0, ..., 1])
+    controls = np.zeros(airspeed.shape + (4,))
+    controls[..., 1] = elevator
+    forces, _ = model.forces_and_moments(state, controls)
+    cos_a, sin_a = np.cos(alpha), np.sin(alpha)
+    lift = forces[..., 0] * sin_a - forces[..., 2] * cos_a
+    drag = -forces[..., 0] * cos_a - forces[..., 2] * sin_a
+    return lift, drag
+
+
+def glide_polar(
+    model: AircraftModel, samples: int = 200
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Trimmed lift and drag coefficients of the unpowered aircraft, from zero angle of attack to the stall
+
+    :param model: the aircraft model
+    :param samples: number of angles of attack
+    :return: the (samples,) increasing lift and matching drag coefficients
+    """
+    _, alpha_max = model.stall_alpha()
+    alphas = np.linspace(0.0, alpha_max, samples)
+    lift, drag = trimmed_aerodynamics(model, 1.0, 0.0, alphas)
+    qs = 0.5 * air_density(0.0) * model["wing_area"]
+    return lift / qs, drag / qs
+
+
+def simulate_glides(
+    model: AircraftModel,
+    airspeed,
+    height,
+    turn,
+    bank: float = np.radians(30.0),
+    dt: float = 0.5,
+    max_time: float = 3600.0,
+    time_constant: float = 3.0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Simulate a batch of engine-out glides to the ground
+
+    Each glide starts level at the given airspeed and height, heading north from the origin, and is flown as a point
+    mass on the trimmed glide polar of the aircraft model. The guidance banks up to bank towards a track turn radians
+    to the right and commands the flight-path angle of the best glide, steepened or shallowed to bring the airspeed to
+    the best glide airspeed, so excess airspeed is traded for height. The lift needed is clipped to the polar.
+
+    :param model: the aircraft model
+    :param airspeed: (...) initial airspeeds [m/s]
+    :param height: (...) initial heights above the ground [m]
+    :param turn: (...) turns of the track to the right [rad]
+    :param bank: largest bank angle [rad]
+    :param dt: timestep [s]
+    :param max_time: longest simulated glide [s]
+    :param time_constant: time constant of the flight-path angle response [s]
+    :return: the (..., 2) (x, y) touchdown positions [m] and (...) times aloft [s]
+    """
+    airspeed, height, turn = np.broadcast_arrays(
+        *(np.asarray(a, dtype=float) for a in (airspeed, height, turn))
+    )
+    c_l, c_d = glide_polar(model)
+    best = np.argmax(c_l / c_d)
+    gamma_best = -np.arctan(c_d[best] / c_l[best])
+    mass, area = model["mass"], model["wing_area"]
+
+    v, h, psi = airspeed.copy(), height.copy(), np.zeros_like(airspeed)
+    gamma = np.zeros_like(airspeed)
+    x, y = np.zeros_like(airspeed), np.zeros_like(airspeed)
+    time = np.zeros_like(airspeed)
+    flying = h > 0.0
+    for _ in range(int(max_time / dt)):
+        if not np.any(flying):
+            break
+        density = air_density(h)
+        qs = 0.5 * density * v * v * area
+        v_best = np.sqrt(2.0 * mass * GRAVITY / (density * area * c_l[best]))
+        gamma_command = np.clip(
+            gamma_best + (v - v_best) / v_best, -np.pi / 6.0, np.pi / 9.0
+        )
+        phi = np.clip(2.0 * (turn - psi), -bank, bank)
+        lift = (
+            mass
+            * (v * (gamma_command - gamma) / time_constant + GRAVITY * np.cos(gamma))
+            / np.cos(phi)
+        )
+        lift_coefficient = np.clip(lift / qs, c_l[0], c_l[-1])
+        lift = lift_coefficient * qs
+        drag = np.interp(lift_coefficient, c_l, c_d) * qs
+
+        v_dot = -drag / mass - GRAVITY * np.sin(gamma)
+        gamma_dot = (lift * np.cos(phi) - mass * GRAVITY * np.cos(gamma)) / (mass * v)
+        psi_dot = lift * np.sin(phi) / (mass * v * np.cos(gamma))
+
+        step = np.where(flying, dt, 0.0)
+        # Shorten the last step to land on the ground
+        sink = -v * np.sin(gamma)
+        step = np.where(sink * step > h, h / np.maximum(sink, 1e-9), step)
+        x += step * v * np.cos(gamma) * np.cos(psi)
+        y += step * v * np.cos(gamma) * np.sin(psi)
+        h -= step * sink
+        time += step
+        v += step * v_dot
+        gamma += step * gamma_dot
+        psi += step * psi_dot
+        flying &= h > 1e-6
+    return np.stack([x, y], axis=-1), time
+
+
+class GlideFootprint:
+    """
+    Ground reachable in an engine-out glide, as a lookup table of airspeed, height and bearing
+
+    The table holds the furthest distance the aircraft glides in still air along each bearing from its heading, and
+    the time it is aloft getting there, on a grid of initial airspeed and height above the ground. The footprint is
+    symmetric, so bearings run from 0 ahead to pi behind. In a steady wind the footprint drifts with the air mass, a
+    target is reachable if its position relative to the air mass at touchdown is inside the still-air footprint.
+    """
+
+    def __init__(
+        self,
+        airspeeds: np.ndarray,
+        heights: np.ndarray,
+        bearings: np.ndarray,
+        ranges: np.ndarray,
+        times: np.ndarray,
+    ) -> None:
+        """
+        Create a glide footprint
+
+        :param airspeeds: (A,) increasing airspeeds [m/s]
+        :param heights: (H,) increasing heights above the ground [m]
+        :param bearings: (B,) increasing bearings from the heading, from 0 to pi [rad]
+        :param ranges: (A, H, B) glide ranges [m]
+        :param times: (A, H, B) times aloft [s]
+        """
+        self.axes = [
+            np.asarray(airspeeds, dtype=float),
+            np.asarray(heights, dtype=float),
+            np.asarray(bearings, dtype=float),
+        ]
+        self.ranges = np.asarray(ranges, dtype=float)
+        self.times = np.asarray(times, dtype=float)
+
+    @classmethod
+    def build(
+        cls,
+        model: AircraftModel,
+        airspeeds: np.ndarray = AIRSPEEDS,
+        heights: np.ndarray = HEIGHTS,
+        bearings: np.ndarray = BEARINGS,
+        turns: int = 43,
+        **kwargs,
+    ) -> "GlideFootprint":
+        """
+        Simulate the glides of every grid point at once and tabulate the footprint
+
+        :param model: the aircraft model
+        :param airspeeds: (A,) increasing airspeeds [m/s]
+        :param heights: (H,) increasing heights above the ground [m]
+        :param bearings: (B,) increasing bearings from the heading, from 0 to pi [rad]
+        :param turns: number of track turns simulated, from 0 to 1.2 pi so the turns overshoot the tail
+        :param kwargs: arguments passed to simulate_glides
+        :return: the glide footprint
+        """
+        airspeeds = np.asarray(airspeeds, dtype=float)
+        heights = np.asarray(heights, dtype=float)
+        bearings = np.asarray(bearings, dtype=float)
+        positions, times = simulate_glides(
+            model,
+            airspeeds[:, None, None],
+            heights[None, :, None],
+            np.linspace(0.0, 1.2 * np.pi, turns)[None, None, :],
+            **kwargs,
+        )
+        distance = np.hypot(positions[..., 0], positions[..., 1])
+        bearing = np.abs(np.arctan2(positions[..., 1], positions[..., 0]))
+
+        ranges = np.zeros((len(airspeeds), len(heights), len(bearings)))
+        aloft = np.zeros_like(ranges)
+        for idx in np.ndindex(ranges.shape[:2]):
+            order = np.argsort(bearing[idx])
+            # Turns past the tail wrap around, so the last bearing reached is within a table step of the tail
+            reached = bearings <= bearing[idx][order[-1]] + np.diff(bearings).max()
+            ranges[idx] = np.where(
+                reached,
+                np.interp(bearings, bearing[idx][order], distance[idx][order]),
+                0.0,
+            )
+            aloft[idx] = np.interp(bearings, bearing[idx][order], times[idx][order])
+        return cls(airspeeds, heights, bearings, ranges, aloft)
+
+    def save(self, path: str) -> None:
+        """Save the footprint to an .npz file"""
+        np.savez(
+            path,
+            airspeeds=self.axes[0],
+            heights=self.axes[1],
+            bearings=self.axes[2],
+            ranges=self.ranges,
+            times=self.times,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "GlideFootprint":
+        """Load a footprint saved with save"""
+        with np.load(path) as data:
+            return cls(
+                data["airspeeds"],
+                data["heights"],
+                data["bearings"],
+                data["ranges"],
+                data["times"],
+            )
+
+    def lookup(self, airspeed, height, bearing) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Interpolate the footprint trilinearly, clamping to the edges of the grid
+
+        :param airspeed: (...) airspeeds [m/s]
+        :param height: (...) heights above the ground [m]
+        :param bearing: (...) bearings from the heading [rad]
+        :return: the (...) glide ranges [m] and times aloft [s]
+        """
+        bearing = np.abs(np.arctan2(np.sin(bearing), np.cos(bearing)))
+        airspeed, height, bearing = np.broadcast_arrays(
+            *(np.asarray(a, dtype=float) for a in (airspeed, height, bearing))
+        )
+        idx, weights = [], []
+        for axis, value in zip(self.axes, (airspeed, height, bearing)):
+            value = np.clip(value, axis[0], axis[-1])
+            lower = np.clip(np.searchsorted(axis, value) - 1, 0, len(axis) - 2)
+            idx.append(lower)
+            weights.append((value - axis[lower]) / (axis[lower + 1] - axis[lower]))
+
+        ranges, times = 0.0, 0.0
+        for da in (0, 1):
+            for dh in (0, 1):
+                for db in (0, 1):
+                    weight = (
+                        (weights[0] if da else 1.0 - weights[0])
+                        * (weights[1] if dh else 1.0 - weights[1])
+                        * (weights[2] if db else 1.0 - weights[2])
+                    )
+                    corner = (idx[0] + da, idx[1] + dh, idx[2] + db)
+                    ranges = ranges + weight * self.ranges[corner]
+                    times = times + weight * self.times[corner]
+        return ranges, times
+
+    def margin(
+        self,
+        position: np.ndarray,
+        heading,
+        airspeed,
+        targets: np.ndarray,
+        elevations,
+        wind: Optional[np.ndarray] = None,
+        iterations: int = 2,
+    ) -> np.ndarray:
+        """
+        How far inside the glide footprint of a batch of aircraft each of a set of targets lies
+
+        In wind the target is shifted upwind by the drift over the time aloft, which depends on the shifted target's
+        bearing, so the shift is found by a few fixed point iterations.
+
+        :param position: (N, 3) NED positions [m]
+        :param heading: (N,) headings [rad]
+        :param airspeed: (N,) airspeeds [m/s]
+        :param targets: (N, M, 2) or (M, 2) (x, y) target positions [m]
+        :param elevations: (N, M) or (M,) target elevations [m]
+        :param wind: (N, 3) NED wind velocities [m/s]
+        :param iterations: number of fixed point iterations of the wind drift
+        :return: (N, M) glide range beyond each target, positive for reachable targets [m]
+        """
+        position = np.asarray(position, dtype=float).reshape(-1, 3)
+        heading = np.asarray(heading, dtype=float).reshape(-1, 1)
+        airspeed = np.asarray(airspeed, dtype=float).reshape(-1, 1)
+        delta = np.asarray(targets, dtype=float) - position[:, None, :2]
+        height = -position[:, 2:3] - np.asarray(elevations, dtype=float)
+
+        def footprint(delta):
+            bearing = np.arctan2(delta[..., 1], delta[..., 0]) - heading
+            ranges, times = self.lookup(airspeed, height, bearing)
+            return ranges, times, np.hypot(delta[..., 0], delta[..., 1])
+
+        ranges, times, distance = footprint(delta)
+        if wind is not None:
+            drift = np.asarray(wind, dtype=float).reshape(-1, 3)[:, None, :2]
+            for _ in range(iterations):
+                ranges, times, distance = footprint(delta - drift * times[..., None])
+        return np.where(height > 0.0, ranges - distance, -distance)
+
+
+@functools.lru_cache(maxsize=None)
+def glide_footprint(
+    aircraft_name: str = "TO", cache_dir: Optional[str] = CACHE_DIR
+) -> GlideFootprint:
+    """
+    Get the glide footprint of an aircraft, caching it on disk
+
+    Cached files are named by a digest of the aircraft model and the defaults of the footprint's simulation, so changes
+    to either are rebuilt rather than loaded stale.
+
+    :param aircraft_name: name of the aircraft data file
+    :param cache_dir: directory footprints are cached in, if None footprints are not stored
+    :return: the glide footprint
+    """
+    model = AircraftModel(aircraft_name)
+    path = None
+    if cache_dir is not None:
+        digest = cache_digest(
+            CACHE_VERSION,
+            model.digest(),
+            defaults(GlideFootprint.build),
+            defaults(simulate_glides),
+        )
+        path = os.path.join(cache_dir, f"{aircraft_name}_{digest}.npz")
+        if os.path.exists(path):
+            return GlideFootprint.load(path)
+
+    footprint = GlideFootprint.build(model)
+
+    if path is not None:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            footprint.save(path)
+        except OSError:
+            pass
+    return footprint
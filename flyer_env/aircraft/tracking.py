@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, Optional, Tuple, Union
 
 import numpy as np
 
@@ -6,6 +6,14 @@ from flyer_env.utils import Vector
 
 
 class TrackPoints:
+    """
+    Follow a set of waypoints joined by straight tracks and constant radius fillets
+
+    The geometry of every waypoint triple (track bearings, fillet centres and the switching half-planes at either end
+    of each fillet) is computed once on construction, so each call to arc_path is only a gather and some arithmetic.
+    The guidance state of a follower is the pair (goal_state, control_state), where goal_state indexes the first
+    waypoint of the current triple and control_state is 0 on the straight track and 1 on the fillet.
+    """
 
     def __init__(
         self,
@@ -19,155 +27,192 @@ class TrackPoints:
         self.goal_set = goal_set
         self.radius = radius
 
+        self.points = np.array(
+            [np.asarray(goal_set[idx], dtype=float)[:2] for idx in range(len(goal_set))]
+        )
+        self._precompute()
+
+    def _precompute(self) -> None:
+        """Compute the geometry of every fillet and of the final track"""
+        point_a, point_b, point_c = self.points[:-2], self.points[1:-1], self.points[2:]
+        self.n_fillets = len(point_b)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.bearing_in = self._check_angle_negative_range(
+                self._bearing(point_a, point_b)
+            )
+            self.bearing_out = self._check_angle_negative_range(
+                self._bearing(point_b, point_c)
+            )
+            self.filet_angle = self._check_angle_negative_range(
+                np.pi - (self.bearing_out - self.bearing_in)
+            )
+            self.track_distance = self._distance(point_a, point_b)
+
+            q0 = self._unit_dir_vector(point_a, point_b)
+            q1 = self._unit_dir_vector(point_b, point_c)
+            q_grad = self._unit_dir_vector(q0, q1)
+            tan_offset = np.abs(self.radius / np.tan(self.filet_angle / 2))[:, None]
+            sin_offset = np.abs(self.radius / np.sin(self.filet_angle / 2))[:, None]
+
+            self.q_in, self.q_out = q0, q1
+            # Points where the fillet starts and ends, each defines a switching half-plane normal to its track
+            self.z_in = point_b - tan_offset * q0
+            self.z_out = point_b + tan_offset * q1
+            self.centres = point_b + sin_offset * q_grad
+            self.turning_direction = np.copysign(
+                1, (q0[:, 0] * q1[:, 1]) - (q0[:, 1] * q1[:, 0])
+            )
+            self.waypoints = point_b
+
+            self.final_bearing = self._check_angle_negative_range(
+                self._bearing(self.points[-2], self.points[-1])
+            )
+            self.final_distance = self._distance(self.points[-2], self.points[-1])
+            self.final_point = self.points[-1]
+
     @staticmethod
     def _bearing(a, b):
         point_diff = np.subtract(b, a)
-        return np.arctan2(point_diff[1], point_diff[0])
+        return np.arctan2(point_diff[..., 1], point_diff[..., 0])
 
     @staticmethod
     def _distance(a, b):
         point_diff = np.subtract(b, a)
-        return np.linalg.norm(point_diff)
-
-    @staticmethod
-    def _check_angle(bearing):
-        while bearing < 0.0:
-            bearing += 2.0 * np.pi
-        while bearing > 2.0 * np.pi:
-            bearing -= 2.0 * np.pi
-        return bearing
+        return np.sqrt(
+            point_diff[..., 0] * point_diff[..., 0]
+            + point_diff[..., 1] * point_diff[..., 1]
+        )
 
     @staticmethod
     def _check_angle_negative_range(bearing):
-        while bearing > np.pi:
-            bearing -= 2.0 * np.pi
-        while bearing < -np.pi:
-            bearing += 2.0 * np.pi
+        bearing = np.asarray(bearing, dtype=float)
+        while np.any(bearing > np.pi):
+            bearing = np.where(bearing > np.pi, bearing - 2.0 * np.pi, bearing)
+        while np.any(bearing < -np.pi):
+            bearing = np.where(bearing < -np.pi, bearing + 2.0 * np.pi, bearing)
         return bearing
 
     @staticmethod
     def _unit_dir_vector(start_point, end_point):
         direction_vector = np.subtract(end_point, start_point)
-        try:
-            unit_vector_n = direction_vector[0] / np.sqrt(
-                np.power(direction_vector[0], 2) + np.power(direction_vector[1], 2)
-            )
-        except ZeroDivisionError:
-            unit_vector_n = 0
-        try:
-            unit_vector_e = direction_vector[1] / np.sqrt(
-                np.power(direction_vector[0], 2) + np.power(direction_vector[1], 2)
-            )
-        except ZeroDivisionError:
-            unit_vector_e = 0
-        unit_vector = (unit_vector_n, unit_vector_e)
-        return unit_vector
-
-    def arc_path(self, pos):
-
-        if self.goal_state < len(self.goal_set) - 2:
-
-            # Get points defining trajecotries
-            point_a = self.goal_set[self.goal_state]
-            point_b = self.goal_set[self.goal_state + 1]
-            point_c = self.goal_set[self.goal_state + 2]
-
-            track_bearing_in = self._check_angle_negative_range(
-                self._bearing(point_a, point_b)
-            )
-            track_bearing_out = self._check_angle_negative_range(
-                self._bearing(point_b, point_c)
-            )
+        norm = np.sqrt(
+            np.power(direction_vector[..., 0], 2)
+            + np.power(direction_vector[..., 1], 2)
+        )
+        return direction_vector / norm[..., None]
+
+    def reset(self) -> None:
+        """Return the follower to the start of the track"""
+        self.goal_state = 0
+        self.control_state = 0
 
-            filet_angle = self._check_angle_negative_range(
-                np.pi - (track_bearing_out - track_bearing_in)
-            )
-            if self.control_state == 0:
-                q = self._unit_dir_vector(point_a, point_b)
-                w = point_b
-                try:
-                    z_point = (
-                        w[0] - (np.abs((self.radius / np.tan(filet_angle / 2))) * q[0]),
-                        w[1] - (np.abs((self.radius / np.tan(filet_angle / 2))) * q[1]),
-                    )
-                    h_point = np.subtract(z_point, pos[:2])
-                    h_val = (h_point[0] * q[0]) + (h_point[1] * q[1])
-                    if h_val < 0:
-                        # Entered h-plane transition to curved segment
-                        self.control_state = 1
-
-                    objective_bearing = self._bearing(pos[:2], point_b)
-                    objective_distance = self._distance(pos[:2], point_b)
-                    track_distance = self._distance(point_a, point_b)
-                    off_track_angle = self._check_angle_negative_range(
-                        objective_bearing - track_bearing_in
-                    )
-                    heading = (
-                        0.5 * track_distance / objective_distance * off_track_angle
-                    ) + track_bearing_in
-                except ZeroDivisionError:
-                    print(f"Straight lines between: {point_a}, {point_b}, {point_c}")
-
-            if self.control_state == 1:
-                q0 = self._unit_dir_vector(point_a, point_b)
-                q1 = self._unit_dir_vector(point_b, point_c)
-                q_grad = self._unit_dir_vector(q0, q1)
-                w = point_b
-                center_point = (
-                    w[0]
-                    + (np.abs((self.radius / np.sin(filet_angle / 2))) * q_grad[0]),
-                    w[1]
-                    + (np.abs((self.radius / np.sin(filet_angle / 2))) * q_grad[1]),
-                )
-                z_point = (
-                    w[0] + (np.abs((self.radius / np.tan(filet_angle / 2))) * q1[0]),
-                    w[1] + (np.abs((self.radius / np.tan(filet_angle / 2))) * q1[1]),
+    def arc_path(
+        self, pos: Vector, states: Optional[np.ndarray] = None
+    ) -> Union[float, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Get the commanded heading to follow the track
+
+        Called with a single position the guidance state held by the TrackPoints is used and updated. Called with a
+        batch of positions and states the guidance of N independent followers is evaluated at once.
+
+        :param pos: (x, y, ...) position, or (N, 2+) positions if states is given [m]
+        :param states: (N, 2) integer array of (goal_state, control_state) for each follower
+        :return: the commanded heading [rad], or the (N,) commanded headings and the (N, 2) updated states
+        """
+        if states is None:
+            states = np.array([[self.goal_state, self.control_state]])
+            heading, states = self.arc_path(np.asarray(pos)[None], states)
+            self.goal_state, self.control_state = int(states[0, 0]), int(states[0, 1])
+            return heading[0]
+
+        pos = np.asarray(pos, dtype=float)[:, :2]
+        states = np.array(states, dtype=int)
+        goal_state, control_state = states[:, 0], states[:, 1]
+        heading = np.empty(len(pos))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            on_fillet = goal_state < self.n_fillets
+            if np.any(on_fillet):
+                idx = goal_state[on_fillet]
+                p = pos[on_fillet]
+                cs = control_state[on_fillet]
+                hdg = np.empty(len(idx))
+
+                # Straight track into the fillet, switch to the fillet on crossing its start half-plane
+                z_in, q0 = self.z_in[idx], self.q_in[idx]
+                h_val = (z_in[:, 0] - p[:, 0]) * q0[:, 0] + (z_in[:, 1] - p[:, 1]) * q0[
+                    :, 1
+                ]
+                straight = cs == 0
+                cs = np.where(straight & (h_val < 0), 1, cs)
+
+                point_b = self.waypoints[idx]
+                track_bearing_in = self.bearing_in[idx]
+                objective_bearing = self._bearing(p, point_b)
+                objective_distance = self._distance(p, point_b)
+                off_track_angle = self._check_angle_negative_range(
+                    objective_bearing - track_bearing_in
                 )
-                turning_direction = np.copysign(1, (q0[0] * q1[1]) - (q0[1] * q1[0]))
-                h_point = np.subtract(z_point, pos[:2])
-                h_val = (h_point[0] * q1[0]) + (h_point[1] * q1[1])
-                if h_val < 0:
-                    self.control_state = 0
-                    self.goal_state += 1
+                hdg[straight] = (
+                    0.5
+                    * self.track_distance[idx]
+                    / objective_distance
+                    * off_track_angle
+                    + track_bearing_in
+                )[straight]
+
+                # Orbit the fillet centre, advance to the next triple on crossing its end half-plane
+                orbit = cs == 1
+                z_out, q1 = self.z_out[idx], self.q_out[idx]
+                h_val = (z_out[:, 0] - p[:, 0]) * q1[:, 0] + (
+                    z_out[:, 1] - p[:, 1]
+                ) * q1[:, 1]
+                leave = orbit & (h_val < 0)
+                cs = np.where(leave, 0, cs)
+
+                centre = self.centres[idx]
+                circ_x = centre[:, 0] - p[:, 0]
+                circ_y = centre[:, 1] - p[:, 1]
                 distance_from_center = np.sqrt(
-                    np.power(pos[0] - center_point[0], 2)
-                    + np.power(pos[1] - center_point[1], 2)
+                    np.power(p[:, 0] - centre[:, 0], 2)
+                    + np.power(p[:, 1] - centre[:, 1], 2)
                 )
-
-                circ_x = center_point[0] - pos[0]
-                circ_y = center_point[1] - pos[1]
                 circle_angle = np.arctan2(circ_y, circ_x)
-                if circle_angle < 0:
-                    circle_angle = circle_angle + (2 * np.pi)
-                tangent_track = circle_angle - (turning_direction * (np.pi / 2))
-                if tangent_track < 0:
-                    tangent_track = tangent_track + (2 * np.pi)
-                if tangent_track > 2 * np.pi:
-                    tangent_track = tangent_track - (2 * np.pi)
+                circle_angle = np.where(
+                    circle_angle < 0, circle_angle + (2 * np.pi), circle_angle
+                )
+                tangent_track = circle_angle - (
+                    self.turning_direction[idx] * (np.pi / 2)
+                )
+                tangent_track = np.where(
+                    tangent_track < 0, tangent_track + (2 * np.pi), tangent_track
+                )
+                tangent_track = np.where(
+                    tangent_track > 2 * np.pi,
+                    tangent_track - (2 * np.pi),
+                    tangent_track,
+                )
                 error = (distance_from_center - self.radius) / self.radius
                 k_orbit = 4.0
-                heading = tangent_track + (np.arctan(k_orbit * error))
-                # heading = tangent_track
-        else:
-            points = list(self.goal_set.values())
-
-            point_a = points[-2]
-            point_b = points[-1]
-
-            track_bearing = self._check_angle_negative_range(
-                self._bearing(point_a, point_b)
-            )
-            track_distance = self._distance(point_a, point_b)
-
-            objective_bearing = self._bearing(pos[:2], point_b)
-            objective_distance = self._distance(pos[:2], point_b)
+                hdg[orbit] = (tangent_track + (np.arctan(k_orbit * error)))[orbit]
+
+                heading[on_fillet] = hdg
+                control_state[on_fillet] = cs
+                goal_state[on_fillet] = idx + leave
+
+            # Final track into the last waypoint
+            final = ~on_fillet
+            if np.any(final):
+                p = pos[final]
+                objective_bearing = self._bearing(p, self.final_point)
+                objective_distance = self._distance(p, self.final_point)
+                off_track_angle = self._check_angle_negative_range(
+                    objective_bearing - self.final_bearing
+                )
+                heading[final] = self._check_angle_negative_range(
+                    (0.5 * (self.final_distance / objective_distance) * off_track_angle)
+                    + self.final_bearing
+                )
 
-            off_track_angle = self._check_angle_negative_range(
-                objective_bearing - track_bearing
-            )
-            heading = (
-                0.5 * (track_distance / objective_distance) * off_track_angle
-            ) + track_bearing
-            heading = self._check_angle_negative_range(heading)
-            # print(f'heading: {heading * 180.0/np.pi}')
-        return heading
+        return heading, states
@@ -0,0 +1,176 @@
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from flyer_env.aircraft.dynamics import STATE_FEATURES, AircraftModel
+from flyer_env.aircraft.lqr import LQRController, gain_schedule
+from flyer_env.aircraft.trim import trim_table
+
+
+class Traffic:
+    """
+    A fleet of other aircraft flown together by the vectorized model
+
+    The states of every aircraft are held as one (N, 12) array, ordered as STATE_FEATURES, and stepped together by the
+    vectorized AircraftModel under a batched gain-scheduled LQR autopilot. The autopilot's commands follow the mode of
+    the fleet:
+
+    - "cruise": hold the heading, altitude and airspeed the aircraft were spawned with
+    - "formation": fly to slots in an echelon behind and to the right of a leader
+    - "pursuit": chase a target, heading for its position
+    """
+
+    MODES = ("cruise", "formation", "pursuit")
+
+    def __init__(
+        self,
+        count: int,
+        dt: float,
+        mode: str = "cruise",
+        aircraft_name: str = "TO",
+        spacing: float = 100.0,
+        lead: float = 1000.0,
+        schedule_interval: int = 12,
+    ) -> None:
+        """
+        Create a fleet
+
+        :param count: number of aircraft
+        :param dt: timestep [s]
+        :param mode: "cruise", "formation" or "pursuit"
+        :param aircraft_name: name of the aircraft data file
+        :param spacing: distance between formation slots, behind and to the right [m]
+        :param lead: distance ahead of its slot an aircraft steers for [m]
+        :param schedule_interval: number of steps between updates of the autopilot's gains
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown traffic mode {mode}")
+        self.count = count
+        self.dt = dt
+        self.mode = mode
+        self.spacing = spacing
+        self.lead = lead
+        self.schedule_interval = schedule_interval
+
+        self.model = AircraftModel(aircraft_name)
+        self.trim_table = trim_table(aircraft_name)
+        self.controller = LQRController(gain_schedule(aircraft_name, dt), count)
+        # Slots of the formation in the leader's (forward, right) frame
+        rank = np.arange(1, count + 1)
+        self.slots = spacing * np.stack([-rank, rank], axis=-1).astype(float)
+
+        self.states = np.zeros((count, 12))
+        self.headings = np.zeros(count)
+        self.altitudes = np.zeros(count)
+        self.airspeeds = np.zeros(count)
+        self.steps = 0
+
+    def reset(
+        self,
+        np_random,
+        centre: np.ndarray,
+        heading: float = 0.0,
+        radius: float = 3000.0,
+        altitude_range: Tuple[float, float] = (500.0, 2000.0),
+        airspeed_range: Tuple[float, float] = (80.0, 120.0),
+    ) -> None:
+        """
+        Spawn the fleet in wings-level trim
+
+        Cruising and pursuing aircraft are spread uniformly within radius of the centre on random headings, formation
+        aircraft start in their slots behind a leader at the centre flying heading.
+
+        :param np_random: random number generator
+        :param centre: (3,) NED position the fleet is spawned around [m]
+        :param heading: heading of the leader of a formation [rad]
+        :param radius: radius the fleet is spawned within [m]
+        :param altitude_range: range of the spawned altitudes [m]
+        :param airspeed_range: range of the spawned airspeeds [m/s]
+        """
+        centre = np.asarray(centre, dtype=float)
+        if self.mode == "formation":
+            c, s = np.cos(heading), np.sin(heading)
+            positions = centre[:2] + self.slots @ np.array([[c, s], [-s, c]])
+            headings = np.full(self.count, heading)
+            altitudes = np.full(self.count, -centre[2])
+            airspeeds = np.full(self.count, np.mean(airspeed_range))
+        else:
+            distance = radius * np.sqrt(np_random.uniform(0.0, 1.0, self.count))
+            bearing = np_random.uniform(0.0, 2.0 * np.pi, self.count)
+            positions = centre[:2] + distance[:, None] * np.stack(
+                [np.cos(bearing), np.sin(bearing)], axis=-1
+            )
+            headings = np_random.uniform(-np.pi, np.pi, self.count)
+            altitudes = np_random.uniform(*altitude_range, self.count)
+            airspeeds = np_random.uniform(*airspeed_range, self.count)
+
+        pitch = self.trim_table.lookup(airspeeds, altitudes)[..., 0]
+        self.states = self.model.trim_state(airspeeds, altitudes, 0.0, pitch)
+        self.states[:, 0:2] = positions
+        self.states[:, 5] = headings
+        self.headings, self.altitudes, self.airspeeds = headings, altitudes, airspeeds
+        self.steps = 0
+
+    @property
+    def positions(self) -> np.ndarray:
+        """(N, 3) NED positions [m]"""
+        return self.states[:, 0:3]
+
+    def features(self, names, indices: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Features of a set of aircraft
+
+        :param names: names of the features, from STATE_FEATURES
+        :param indices: (M,) aircraft, defaults to every aircraft
+        :return: (M, F) features
+        """
+        columns = [STATE_FEATURES.index(name) for name in names]
+        states = self.states if indices is None else self.states[indices]
+        return states[:, columns]
+
+    def _guidance(self, target: Optional[Dict[str, float]]) -> None:
+        """Update the commanded headings, altitudes and airspeeds from the target's state"""
+        if target is None or self.mode == "cruise":
+            return
+        target_position = np.array([target["x"], target["y"]])
+        target_heading = target["yaw"]
+        target_airspeed = np.linalg.norm([target["u"], target["v"], target["w"]])
+        c, s = np.cos(target_heading), np.sin(target_heading)
+        if self.mode == "formation":
+            forward = np.array([c, s])
+            aim = target_position + self.slots @ np.array([[c, s], [-s, c]])
+            offset = aim - self.states[:, 0:2]
+            # Steer for a point ahead of the slot and close up along track with airspeed
+            self.headings = np.arctan2(*(offset + self.lead * forward).T[::-1])
+            self.airspeeds = target_airspeed + np.clip(
+                0.05 * offset @ forward, -20.0, 20.0
+            )
+        else:
+            offset = target_position - self.states[:, 0:2]
+            # Pure pursuit, closing faster the further behind
+            self.headings = np.arctan2(offset[:, 1], offset[:, 0])
+            self.airspeeds = target_airspeed + np.clip(
+                0.01 * np.hypot(*offset.T), 0.0, 20.0
+            )
+        self.altitudes = np.full(self.count, -target["z"])
+
+    def step(
+        self,
+        target: Optional[Dict[str, float]] = None,
+        wind: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Step every aircraft of the fleet by one timestep
+
+        :param target: state dict of the aircraft a formation follows or a pursuit chases
+        :param wind: (N, 3) NED wind velocities [m/s]
+        """
+        self._guidance(target)
+        if self.steps % self.schedule_interval == 0:
+            self.controller.update_schedule(self.airspeeds, self.altitudes)
+        controls = self.controller(self.states, self.headings, -self.altitudes)
+        self.states = self.model.step(self.states, controls, self.dt, wind)
+        self.states[:, 5] = np.arctan2(
+            np.sin(self.states[:, 5]), np.cos(self.states[:, 5])
+        )
+        self.steps += 1
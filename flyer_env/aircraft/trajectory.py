@@ -1,8 +1,146 @@
+import functools
+from typing import Tuple
+
 import numpy as np
 
 from flyer_env.utils import Vector
 
 
+class ReferenceTrajectory:
+
+    def __init__(
+        self,
+        dt: float,
+        times: np.ndarray,
+        positions: np.ndarray,
+        headings: np.ndarray,
+        length: float,
+    ):
+        """
+        A trajectory compiled into dense arrays indexed by tick, where tick k is the target state after k updates of dt
+
+        Lookups are O(1) and accept arrays of ticks, so a batch of environments can share one trajectory. Ticks past
+        the end of the trajectory hold the final state.
+
+        :param dt: time step between ticks [s]
+        :param times: (n,) time of each tick [s]
+        :param positions: (n, 3) target position at each tick [m]
+        :param headings: (n,) target heading at each tick [rads]
+        :param length: length of time the trajectory runs for [s]
+        """
+        self.dt = dt
+        self.times = times
+        self.positions = positions
+        self.headings = headings
+        self.length = length
+        self.dones = times > length
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def _index(self, tick):
+        return np.clip(tick, 0, len(self.times) - 1)
+
+    def position(self, tick) -> np.ndarray:
+        """Target position at tick(s) [m]"""
+        return self.positions[self._index(tick)]
+
+    def heading(self, tick):
+        """Target heading at tick(s) [rads]"""
+        return self.headings[self._index(tick)]
+
+    def done(self, tick):
+        """Whether the trajectory has finished at tick(s)"""
+        return self.dones[self._index(tick)]
+
+
+@functools.lru_cache(maxsize=32)
+def _compile_trajectory(
+    name: str,
+    speed: float,
+    start_position: Tuple[float, float, float],
+    start_heading: float,
+    start_time: float,
+    dt: float,
+    n_steps: int,
+    params: Tuple[Tuple[str, float], ...],
+) -> ReferenceTrajectory:
+    """
+    Vectorized equivalent of stepping the TrajectoryTarget update functions n_steps times
+
+    Each manoeuvre holds straight and level for the first 5s, then changes altitude or heading at a fixed rate until its
+    condition first fails, after which the state is frozen. Running sums use np.cumsum, which accumulates in the same
+    order as the sequential updates.
+    """
+    params = dict(params)
+    times = np.cumsum(np.concatenate([[start_time], np.full(n_steps, dt)]))
+    manoeuvre = np.nonzero(times[1:] >= 5.0)[0]
+    x0, y0, z0 = start_position
+
+    # Heading after each update
+    headings = np.full(n_steps + 1, start_heading, dtype=np.float64)
+    if name in ("lt", "rt") and len(manoeuvre) > 0:
+        if name == "lt":
+            end_heading = params.get("end_heading", -90.0 * (np.pi / 180.0))
+            step = -params.get("turn_rate", 3.0 * (np.pi / 180.0)) * dt
+        else:
+            end_heading = params.get("end_heading", 90.0 * (np.pi / 180.0))
+            step = params.get("turn_rate", 5.0 * (np.pi / 180.0)) * dt
+        candidate = np.cumsum(
+            np.concatenate([[start_heading], np.full(len(manoeuvre), step)])
+        )
+        turning = _active_prefix(np.isclose(candidate[:-1], end_heading, rtol=1.0))
+        k0 = manoeuvre[0] + 1
+        headings[k0 : k0 + turning] = candidate[1 : turning + 1]
+        headings[k0 + turning :] = candidate[turning]
+
+    # Vertical increment of each update
+    dz = np.zeros(n_steps, dtype=np.float64)
+    if name in ("climb", "descend") and len(manoeuvre) > 0:
+        final_height = params.get("final_height", 200.0)
+        if name == "climb":
+            climb_angle = params.get("climb_angle", 20.0 * np.pi / 180.0)
+        else:
+            climb_angle = params.get("climb_angle", -20.0 * np.pi / 180.0)
+        step = np.sin(climb_angle) * speed * dt
+        candidate = np.cumsum(np.concatenate([[z0], np.full(len(manoeuvre), step)]))
+        height = candidate[:-1] - z0
+        if name == "climb":
+            climbing = _active_prefix(height < final_height)
+        else:
+            climbing = _active_prefix(height > final_height)
+        dz[manoeuvre[:climbing]] = step
+
+    positions = np.empty((n_steps + 1, 3), dtype=np.float64)
+    positions[:, 0] = np.cumsum(
+        np.concatenate([[x0], np.cos(headings[1:]) * speed * dt])
+    )
+    positions[:, 1] = np.cumsum(
+        np.concatenate([[y0], np.sin(headings[1:]) * speed * dt])
+    )
+    positions[:, 2] = np.cumsum(np.concatenate([[z0], dz]))
+
+    default_lengths = {
+        "sl": 40.0,
+        "climb": 15.0,
+        "descend": 15.0,
+        "lt": 45.0,
+        "rt": 45.0,
+    }
+    length = params.get("length", default_lengths[name])
+
+    # Compiled trajectories are shared between episodes through the cache
+    for array in (times, positions, headings):
+        array.flags.writeable = False
+    return ReferenceTrajectory(dt, times, positions, headings, length)
+
+
+def _active_prefix(condition: np.ndarray) -> int:
+    """Number of leading True values, once a manoeuvre's condition fails the state is frozen"""
+    failed = np.nonzero(~condition)[0]
+    return failed[0] if len(failed) > 0 else len(condition)
+
+
 class TrajectoryTarget:
 
     def __init__(
@@ -24,6 +162,32 @@ class TrajectoryTarget:
         self.heading = start_heading
         self.time = start_time
 
+    def compile(
+        self, name: str, dt: float, n_steps: int, **kwargs
+    ) -> ReferenceTrajectory:
+        """
+        Compile a trajectory into dense arrays from the target's current state
+
+        Equivalent to calling update() n_steps times with the matching update function. Compiled trajectories are
+        cached, so episodes with the same trajectory configuration and start state reuse the same arrays.
+
+        :param name: trajectory name, one of "sl", "climb", "descend", "lt" or "rt"
+        :param dt: time step between ticks [s]
+        :param n_steps: number of updates to compile
+        :param kwargs: parameters of the trajectory update function
+        :return: the compiled trajectory
+        """
+        return _compile_trajectory(
+            name,
+            float(self.speed),
+            tuple(float(p) for p in self.position),
+            float(self.heading),
+            float(self.time),
+            float(dt),
+            int(n_steps),
+            tuple(sorted(kwargs.items())),
+        )
+
     def update(self, traj_func, dt: float):
         self.time += dt
         self.position, done, self.heading = traj_func(
@@ -0,0 +1,389 @@
+import functools
+import os
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.optimize import least_squares
+
+from flyer_env.aircraft.dynamics import AircraftModel
+from flyer_env.utils import cache_digest, defaults
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "flyer_env", "trim")
+# Version of the cached files, bumped when their contents or the way they are built change
+CACHE_VERSION = 2
+
+AIRSPEEDS = np.arange(50.0, 141.0, 10.0)
+ALTITUDES = np.arange(0.0, 5001.0, 500.0)
+GAMMAS = np.deg2rad(np.arange(-10.0, 10.1, 2.5))
+
+
+def trim_residuals(
+    model: AircraftModel, airspeed, altitude, gamma, trim: np.ndarray
+) -> np.ndarray:
+    """
+    Longitudinal accelerations of wings-level flight, zero when the aircraft is trimmed
+
+    :param model: the aircraft model
+    :param airspeed: airspeed [m/s]
+    :param altitude: altitude [m]
+    :param gamma: flight-path angle [rad]
+    :param trim: (..., 3) candidate (pitch, elevator, tla)
+    :return: (..., 3) (u_dot, w_dot, q_dot) residuals
+    """
+    trim = np.asarray(trim, dtype=float)
+    state = model.trim_state(airspeed, altitude, gamma, trim[..., 0])
+    controls = np.zeros(state.shape[:-1] + (4,))
+    controls[..., 1:3] = trim[..., 1:3]
+    return model.derivatives(state, controls)[..., [6, 8, 10]]
+
+
+def solve_trim(
+    model: AircraftModel,
+    airspeed: float,
+    altitude: float,
+    gamma: float = 0.0,
+    x0: Sequence[float] = (0.0, 0.0, 0.5),
+) -> Tuple[np.ndarray, float]:
+    """
+    Solve for the trim of a single operating point with a least-squares root find
+
+    The angle of attack is bounded between the stall angles of the model, so the solve stays on the attached flow
+    branch of the polynomial lift curve.
+
+    :param model: the aircraft model
+    :param airspeed: airspeed [m/s]
+    :param altitude: altitude [m]
+    :param gamma: flight-path angle [rad]
+    :param x0: initial (pitch, elevator, tla) guess
+    :return: the (pitch, elevator, tla) trim and the norm of its residual
+    """
+    alpha_min, alpha_max = model.stall_alpha()
+    lower = [gamma + alpha_min, -np.inf, -np.inf]
+    upper = [gamma + alpha_max, np.inf, np.inf]
+    result = least_squares(
+        lambda x: trim_residuals(model, airspeed, altitude, gamma, x),
+        np.clip(x0, lower, upper),
+        bounds=(lower, upper),
+    )
+    return result.x, float(np.linalg.norm(result.fun))
+
+
+def solve_trim_batch(
+    model: AircraftModel,
+    airspeed,
+    altitude,
+    gamma=0.0,
+    x0: Sequence[float] = (0.0, 0.0, 0.5),
+    sigma0: Sequence[float] = (0.1, 0.05, 0.3),
+    population: int = 32,
+    iterations: int = 40,
+    newton_iterations: int = 10,
+    tol: float = 1e-8,
+    seed: Optional[int] = 0,
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Solve for the trim of many operating points at once
+
+    Every operating point runs its own evolution strategy with a diagonal covariance, in the style of separable
+    CMA-ES, and the whole population of every point is evaluated in one call to the vectorized model. The best
+    candidates are then refined with batched Newton steps on a central difference Jacobian. Candidates are penalised
+    for angles of attack beyond the stall angles of the model, keeping the solution on the attached flow branch of the
+    polynomial lift curve.
+
+    :param model: the aircraft model
+    :param airspeed: (...) airspeeds [m/s]
+    :param altitude: (...) altitudes [m]
+    :param gamma: (...) flight-path angles [rad]
+    :param x0: initial (pitch, elevator, tla) mean
+    :param sigma0: initial (pitch, elevator, tla) standard deviation
+    :param population: number of candidates sampled per operating point and iteration
+    :param iterations: number of evolution strategy iterations
+    :param newton_iterations: maximum number of Newton refinement steps
+    :param tol: residual norm below which a point is converged
+    :param seed: seed of the candidate sampling
+    :return: the (..., 3) (pitch, elevator, tla) trims and the convergence diagnostics, the per iteration best
+        residual norm "history" (iterations + newton_iterations, ...), the final "residuals", the "iterations" each
+        point took to converge and the "converged" mask
+    """
+    airspeed, altitude, gamma = np.broadcast_arrays(
+        *(np.asarray(a, dtype=float) for a in (airspeed, altitude, gamma))
+    )
+    shape = airspeed.shape
+    airspeed, altitude, gamma = airspeed.ravel(), altitude.ravel(), gamma.ravel()
+    rng = np.random.default_rng(seed)
+    n_points = len(airspeed)
+    n_parents = population // 2
+    weights = np.log(n_parents + 0.5) - np.log(np.arange(1, n_parents + 1))
+    weights /= weights.sum()
+
+    alpha_min, alpha_max = model.stall_alpha()
+
+    def cost(trim):
+        residuals = trim_residuals(
+            model, airspeed[:, None], altitude[:, None], gamma[:, None], trim
+        )
+        alpha = trim[..., 0] - gamma[:, None]
+        stalled = np.maximum(alpha - alpha_max, 0.0) + np.maximum(
+            alpha_min - alpha, 0.0
+        )
+        return residuals, np.linalg.norm(residuals, axis=-1) + 100.0 * stalled
+
+    mean = np.tile(np.asarray(x0, dtype=float), (n_points, 1))
+    sigma = np.tile(np.asarray(sigma0, dtype=float), (n_points, 1))
+    best = mean.copy()
+    best_cost = cost(best[:, None])[1][:, 0]
+    history = np.zeros((iterations + newton_iterations, n_points))
+    for iteration in range(iterations):
+        steps = rng.standard_normal((n_points, population, 3))
+        candidates = mean[:, None] + sigma[:, None] * steps
+        candidate_cost = cost(candidates)[1]
+        candidate_cost = np.where(np.isfinite(candidate_cost), candidate_cost, np.inf)
+        order = np.argsort(candidate_cost, axis=1)[:, :n_parents]
+        parents = np.take_along_axis(steps, order[..., None], axis=1)
+
+        # Recombine the best candidates and adapt each axis' step size to their spread
+        mean = mean + sigma * np.einsum("k,nkj->nj", weights, parents)
+        spread = np.sqrt(np.einsum("k,nkj->nj", weights, parents**2))
+        sigma = sigma * np.clip(spread, 0.5, 1.5) ** 0.5
+
+        improved = candidate_cost[np.arange(n_points), order[:, 0]] < best_cost
+        best[improved] = candidates[improved, order[improved, 0]]
+        best_cost = np.minimum(
+            best_cost, candidate_cost[np.arange(n_points), order[:, 0]]
+        )
+        history[iteration] = best_cost
+
+    # Batched Newton refinement with a central difference Jacobian
+    step = 1e-6
+    perturbations = np.concatenate([np.eye(3), -np.eye(3)]) * step
+    for iteration in range(newton_iterations):
+        residuals, best_cost = cost(best[:, None])
+        residuals, best_cost = residuals[:, 0], best_cost[:, 0]
+        active = best_cost >= tol
+        history[iterations + iteration] = best_cost
+        if not np.any(active):
+            history[iterations + iteration + 1 :] = best_cost
+            break
+        perturbed = cost(best[:, None] + perturbations)[0]
+        jacobian = ((perturbed[:, :3] - perturbed[:, 3:]) / (2.0 * step)).swapaxes(1, 2)
+        solvable = active & (np.abs(np.linalg.det(jacobian)) > 1e-12)
+        best[solvable] -= np.linalg.solve(
+            jacobian[solvable], residuals[solvable][..., None]
+        )[..., 0]
+
+    residuals = cost(best[:, None])[1][:, 0]
+    converged = residuals < tol
+    below = history < tol
+    diagnostics = {
+        "history": history.reshape((-1,) + shape),
+        "residuals": residuals.reshape(shape),
+        "iterations": np.where(
+            below.any(axis=0), below.argmax(axis=0) + 1, len(history)
+        ).reshape(shape),
+        "converged": converged.reshape(shape),
+    }
+    return best.reshape(shape + (3,)), diagnostics
+
+
+class TrimTable:
+    """
+    Trim controls across the flight envelope, on a grid of airspeed, altitude and flight-path angle
+
+    Tables are computed once per aircraft and cached on disk, lookups interpolate trilinearly within the grid and clamp
+    to its edges.
+    """
+
+    OUTPUTS = ["pitch", "elevator", "tla"]
+
+    def __init__(
+        self,
+        airspeeds: np.ndarray,
+        altitudes: np.ndarray,
+        gammas: np.ndarray,
+        values: np.ndarray,
+        residuals: Optional[np.ndarray] = None,
+        diagnostics: Optional[Dict[str, np.ndarray]] = None,
+    ) -> None:
+        """
+        Create a trim table
+
+        :param airspeeds: (A,) increasing airspeeds [m/s]
+        :param altitudes: (H,) increasing altitudes [m]
+        :param gammas: (G,) increasing flight-path angles [rad]
+        :param values: (A, H, G, 3) (pitch, elevator, tla) trim at each grid point
+        :param residuals: (A, H, G) norm of the trim residual at each grid point
+        :param diagnostics: convergence diagnostics of the solver the table was built with
+        """
+        self.axes = [
+            np.asarray(airspeeds, dtype=float),
+            np.asarray(altitudes, dtype=float),
+            np.asarray(gammas, dtype=float),
+        ]
+        self.values = np.asarray(values, dtype=float)
+        self.residuals = (
+            np.zeros(self.values.shape[:-1]) if residuals is None else residuals
+        )
+        self.diagnostics = diagnostics or {}
+
+    @classmethod
+    def build(
+        cls,
+        model: AircraftModel,
+        airspeeds: np.ndarray = AIRSPEEDS,
+        altitudes: np.ndarray = ALTITUDES,
+        gammas: np.ndarray = GAMMAS,
+        method: str = "population",
+        **kwargs,
+    ) -> "TrimTable":
+        """
+        Compute a trim table
+
+        :param model: the aircraft model
+        :param airspeeds: (A,) increasing airspeeds [m/s]
+        :param altitudes: (H,) increasing altitudes [m]
+        :param gammas: (G,) increasing flight-path angles [rad]
+        :param method: "population" to solve every grid point at once with solve_trim_batch, or "sequential" to solve
+            point by point with solve_trim, continuing each solve from its neighbour's trim
+        :param kwargs: arguments passed to solve_trim_batch
+        :return: the trim table
+        """
+        if method == "population":
+            values, diagnostics = solve_trim_batch(
+                model,
+                np.asarray(airspeeds, dtype=float)[:, None, None],
+                np.asarray(altitudes, dtype=float)[None, :, None],
+                np.asarray(gammas, dtype=float)[None, None, :],
+                **kwargs,
+            )
+            return cls(
+                airspeeds,
+                altitudes,
+                gammas,
+                values,
+                diagnostics["residuals"],
+                diagnostics,
+            )
+        elif method == "sequential":
+            values = np.zeros((len(airspeeds), len(altitudes), len(gammas), 3))
+            residuals = np.zeros(values.shape[:-1])
+            x0 = np.array([0.0, 0.0, 0.5])
+            for ida, airspeed in enumerate(airspeeds):
+                for idh, altitude in enumerate(altitudes):
+                    start = x0
+                    for idg, gamma in enumerate(gammas):
+                        start, residuals[ida, idh, idg] = solve_trim(
+                            model, airspeed, altitude, gamma, start
+                        )
+                        values[ida, idh, idg] = start
+                        if idg == 0:
+                            x0 = start
+            return cls(airspeeds, altitudes, gammas, values, residuals)
+        else:
+            raise ValueError(f"Unknown trim method {method}")
+
+    def save(self, path: str) -> None:
+        """Save the table to an .npz file, without the diagnostics of its solve"""
+        np.savez(
+            path,
+            airspeeds=self.axes[0],
+            altitudes=self.axes[1],
+            gammas=self.axes[2],
+            values=self.values,
+            residuals=self.residuals,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "TrimTable":
+        """Load a table saved with save"""
+        with np.load(path) as data:
+            return cls(
+                data["airspeeds"],
+                data["altitudes"],
+                data["gammas"],
+                data["values"],
+                data["residuals"],
+            )
+
+    def lookup(self, airspeed, altitude, gamma=0.0) -> np.ndarray:
+        """
+        Interpolate the trim at one or more operating points
+
+        :param airspeed: airspeed [m/s]
+        :param altitude: altitude [m]
+        :param gamma: flight-path angle [rad]
+        :return: (..., 3) (pitch, elevator, tla) trim
+        """
+        corner = np.arange(2)
+        idx, weights = [], []
+        for axis, value in zip(self.axes, (airspeed, altitude, gamma)):
+            value = np.minimum(np.maximum(value, axis[0]), axis[-1])
+            lower = (
+                np.minimum(np.searchsorted(axis, value, side="right"), len(axis) - 1)
+                - 1
+            )
+            weight = (value - axis[lower]) / (axis[lower + 1] - axis[lower])
+            idx.append(np.expand_dims(lower, -1) + corner)
+            weights.append(np.stack([1.0 - weight, weight], axis=-1))
+        cube = self.values[
+            idx[0][..., :, None, None],
+            idx[1][..., None, :, None],
+            idx[2][..., None, None, :],
+        ]
+        weight = (
+            weights[0][..., :, None, None]
+            * weights[1][..., None, :, None]
+            * weights[2][..., None, None, :]
+        )
+        return (weight[..., None] * cube).sum(axis=(-4, -3, -2))
+
+    def controls(self, airspeed, altitude, gamma=0.0) -> np.ndarray:
+        """
+        Interpolate the trim controls at one or more operating points
+
+        :param airspeed: airspeed [m/s]
+        :param altitude: altitude [m]
+        :param gamma: flight-path angle [rad]
+        :return: (..., 4) (aileron, elevator, tla, rudder) trim controls
+        """
+        trim = self.lookup(airspeed, altitude, gamma)
+        controls = np.zeros(trim.shape[:-1] + (4,))
+        controls[..., 1:3] = trim[..., 1:3]
+        return controls
+
+
+@functools.lru_cache(maxsize=None)
+def trim_table(
+    aircraft_name: str = "TO", cache_dir: Optional[str] = CACHE_DIR
+) -> TrimTable:
+    """
+    Get the trim table of an aircraft, caching it on disk
+
+    Cached files are named by a digest of the aircraft model and the defaults of the table's solve, so changes to
+    either are rebuilt rather than loaded stale.
+
+    :param aircraft_name: name of the aircraft data file
+    :param cache_dir: directory tables are cached in, if None tables are not stored
+    :return: the trim table
+    """
+    model = AircraftModel(aircraft_name)
+    path = None
+    if cache_dir is not None:
+        digest = cache_digest(
+            CACHE_VERSION,
+            model.digest(),
+            defaults(TrimTable.build),
+            defaults(solve_trim_batch),
+        )
+        path = os.path.join(cache_dir, f"{aircraft_name}_{digest}.npz")
+        if os.path.exists(path):
+            return TrimTable.load(path)
+
+    table = TrimTable.build(model)
+
+    if path is not None:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            table.save(path)
+        except OSError:
+            pass
+    return table
@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional, Text, Tuple, TypeVar
+from typing import Dict, List, Optional, Text, Tuple, TypeVar, Union
 
 import gymnasium as gym
 import pygame
@@ -6,8 +6,20 @@ import numpy as np
 from pyflyer import Aircraft
 
 from flyer_env.envs.common.action import Action, ActionType, action_factory
+from flyer_env.envs.common.graphics import TopDownRenderer
 from flyer_env.envs.common.observation import ObservationType, observation_factory
 from flyer_env.aircraft.controller import ControlledAircraft
+from flyer_env.aircraft.model_aircraft import ModelAircraft
+from flyer_env.aircraft.randomisation import ParameterRandomiser
+from flyer_env.aircraft.traffic import Traffic
+from flyer_env.world.chunks import ChunkedTerrain
+from flyer_env.world.conflicts import Conflicts
+from flyer_env.world.generator import tile_map
+from flyer_env.world.landing import LandingSites, landing_sites, obstacle_mask
+from flyer_env.world.neighbours import NeighbourIndex
+from flyer_env.world.obstacles import ObstacleMap
+from flyer_env.world.terrain import Heightmap, heightmap
+from flyer_env.world.wind import WindModel, wind_field
 
 Observation = TypeVar("Observation")
 
@@ -51,6 +63,21 @@ class AbstractEnv(gym.Env):
 
         # Rendering
         self.viewer = None
+        self.renderer = None
+
+        # Aircraft parameters
+        self.randomiser = None
+        self.aircraft_parameters = None
+        self.aircraft_file = None
+
+        # Atmosphere
+        self.wind = None
+        self.wind_velocity = None
+
+        # Traffic
+        self.traffic = None
+        self.neighbours = NeighbourIndex()
+        self.conflicts = None
         assert render_mode is None or render_mode in self.metadata["render_modes"]
         self.render_mode = render_mode
 
@@ -82,6 +109,22 @@ class AbstractEnv(gym.Env):
             "render_frequency": 1.0,  # [Hz]
             "screen_size": 600,  # [px], forced to be square viewport for now
             "scaling": 25,  # [m/px], ratio of how large the default tile is in [m]
+            "render_backend": "world",  # "world" renders with pyflyer, "numpy" with the headless TopDownRenderer
+            # Aircraft parameter randomisation, None or {"scales": {name: relative half-range}, "pool_size": int}
+            "randomisation": None,
+            # Wind and turbulence, None or WindModel arguments, e.g. {"speed": 10.0, "turbulence": "light"}, with
+            # "terrain": True the steady wind varies over the terrain of the world. With wind the aircraft are flown by
+            # the Python AircraftModel (ModelAircraft) in place of pyflyer, crashing at the same limits
+            "wind": None,
+            # Other aircraft, None or {"count": int, "mode": "cruise" | "formation" | "pursuit"} with optional
+            # "radius", "altitude_range", "airspeed_range", "separation" and "collision_radius" [m]
+            "traffic": None,
+            # Obstacles and no-fly zones, None or {"shapes": [ObstacleMap shape dicts], "tiles": bool} with optional
+            # "resolution" and "tile_height" [m], with "tiles": True the obstacle tiles of the tile map are included
+            "obstacles": None,
+            # Terrain streamed in chunks around the aircraft for large worlds, None or ChunkedTerrain arguments, e.g.
+            # {"chunk_size": 4000.0, "capacity": 64, "prefetch": 2}
+            "terrain_streaming": None,
         }
 
     def configure(self, config: dict) -> None:
@@ -147,6 +190,18 @@ class AbstractEnv(gym.Env):
             # TODO: Add key information we might want here
         }
 
+        if self.aircraft_parameters is not None:
+            info["aircraft_parameters"] = self.aircraft_parameters
+        if self.wind_velocity is not None:
+            info["wind"] = self.wind_velocity[0].copy()
+        if self.conflicts is not None:
+            info["separation_violations"] = len(self.conflicts)
+            info["collisions"] = int(np.sum(self.conflicts.collisions))
+        if self.config.get("obstacles"):
+            info["obstacle_distance"] = float(
+                self.obstacle_map.distance(np.array(self.vehicle.position))[0]
+            )
+
         try:
             info["rewards"] = self._rewards(action)
         except NotImplementedError:
@@ -174,6 +229,8 @@ class AbstractEnv(gym.Env):
         self.steps = 0
         self.done = False
         self._reset()
+        self._reset_traffic()
+        self._reset_wind()
 
         # Second, to link the obs and actions to the vehicles once the scene is created
         self.define_spaces()
@@ -183,6 +240,220 @@ class AbstractEnv(gym.Env):
 
         return obs, info
 
+    def _create_aircraft(self, data_path: str, aircraft_name: str = "TO") -> Aircraft:
+        """
+        Create the ego aircraft, drawing its parameters from the randomisation pool if randomisation is configured
+
+        The sampled parameters are kept in aircraft_parameters, ordered as randomiser.names, and reported in info.
+
+        :param data_path: directory containing the aircraft data files
+        :param aircraft_name: name of the aircraft data file
+        :return: the aircraft
+        """
+        config = self.config.get("randomisation")
+        if not config:
+            self.aircraft_parameters = None
+            self.aircraft_file = (aircraft_name, data_path)
+            return Aircraft(aircraft_name=aircraft_name, data_path=data_path)
+
+        if self.randomiser is None or self.randomiser.aircraft_name != aircraft_name:
+            self.randomiser = ParameterRandomiser(
+                aircraft_name, config.get("scales"), data_path
+            )
+            self.randomiser.write_pool(self.np_random, config.get("pool_size", 256))
+        idx = min(
+            int(self.np_random.uniform(0.0, len(self.randomiser.pool))),
+            len(self.randomiser.pool) - 1,
+        )
+        self.aircraft_parameters = self.randomiser.pool[idx].astype(np.float32)
+        self.aircraft_file = (self.randomiser.pool_name(idx), self.randomiser.pool_dir)
+        return Aircraft(
+            aircraft_name=self.randomiser.pool_name(idx),
+            data_path=self.randomiser.pool_dir,
+        )
+
+    @property
+    def heightmap(self) -> Union[Heightmap, ChunkedTerrain]:
+        """
+        Terrain elevation of the current world, generated once per world seed
+
+        With terrain_streaming configured the terrain is generated in chunks around the aircraft as it flies.
+        """
+        config = self.config.get("terrain_streaming")
+        if config:
+            key = (self.world_seed, repr(config))
+            if getattr(self, "_terrain_chunks", (None, None))[0] != key:
+                self._terrain_chunks = (key, ChunkedTerrain(self.world_seed, **config))
+            return self._terrain_chunks[1]
+        return heightmap(
+            self.world_seed, tuple(self.config["area"]), self.config["scaling"]
+        )
+
+    @property
+    def tile_map(self) -> np.ndarray:
+        """
+        Tiles of the current world, indices into TopDownRenderer.TILES drawn from its terrain once per world seed
+
+        Tile (0, 0) is in the south-west corner of the map. The map is only drawn when it is used, by the renderer, the
+        landing sites or the obstacles config's tiles.
+        """
+        return tile_map(
+            self.world_seed,
+            tuple(self.config["area"]),
+            self.config["scaling"],
+            tuple(TopDownRenderer.TILES),
+        )
+
+    @property
+    def landing_sites(self) -> LandingSites:
+        """
+        Candidate forced landing sites of the current world, scored on its terrain and obstacle tiles once per world
+        seed
+
+        Sites are scored over the map's area, including when the terrain is streamed.
+        """
+        return landing_sites(
+            self.world_seed,
+            tuple(self.config["area"]),
+            self.config["scaling"],
+            tile_names=tuple(TopDownRenderer.TILES),
+        )
+
+    @property
+    def obstacle_map(self) -> ObstacleMap:
+        """
+        Signed distance field of the obstacles and no-fly zones of the current world, rasterised once per world seed
+        and obstacles config
+        """
+        config = self.config.get("obstacles") or {}
+        key = (self.world_seed, repr(config))
+        if getattr(self, "_obstacle_map", (None, None))[0] != key:
+            obstacles, terrain = None, None
+            if config.get("tiles", False):
+                obstacles = obstacle_mask(self.tile_map, TopDownRenderer.TILES)
+                # The tiles stand on the terrain they are drawn from
+                terrain = heightmap(
+                    self.world_seed, tuple(self.config["area"]), self.config["scaling"]
+                )
+            obstacle_map = ObstacleMap.build(
+                config.get("shapes", ()),
+                obstacles,
+                tuple(self.config["area"]),
+                self.config["scaling"],
+                config.get("resolution", self.config["scaling"]),
+                config.get("tile_height", 20.0),
+                terrain,
+            )
+            self._obstacle_map = (key, obstacle_map)
+        return self._obstacle_map[1]
+
+    def _reset_wind(self) -> None:
+        """
+        Create the wind model from the config and generate its first block of turbulence
+
+        The model is sized for the controlled aircraft followed by the traffic, so the traffic is reset first. pyflyer
+        has no wind input, so with wind the controlled aircraft are flown through it by ModelAircraft.
+        """
+        if not self.config.get("wind"):
+            self.wind = None
+            self.wind_velocity = None
+            return
+        self._fly_in_wind()
+        config = dict(self.config["wind"])
+        if config.pop("terrain", False):
+            config["field"] = wind_field(
+                self.world_seed,
+                tuple(self.config["area"]),
+                self.config["scaling"],
+                config.get("speed", 0.0),
+                config.get("direction", 0.0),
+                config.get("shear_exponent", 1.0 / 7.0),
+                config.get("reference_altitude", 10.0),
+            )
+        n_traffic = 0 if self.traffic is None else self.traffic.count
+        self.wind = WindModel(
+            n_aircraft=len(self.controlled_vehicles) + n_traffic,
+            dt=1 / self.config["simulation_frequency"],
+            **config,
+        )
+        seed = int(self.np_random.uniform(0.0, 2**31))
+        self.wind.reset(np.random.default_rng(seed))
+        self.wind_velocity = np.zeros((len(self.controlled_vehicles), 3))
+
+    def _fly_in_wind(self) -> None:
+        """
+        Replace the pyflyer aircraft of the controlled vehicles by ModelAircraft in the same position, heading and
+        airspeed, keeping the pyflyer aircraft to draw them in the world
+        """
+        for idx, vehicle in enumerate(self.controlled_vehicles):
+            aircraft = (
+                vehicle.aircraft if isinstance(vehicle, ControlledAircraft) else vehicle
+            )
+            state = aircraft.dict
+            flown = ModelAircraft(*self.aircraft_file, display=aircraft)
+            flown.reset(
+                aircraft.position,
+                state["yaw"],
+                float(np.linalg.norm([state["u"], state["v"], state["w"]])),
+            )
+            if isinstance(vehicle, ControlledAircraft):
+                vehicle.aircraft = flown
+            else:
+                self.controlled_vehicles[idx] = flown
+
+    def _reset_traffic(self) -> None:
+        """
+        Spawn the other aircraft from the config around the ego aircraft and index every aircraft's position
+        """
+        config = self.config.get("traffic")
+        if not config:
+            self.traffic = None
+            self.conflicts = None
+        else:
+            config = dict(config)
+            spawn = {
+                key: config.pop(key)
+                for key in ["radius", "altitude_range", "airspeed_range"]
+                if key in config
+            }
+            config.pop("separation", None)
+            config.pop("collision_radius", None)
+            self.traffic = Traffic(dt=1 / self.config["simulation_frequency"], **config)
+            self.traffic.reset(
+                self.np_random,
+                np.array(self.vehicle.position),
+                self.vehicle.dict["yaw"],
+                **spawn,
+            )
+        self._update_neighbours()
+
+    def _update_neighbours(self, dt: float = 0.0) -> None:
+        """
+        Rebuild the neighbour index on the ego aircraft's position, index 0, then the traffic's, and find the
+        conflicts between every aircraft over the tick since the last update
+
+        :param dt: length of the tick [s]
+        """
+        start = self.neighbours.positions
+        positions = np.array(self.vehicle.position, dtype=float).reshape(1, 3)
+        if self.traffic is not None:
+            positions = np.concatenate([positions, self.traffic.positions])
+        self.neighbours.update(positions)
+        if self.traffic is None:
+            return
+        if dt > 0.0 and start.shape == positions.shape:
+            velocities = (positions - start) / dt
+        else:
+            start, velocities = positions, np.zeros_like(positions)
+        config = self.config["traffic"]
+        self.conflicts = Conflicts.detect(
+            start,
+            velocities,
+            dt,
+            config.get("separation", 150.0),
+            config.get("collision_radius", 10.0),
+        )
+
     def _reset(self) -> None:
         """
         Reset the scene
@@ -219,14 +490,42 @@ class AbstractEnv(gym.Env):
         dt = 1 / self.config["simulation_frequency"]
         self.time += dt
         self.action_type.act(action)  # set the action on the aircraft
-        self.vehicle.step(dt)  # update the aircraft
+        traffic_wind = None
+        if self.wind is None:
+            self.vehicle.step(dt)  # update the aircraft
+        else:
+            positions = np.array(
+                [vehicle.position for vehicle in self.controlled_vehicles]
+            )
+            headings = np.array(
+                [vehicle.dict["yaw"] for vehicle in self.controlled_vehicles]
+            )
+            if self.traffic is not None:
+                positions = np.concatenate([positions, self.traffic.positions])
+                headings = np.concatenate([headings, self.traffic.states[:, 5]])
+            velocities = self.wind(self.steps, -positions[:, 2], headings, positions)
+            # The controlled aircraft come first, then the traffic
+            n_controlled = len(self.controlled_vehicles)
+            self.wind_velocity = velocities[:n_controlled]
+            traffic_wind = velocities[n_controlled:]
+            for vehicle, wind in zip(self.controlled_vehicles, self.wind_velocity):
+                vehicle.step(dt, wind)
+        if self.traffic is not None:
+            self.traffic.step(self.vehicle.dict, traffic_wind)
+            self._update_neighbours(dt)
+        if self.config.get("terrain_streaming"):
+            self.heightmap.update(self.vehicle.position, self.vehicle.dict["yaw"])
+        self.steps += 1
         self.world.camera_pos = self.vehicle.position  # move the camera in the world
 
         if self.world.render_type == "aircraft":
             if type(self.vehicle) == ControlledAircraft:
-                self.world.update_aircraft(self.vehicle.aircraft, 0)
+                aircraft = self.vehicle.aircraft
             else:
-                self.world.update_aircraft(self.vehicle, 0)  # Update vehicle in world
+                aircraft = self.vehicle
+            if isinstance(aircraft, ModelAircraft):
+                aircraft = aircraft.drawn()  # the pyflyer aircraft drawn in its place
+            self.world.update_aircraft(aircraft, 0)  # Update vehicle in world
 
         # print(f"self.world.camera_pos: {self.world.camera_pos}")
         # self.world.step()  # Step the world
@@ -270,6 +569,9 @@ class AbstractEnv(gym.Env):
             pygame.display.update()
 
         if self.render_mode == "rgb_array":
+            if self.config["render_backend"] == "numpy":
+                return self._get_renderer().render_envs([self])[0]
+
             bytes = self.world.render()
             img = np.array(bytes, dtype=np.uint8)
             img = img.reshape(
@@ -279,6 +581,24 @@ class AbstractEnv(gym.Env):
 
             return img
 
+    def _get_renderer(self) -> TopDownRenderer:
+        """
+        Create the headless renderer on first use
+
+        Tiles are drawn at one sprite texel per pixel like the world renderer, unless the cached layer of the whole
+        map would be larger than 4096px a side.
+        """
+        if self.renderer is None:
+            resolution = max(
+                self.config["scaling"] / 16.0,
+                self.config["scaling"] * max(self.config["area"]) / 4096.0,
+            )
+            self.renderer = TopDownRenderer(
+                screen_size=(self.config["screen_size"], self.config["screen_size"]),
+                resolution=resolution,
+            )
+        return self.renderer
+
     def close(self) -> None:
         """
         Close the environment
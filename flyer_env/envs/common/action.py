@@ -368,28 +368,50 @@ class PursuitAction(ActionType):
 
 
 class TrackAction(ActionType):
+    """
+    A high level action to fly a track through a set of waypoints at a commanded speed.
+    Actions are set in the order: [{Waypoints}, {Speed}], with the waypoints given as flattened (x, y, z) positions.
+    """
 
     SPEED_RANGE = (0.0, 300.0)
 
     def __init__(
         self,
         env: "AbstractEnv",
+        n_points: int = 1,
+        radius: float = 500.0,
         speed_range: Optional[Tuple[float, float]] = None,
         clip: bool = None,
         **kwargs
     ) -> None:
+        """
+        Create a track action space
 
+        :param env: the environment
+        :param n_points: number of waypoints in each action
+        :param radius: radius of the fillets joining the legs of the track [m]
+        :param speed_range: the range of speed values [m/s]
+        :param clip: clip the action to the desired range
+        """
         super().__init__(env)
+        self.n_points = n_points
+        self.radius = radius
         self.speed_range = speed_range if speed_range else self.SPEED_RANGE
-        self.size = 4
+        self.size = 3 * n_points + 1
         self.clip = clip
-        self.last_action = {"track_points": np.zeros(3), "other_controls": np.zeros(1)}
+        self.last_action = {
+            "targets": np.zeros(3 * n_points),
+            "other_controls": np.zeros(1),
+        }
 
     def space(self) -> spaces.Dict:
         return spaces.Dict(
             {
                 "targets": spaces.Box(
-                    low=-np.infty, high=np.infty, shape=(3,), dtype=np.float32
+                    low=-np.infty,
+                    high=np.infty,
+                    shape=(3 * self.n_points,),
+                    dtype=np.float32,
                 ),
                 "other_controls": spaces.Box(
                     low=-1.0, high=1.0, shape=(1,), dtype=np.float32
@@ -405,7 +427,9 @@ class TrackAction(ActionType):
         """
         Apply the action to the controlled vehicle
 
-        :param action: dictionary corresponding to commanded positions, altitude and speed
+        The waypoints can be held constant over many steps, the vehicle only rebuilds its track when they change.
+
+        :param action: dictionary corresponding to commanded waypoints and speed
         """
 
         if self.clip:
@@ -414,7 +438,10 @@ class TrackAction(ActionType):
         self.controlled_vehicle.act(
             {
                 "track_points": action["targets"],
-                "speed": utils.lmap(action["other_controls"], [0, 1], self.speed_range),
+                "track_radius": self.radius,
+                "speed": utils.lmap(
+                    action["other_controls"][0], [0, 1], self.speed_range
+                ),
             }
         )
 
@@ -0,0 +1,353 @@
+import os
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from skimage import io
+
+from flyer_env.world.runway import Runway
+
+if TYPE_CHECKING:
+    from flyer_env.envs.common.abstract import AbstractEnv
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "assets")
+
+
+class TopDownRenderer:
+    """
+    A headless top-down renderer written in NumPy
+
+    The terrain tile grid and runways are pre-rasterized once per world into a static layer covering the whole map,
+    and the layers of the last cache_size worlds are cached. Each frame is then a single gather of a camera window
+    from the static layer, followed by drawing the dynamic overlay (goal and aircraft glyph) on top. Frames for a batch
+    of environments are rendered together into an (N, H, W, 3) array.
+
+    Images are north-up, the x-axis (north) points up the image and the y-axis (east) points right.
+    """
+
+    TILES: List[str] = [
+        "grass",
+        "normal-grass",
+        "darker-grass",
+        "forest-grass",
+        "leaves",
+        "tree",
+        "sand",
+        "water",
+        "mud",
+        "light-mud",
+        "forest-dirt",
+        "forest-leaves",
+        "log",
+        "1-flower",
+        "2-flowers",
+        "4-flowers",
+        "6-flowers",
+        "8-poppies",
+    ]
+    AIRCRAFT_SPRITES: List[str] = [
+        "aircraft-north",
+        "aircraft-east",
+        "aircraft-south",
+        "aircraft-west",
+    ]
+    BACKGROUND_COLOUR = (0, 18, 25)
+    RUNWAY_COLOUR = (30, 30, 30)
+    GOAL_COLOUR = (238, 155, 0)
+    TEXTURE_MIN_PX = (
+        4  # minimum tile size [px] to draw textures rather than the mean tile colour
+    )
+
+    def __init__(
+        self,
+        screen_size: Tuple[int, int] = (256, 256),
+        resolution: float = 25.0,
+        glyph_size: int = 16,
+        goal_radius: int = 3,
+        assets_dir: str = ASSETS_DIR,
+        cache_size: int = 2,
+    ) -> None:
+        """
+        Create a top-down renderer
+
+        :param screen_size: (H, W) size of the rendered frames [px]
+        :param resolution: ground distance covered by one pixel [m/px]
+        :param glyph_size: size of the aircraft glyph [px]
+        :param goal_radius: radius of the goal marker [px]
+        :param assets_dir: directory containing the tiles and dynamic_objects sprites
+        :param cache_size: number of static layers cached, the least recently used evicted first
+        """
+        self.screen_size = tuple(screen_size)
+        self.resolution = resolution
+        self.glyph_size = glyph_size
+        self.goal_radius = goal_radius
+        self.cache_size = cache_size
+
+        self.tile_textures = np.stack(
+            [
+                self._load_sprite(os.path.join(assets_dir, "tiles", f"{name}.png"))[
+                    ..., :3
+                ]
+                for name in self.TILES
+            ]
+        )
+        self.tile_colours = self.tile_textures.reshape(len(self.TILES), -1, 3).mean(
+            axis=1
+        )
+
+        glyphs = np.stack(
+            [
+                self._load_sprite(
+                    os.path.join(assets_dir, "dynamic_objects", f"{name}.png")
+                )
+                for name in self.AIRCRAFT_SPRITES
+            ]
+        )
+        idx = np.arange(glyph_size) * glyphs.shape[1] // glyph_size
+        glyphs = glyphs[:, idx][:, :, idx].astype(np.float32)
+        self.glyph_rgb = glyphs[..., :3]
+        self.glyph_alpha = glyphs[..., 3:] / 255.0
+
+        dr, dc = np.mgrid[
+            -goal_radius : goal_radius + 1, -goal_radius : goal_radius + 1
+        ]
+        disc = dr**2 + dc**2 <= goal_radius**2
+        self.goal_offsets = (dr[disc], dc[disc])
+
+        self.pad = max(self.screen_size) // 2 + glyph_size
+        # Layers of a large map are tens of MB, so only the most recently used are kept
+        self._layers: "OrderedDict[tuple, Tuple[np.ndarray, np.ndarray]]" = (
+            OrderedDict()
+        )
+
+    @staticmethod
+    def _load_sprite(path: str) -> np.ndarray:
+        """Load a sprite as an RGBA uint8 array"""
+        sprite = io.imread(path)
+        if sprite.shape[-1] == 3:
+            alpha = np.full(sprite.shape[:2] + (1,), 255, dtype=np.uint8)
+            sprite = np.concatenate([sprite, alpha], axis=-1)
+        return sprite
+
+    def static_layer(
+        self,
+        area: Tuple[int, int],
+        tile_size: float,
+        runways: Sequence[Runway] = (),
+        tile_map: Optional[np.ndarray] = None,
+        key: Optional[tuple] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the pre-rasterized static layer of a world, rasterizing it on first use
+
+        :param area: (x, y) size of the map [tiles], the map is centred on the origin
+        :param tile_size: size of a tile [m]
+        :param runways: runways of the environment
+        :param tile_map: (x, y) array of indices into TILES, defaults to grass everywhere
+        :param key: cache key identifying the world, layers are not cached if None
+        :return: the padded (rows, cols, 3) uint8 layer and the world (x, y) position of its top-left pixel [m]
+        """
+        if key is not None and key in self._layers:
+            self._layers.move_to_end(key)
+            return self._layers[key]
+
+        extent = np.array(area, dtype=np.float64) * tile_size
+        rows, cols = np.ceil(extent / self.resolution).astype(int) + 2 * self.pad
+        origin = np.array(
+            [
+                0.5 * extent[0] + self.pad * self.resolution,
+                -0.5 * extent[1] - self.pad * self.resolution,
+            ]
+        )
+        # World coordinates of every pixel centre
+        x = origin[0] - (np.arange(rows) + 0.5) * self.resolution
+        y = origin[1] + (np.arange(cols) + 0.5) * self.resolution
+
+        layer = np.empty((rows, cols, 3), dtype=np.uint8)
+        layer[:] = self.BACKGROUND_COLOUR
+
+        # Terrain tile grid, tile (0, 0) is in the south-west corner
+        tx = (x + 0.5 * extent[0]) / tile_size
+        ty = (y + 0.5 * extent[1]) / tile_size
+        in_x = (tx >= 0.0) & (tx < area[0])
+        in_y = (ty >= 0.0) & (ty < area[1])
+        ix, iy = tx[in_x].astype(int), ty[in_y].astype(int)
+        if tile_map is None:
+            tiles = np.zeros((len(ix), len(iy)), dtype=int)
+        else:
+            tiles = np.asarray(tile_map)[ix[:, None], iy[None, :]]
+        if tile_size / self.resolution >= self.TEXTURE_MIN_PX:
+            texel = self.tile_textures.shape[1]
+            # Sprites are stored top row first, i.e. north at the top
+            u = (texel - 1 - ((tx[in_x] % 1.0) * texel).astype(int))[:, None]
+            v = ((ty[in_y] % 1.0) * texel).astype(int)[None, :]
+            terrain = self.tile_textures[tiles, u, v]
+        else:
+            terrain = self.tile_colours[tiles].astype(np.uint8)
+        layer[np.ix_(in_x, in_y)] = terrain
+
+        for runway in runways:
+            self._draw_runway(layer, x, y, runway)
+
+        result = (layer, origin)
+        if key is not None:
+            self._layers[key] = result
+            if len(self._layers) > self.cache_size:
+                self._layers.popitem(last=False)
+        return result
+
+    def _draw_runway(
+        self, layer: np.ndarray, x: np.ndarray, y: np.ndarray, runway: Runway
+    ) -> None:
+        """Rasterize a runway into the static layer"""
+        x0, y0 = runway.position
+        hdg = runway.heading
+        half_length = 0.5 * runway.length
+        # Keep narrow runways visible at coarse resolutions
+        half_width = max(0.5 * runway.width, 0.5 * self.resolution)
+        reach = half_length + half_width
+        rows = np.nonzero(np.abs(x - x0) <= reach)[0]
+        cols = np.nonzero(np.abs(y - y0) <= reach)[0]
+        if len(rows) == 0 or len(cols) == 0:
+            return
+        dx = x[rows][:, None] - x0
+        dy = y[cols][None, :] - y0
+        along = dx * np.cos(hdg) + dy * np.sin(hdg)
+        cross = -dx * np.sin(hdg) + dy * np.cos(hdg)
+        mask = (np.abs(along) <= half_length) & (np.abs(cross) <= half_width)
+        window = layer[rows[0] : rows[-1] + 1, cols[0] : cols[-1] + 1]
+        window[mask] = self.RUNWAY_COLOUR
+
+    def render(
+        self,
+        layer: np.ndarray,
+        origin: np.ndarray,
+        positions: np.ndarray,
+        headings: np.ndarray,
+        goals: Optional[np.ndarray] = None,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Render a batch of aircraft over the same static layer, with the camera centred on each aircraft
+
+        :param layer: static layer from static_layer()
+        :param origin: world position of the top-left pixel of the layer [m]
+        :param positions: (N, 2+) aircraft positions [m]
+        :param headings: (N,) aircraft headings [rad]
+        :param goals: (N, 2+) goal positions [m], NaN rows are not drawn
+        :param out: optional (N, H, W, 3) uint8 array to render into
+        :return: (N, H, W, 3) uint8 frames
+        """
+        positions = np.atleast_2d(np.asarray(positions, dtype=np.float64))
+        headings = np.atleast_1d(np.asarray(headings, dtype=np.float64))
+        n = len(positions)
+        height, width = self.screen_size
+
+        # Camera window gather from the static layer
+        row_c = (origin[0] - positions[:, 0]) / self.resolution
+        col_c = (positions[:, 1] - origin[1]) / self.resolution
+        rows = np.floor(row_c).astype(int)[:, None] - height // 2 + np.arange(height)
+        cols = np.floor(col_c).astype(int)[:, None] - width // 2 + np.arange(width)
+        np.clip(rows, 0, layer.shape[0] - 1, out=rows)
+        np.clip(cols, 0, layer.shape[1] - 1, out=cols)
+        if out is None:
+            out = np.empty((n, height, width, 3), dtype=np.uint8)
+        out[:] = layer[rows[:, :, None], cols[:, None, :]]
+
+        # Goal markers
+        if goals is not None:
+            goals = np.atleast_2d(np.asarray(goals, dtype=np.float64))
+            visible = np.all(np.isfinite(goals[:, :2]), axis=1)
+            dr = np.where(
+                visible, (positions[:, 0] - goals[:, 0]) / self.resolution, 0.0
+            )
+            dc = np.where(
+                visible, (goals[:, 1] - positions[:, 1]) / self.resolution, 0.0
+            )
+            g_rows = (
+                np.rint(dr).astype(int)[:, None] + height // 2 + self.goal_offsets[0]
+            )
+            g_cols = (
+                np.rint(dc).astype(int)[:, None] + width // 2 + self.goal_offsets[1]
+            )
+            inside = (
+                visible[:, None]
+                & (g_rows >= 0)
+                & (g_rows < height)
+                & (g_cols >= 0)
+                & (g_cols < width)
+            )
+            env_idx = np.broadcast_to(np.arange(n)[:, None], g_rows.shape)
+            out[env_idx[inside], g_rows[inside], g_cols[inside]] = self.GOAL_COLOUR
+
+        # Aircraft glyphs, the sprite is chosen by the nearest cardinal heading
+        sprite = np.rint(headings / (0.5 * np.pi)).astype(int) % len(
+            self.AIRCRAFT_SPRITES
+        )
+        r0 = height // 2 - self.glyph_size // 2
+        c0 = width // 2 - self.glyph_size // 2
+        window = out[:, r0 : r0 + self.glyph_size, c0 : c0 + self.glyph_size]
+        alpha = self.glyph_alpha[sprite]
+        window[:] = (window * (1.0 - alpha) + self.glyph_rgb[sprite] * alpha).astype(
+            np.uint8
+        )
+        return out
+
+    def render_envs(self, envs: Sequence["AbstractEnv"]) -> np.ndarray:
+        """
+        Render a batch of environments into an (N, H, W, 3) array
+
+        Environments sharing a world are rendered together from the same cached static layer.
+
+        :param envs: environments to render, unwrapped
+        :return: (N, H, W, 3) uint8 frames
+        """
+        frames = np.empty((len(envs),) + self.screen_size + (3,), dtype=np.uint8)
+        positions = np.array([env.vehicle.position for env in envs], dtype=np.float64)
+        headings = np.array([env.vehicle.dict["yaw"] for env in envs], dtype=np.float64)
+        goals = np.full((len(envs), 3), np.nan)
+        for ide, env in enumerate(envs):
+            goal = getattr(env, "goal", None)
+            if goal is not None:
+                goals[ide] = goal
+
+        groups: Dict[tuple, List[int]] = {}
+        for ide, env in enumerate(envs):
+            groups.setdefault(self.layer_key(env), []).append(ide)
+        for key, ids in groups.items():
+            env = envs[ids[0]]
+            layer, origin = self.static_layer(
+                env.config["area"],
+                env.config["scaling"],
+                runways=self.runways(env),
+                tile_map=getattr(env, "tile_map", None),
+                key=key,
+            )
+            frames[ids] = self.render(
+                layer, origin, positions[ids], headings[ids], goals[ids]
+            )
+        return frames
+
+    @staticmethod
+    def runways(env: "AbstractEnv") -> List[Runway]:
+        """Runways of an environment, all of its runway index if it has one"""
+        runways = getattr(env, "runways", None)
+        if runways is not None:
+            return list(runways.runways)
+        config = env.config.get("runway_configuration")
+        return [] if config is None else [Runway.from_config(config)]
+
+    @classmethod
+    def layer_key(cls, env: "AbstractEnv") -> tuple:
+        """Key identifying the static layer of an environment's world"""
+        runways = tuple(
+            (*runway.position, runway.heading, runway.length, runway.width)
+            for runway in cls.runways(env)
+        )
+        return (
+            type(env).__name__,
+            getattr(env, "world_seed", None),
+            tuple(env.config["area"]),
+            env.config["scaling"],
+            runways,
+        )
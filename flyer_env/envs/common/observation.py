@@ -1,4 +1,4 @@
-from typing import TYPE_CHECKING, Dict, List, OrderedDict
+from typing import TYPE_CHECKING, Dict, List, OrderedDict, Tuple
 
 import numpy as np
 import pandas as pd
@@ -82,8 +82,27 @@ class DynamicObservation(ObservationType):
         df = pd.DataFrame.from_records([self.observer_vehicle.dict])[self.features]
         df = df[self.features]
         obs = df.values.copy()
+        if self.vehicles_count > 1:
+            obs = np.concatenate([obs, self.neighbours(self.vehicles_count - 1)])
         return obs.astype(self.space().dtype)
 
+    def neighbours(self, k: int) -> np.ndarray:
+        """
+        Features of the k nearest other aircraft, found in the environment's neighbour index
+
+        :param k: number of aircraft
+        :return: (k, F) features, nearest first, rows of zeros where there are fewer than k other aircraft
+        """
+        rows = np.zeros((k, len(self.features)))
+        traffic = getattr(self.env, "traffic", None)
+        if traffic is None:
+            return rows
+        indices, _ = self.env.neighbours.neighbours(k, [0])
+        # The ego aircraft is index 0 of the index, the traffic follows it
+        indices = indices[0][indices[0] >= 0] - 1
+        rows[: len(indices)] = traffic.features(self.features, indices)
+        return rows
+
 
 class TrajectoryObservation(ObservationType):
     """
@@ -361,6 +380,521 @@ class LateralGoalObservation(DynamicObservation):
         return obs
 
 
+class ImageObservation(ObservationType):
+    """
+    Observe a stack of the last K rendered frames of the scene
+
+    Frames are rendered at the observation resolution, optionally supersampled by an integer ``downsample`` factor and
+    block averaged, and converted to grayscale. The stack is held in a preallocated uint8 ring buffer where each frame
+    is written twice, so the last K frames are always a contiguous slice and no per-step concatenation is needed.
+    """
+
+    WEIGHTS: List[float] = [0.2989, 0.5870, 0.1140]  # ITU-R 601-2 luma
+
+    def __init__(
+        self,
+        env: "AbstractEnv",
+        observation_shape: Tuple[int, int] = (84, 84),
+        stack_size: int = 4,
+        grayscale: bool = True,
+        downsample: int = 1,
+        weights: List[float] = None,
+        **kwargs: dict
+    ) -> None:
+
+        super().__init__(env)
+        self.observation_shape = tuple(observation_shape)
+        self.stack_size = stack_size
+        self.grayscale = grayscale
+        self.downsample = downsample
+        self.weights = np.array(weights or self.WEIGHTS, dtype=np.float32)
+
+        self.frame_shape = (
+            self.observation_shape if self.grayscale else self.observation_shape + (3,)
+        )
+        self.buffer = np.zeros(
+            (2 * self.stack_size,) + self.frame_shape, dtype=np.uint8
+        )
+        self.index = 0
+        self.filled = False
+
+    def space(self) -> spaces.Space:
+        return spaces.Box(
+            shape=(self.stack_size,) + self.frame_shape,
+            low=0,
+            high=255,
+            dtype=np.uint8,
+        )
+
+    def observe(self) -> np.ndarray:
+        frame = self._render_frame()
+        if not self.filled:
+            # Initial observation of an episode, fill the stack with the first frame
+            self.buffer[:] = frame
+            self.filled = True
+        else:
+            self.buffer[self.index] = frame
+            self.buffer[self.index + self.stack_size] = frame
+            self.index = (self.index + 1) % self.stack_size
+        return self.buffer[self.index : self.index + self.stack_size].copy()
+
+    def _render_frame(self) -> np.ndarray:
+        """Render the world at the observation resolution and convert it to a single uint8 frame"""
+        world = self.env.world
+        rows, columns = self.observation_shape
+        # Frames are oriented as env.render(), rows along the screen width
+        world.screen_dim = [rows * self.downsample, columns * self.downsample]
+        img = np.asarray(world.render(), dtype=np.uint8)
+        img = img.reshape((int(world.screen_width), int(world.screen_height), 4))
+        img = img[:, :, :3]
+        # Restore the viewport used by env.render()
+        world.screen_dim = [
+            self.env.config["screen_size"],
+            self.env.config["screen_size"],
+        ]
+
+        if self.downsample > 1:
+            img = img.reshape(
+                (rows, self.downsample, columns, self.downsample, 3)
+            ).mean(axis=(1, 3))
+        if self.grayscale:
+            img = img @ self.weights
+        return np.rint(img).astype(np.uint8)
+
+
+class TerrainPatchObservation(ObservationType):
+    """
+    Observe the terrain around the aircraft along with its state
+
+    The terrain is an egocentric, heading-aligned window of the world's heightmap, with the first row furthest ahead of
+    the aircraft and the columns running from left to right. The window's sampling grid is precomputed in the aircraft's
+    frame, so each observation is a rotation of the grid and one vectorized bilinear gather from the cached heightmap.
+    Heights are given relative to the aircraft, positive for terrain above it.
+    """
+
+    FEATURES: List[str] = DynamicObservation.FEATURES
+
+    def __init__(
+        self,
+        env: "AbstractEnv",
+        patch_shape: Tuple[int, int] = (16, 16),
+        resolution: float = 100.0,
+        behind: float = 0.25,
+        relative: bool = True,
+        features: List[str] = None,
+        **kwargs: dict
+    ) -> None:
+        """
+        :param env: the environment
+        :param patch_shape: (rows, columns) of the terrain window
+        :param resolution: spacing of the terrain samples [m]
+        :param behind: fraction of the window behind the aircraft
+        :param relative: if True heights are relative to the aircraft's altitude, otherwise elevations
+        :param features: features of the state vector
+        """
+        super().__init__(env)
+        self.patch_shape = tuple(patch_shape)
+        self.resolution = resolution
+        self.relative = relative
+        self.features = features or self.FEATURES
+
+        rows, cols = self.patch_shape
+        forward = (rows - 1 - np.arange(rows) - (rows - 1) * behind) * resolution
+        right = (np.arange(cols) - 0.5 * (cols - 1)) * resolution
+        self.forward, self.right = (
+            grid.ravel() for grid in np.meshgrid(forward, right, indexing="ij")
+        )
+
+    def space(self) -> spaces.Space:
+        return spaces.Dict(
+            dict(
+                observation=spaces.Box(
+                    -np.inf, np.inf, shape=(len(self.features),), dtype=np.float32
+                ),
+                terrain=spaces.Box(
+                    -np.inf, np.inf, shape=self.patch_shape, dtype=np.float32
+                ),
+            )
+        )
+
+    def patches(self, position: np.ndarray, heading: np.ndarray) -> np.ndarray:
+        """
+        Terrain windows of a batch of aircraft
+
+        :param position: (N, 3) NED positions [m]
+        :param heading: (N,) headings [rad]
+        :return: (N, rows, columns) terrain heights [m]
+        """
+        position = np.asarray(position, dtype=float)
+        c, s = np.cos(heading)[:, None], np.sin(heading)[:, None]
+        x = position[:, :1] + c * self.forward - s * self.right
+        y = position[:, 1:2] + s * self.forward + c * self.right
+        heights = self.env.heightmap.height(x, y)
+        if self.relative:
+            heights = heights + position[:, 2:3]
+        return heights.reshape((-1,) + self.patch_shape).astype(np.float32)
+
+    def observe(self) -> Dict[str, np.ndarray]:
+        state = self.observer_vehicle.dict
+        position = np.array([[state["x"], state["y"], state["z"]]])
+        return OrderedDict(
+            [
+                (
+                    "observation",
+                    np.array([state[f] for f in self.features], dtype=np.float32),
+                ),
+                ("terrain", self.patches(position, np.array([state["yaw"]]))[0]),
+            ]
+        )
+
+
+class TerrainRangeObservation(ObservationType):
+    """
+    Observe the range to the terrain along a fan of rays from the aircraft, along with its state
+
+    The fan is fixed relative to the aircraft's heading and levelled, each ray given by an azimuth from the heading and
+    a depression below the horizon, so the ray directions are precomputed and rotated by the heading each step. The
+    rays of a batch of aircraft are cast through the heightmap's elevation pyramid in one call. Rays that miss the
+    terrain return max_range.
+    """
+
+    FEATURES: List[str] = DynamicObservation.FEATURES
+
+    def __init__(
+        self,
+        env: "AbstractEnv",
+        azimuths: List[float] = None,
+        depressions: List[float] = None,
+        look_down: bool = True,
+        max_range: float = 5000.0,
+        features: List[str] = None,
+        **kwargs: dict
+    ) -> None:
+        """
+        :param env: the environment
+        :param azimuths: ray azimuths from the heading, positive to the right [rad]
+        :param depressions: ray depressions below the horizon, positive down [rad], each cast at every azimuth
+        :param look_down: if True a ray straight down is added
+        :param max_range: range of the rays [m]
+        :param features: features of the state vector
+        """
+        super().__init__(env)
+        azimuths = (
+            np.radians(np.linspace(-60.0, 60.0, 9)) if azimuths is None else azimuths
+        )
+        depressions = (
+            np.radians([5.0, 15.0, 45.0]) if depressions is None else depressions
+        )
+        self.max_range = max_range
+        self.features = features or self.FEATURES
+
+        azimuth, depression = (
+            grid.ravel() for grid in np.meshgrid(azimuths, depressions, indexing="ij")
+        )
+        directions = np.stack(
+            [
+                np.cos(depression) * np.cos(azimuth),
+                np.cos(depression) * np.sin(azimuth),
+                np.sin(depression),
+            ],
+            axis=-1,
+        )
+        if look_down:
+            directions = np.concatenate([directions, [[0.0, 0.0, 1.0]]])
+        self.directions = directions
+
+    def space(self) -> spaces.Space:
+        return spaces.Dict(
+            dict(
+                observation=spaces.Box(
+                    -np.inf, np.inf, shape=(len(self.features),), dtype=np.float32
+                ),
+                ranges=spaces.Box(
+                    0.0,
+                    self.max_range,
+                    shape=(len(self.directions),),
+                    dtype=np.float32,
+                ),
+            )
+        )
+
+    def ranges(self, position: np.ndarray, heading: np.ndarray) -> np.ndarray:
+        """
+        Ranges to the terrain of a batch of aircraft
+
+        :param position: (N, 3) NED positions [m]
+        :param heading: (N,) headings [rad]
+        :return: (N, rays) ranges [m]
+        """
+        position = np.asarray(position, dtype=float)
+        c, s = np.cos(heading)[:, None], np.sin(heading)[:, None]
+        d = self.directions
+        directions = np.stack(
+            [
+                c * d[:, 0] - s * d[:, 1],
+                s * d[:, 0] + c * d[:, 1],
+                np.broadcast_to(d[:, 2], c.shape[:1] + d[:, 2].shape),
+            ],
+            axis=-1,
+        )
+        origins = np.repeat(position, len(d), axis=0)
+        distances = self.env.heightmap.raycast(
+            origins, directions.reshape(-1, 3), self.max_range
+        )
+        distances = np.minimum(distances, self.max_range)
+        return distances.reshape(len(position), len(d)).astype(np.float32)
+
+    def observe(self) -> Dict[str, np.ndarray]:
+        state = self.observer_vehicle.dict
+        position = np.array([[state["x"], state["y"], state["z"]]])
+        return OrderedDict(
+            [
+                (
+                    "observation",
+                    np.array([state[f] for f in self.features], dtype=np.float32),
+                ),
+                ("ranges", self.ranges(position, np.array([state["yaw"]]))[0]),
+            ]
+        )
+
+
+class LandingSiteObservation(ObservationType):
+    """
+    Observe the best forced landing sites within glide range, along with the aircraft's state
+
+    The glide range is the aircraft's height above the terrain beneath it times glide_ratio, and the k best sites
+    within it are looked up in the world's landing site index. Each site is given by its position ahead of and to the
+    right of the aircraft, its height relative to the aircraft and its score. Rows of missing sites are zero.
+    """
+
+    FEATURES: List[str] = DynamicObservation.FEATURES
+    SITE_FEATURES: List[str] = ["forward", "right", "height", "score"]
+
+    def __init__(
+        self,
+        env: "AbstractEnv",
+        sites_count: int = 4,
+        glide_ratio: float = 10.0,
+        features: List[str] = None,
+        **kwargs: dict
+    ) -> None:
+        """
+        :param env: the environment
+        :param sites_count: number of sites observed
+        :param glide_ratio: distance flown per unit of height lost in a glide
+        :param features: features of the state vector
+        """
+        super().__init__(env)
+        self.sites_count = sites_count
+        self.glide_ratio = glide_ratio
+        self.features = features or self.FEATURES
+
+    def space(self) -> spaces.Space:
+        return spaces.Dict(
+            dict(
+                observation=spaces.Box(
+                    -np.inf, np.inf, shape=(len(self.features),), dtype=np.float32
+                ),
+                sites=spaces.Box(
+                    -np.inf,
+                    np.inf,
+                    shape=(self.sites_count, len(self.SITE_FEATURES)),
+                    dtype=np.float32,
+                ),
+            )
+        )
+
+    def sites(self, position: np.ndarray, heading: np.ndarray) -> np.ndarray:
+        """
+        Landing sites within glide range of a batch of aircraft
+
+        :param position: (N, 3) NED positions [m]
+        :param heading: (N,) headings [rad]
+        :return: (N, sites_count, 4) site features
+        """
+        position = np.asarray(position, dtype=float)
+        landing_sites = self.env.landing_sites
+        ground = self.env.heightmap.height(position[:, 0], position[:, 1])
+        radius = self.glide_ratio * np.maximum(-position[:, 2] - ground, 0.0)
+        indices, _ = landing_sites.query(position[:, :2], radius, self.sites_count)
+        found = indices >= 0
+        indices = np.where(found, indices, 0)
+
+        c, s = np.cos(heading)[:, None], np.sin(heading)[:, None]
+        delta = landing_sites.positions[indices] - position[:, None, :2]
+        result = np.stack(
+            [
+                c * delta[..., 0] + s * delta[..., 1],
+                -s * delta[..., 0] + c * delta[..., 1],
+                landing_sites.elevations[indices] + position[:, 2:3],
+                landing_sites.scores[indices],
+            ],
+            axis=-1,
+        )
+        return np.where(found[..., None], result, 0.0).astype(np.float32)
+
+    def observe(self) -> Dict[str, np.ndarray]:
+        state = self.observer_vehicle.dict
+        position = np.array([[state["x"], state["y"], state["z"]]])
+        return OrderedDict(
+            [
+                (
+                    "observation",
+                    np.array([state[f] for f in self.features], dtype=np.float32),
+                ),
+                ("sites", self.sites(position, np.array([state["yaw"]]))[0]),
+            ]
+        )
+
+
+class ApproachObservation(ObservationType):
+    """
+    Observe the aircraft's approach to the runway, along with its state
+
+    The guidance features are the along-track and cross-track distances from the runway threshold, the height above
+    the runway, the height above the glideslope and the heading error, all evaluated in the runway's local frame
+    fixed at reset. With several runways the approach can be to the runway nearest the aircraft.
+    """
+
+    FEATURES: List[str] = DynamicObservation.FEATURES
+    APPROACH_FEATURES: List[str] = [
+        "along_track",
+        "cross_track",
+        "height",
+        "glideslope_deviation",
+        "heading_error",
+    ]
+
+    def __init__(
+        self,
+        env: "AbstractEnv",
+        nearest: bool = False,
+        features: List[str] = None,
+        **kwargs: dict
+    ) -> None:
+        """
+        :param env: the environment, with a runway
+        :param nearest: if True the approach is to the nearest of the environment's runways, otherwise to its runway
+        :param features: features of the state vector
+        """
+        super().__init__(env)
+        self.nearest = nearest
+        self.features = features or self.FEATURES
+
+    def space(self) -> spaces.Space:
+        return spaces.Dict(
+            dict(
+                observation=spaces.Box(
+                    -np.inf, np.inf, shape=(len(self.features),), dtype=np.float32
+                ),
+                approach=spaces.Box(
+                    -np.inf,
+                    np.inf,
+                    shape=(len(self.APPROACH_FEATURES),),
+                    dtype=np.float32,
+                ),
+            )
+        )
+
+    def observe(self) -> Dict[str, np.ndarray]:
+        state = self.observer_vehicle.dict
+        position = np.array([[state["x"], state["y"], state["z"]]])
+        runway = self.env.runway
+        if self.nearest:
+            indices, _ = self.env.runways.nearest(position)
+            runway = self.env.runways[indices[0, 0]]
+        approach = runway.approach(position, np.array([state["yaw"]]))
+        return OrderedDict(
+            [
+                (
+                    "observation",
+                    np.array([state[f] for f in self.features], dtype=np.float32),
+                ),
+                ("approach", approach[0].astype(np.float32)),
+            ]
+        )
+
+
+class ObstacleObservation(ObservationType):
+    """
+    Observe the signed distance to the nearest obstacle or no-fly zone and the direction away from it, along with the
+    aircraft's state
+
+    Distances are looked up in the environment's obstacle map, so the cost of an observation does not depend on the
+    number of obstacles. The gradient of the distance is rotated into the aircraft's heading frame, forward, right and
+    down.
+    """
+
+    FEATURES: List[str] = DynamicObservation.FEATURES
+
+    def __init__(
+        self,
+        env: "AbstractEnv",
+        max_distance: float = 5000.0,
+        features: List[str] = None,
+        **kwargs: dict
+    ) -> None:
+        """
+        :param env: the environment
+        :param max_distance: distance the observed distance is clipped to [m]
+        :param features: features of the state vector
+        """
+        super().__init__(env)
+        self.max_distance = max_distance
+        self.features = features or self.FEATURES
+
+    def space(self) -> spaces.Space:
+        return spaces.Dict(
+            dict(
+                observation=spaces.Box(
+                    -np.inf, np.inf, shape=(len(self.features),), dtype=np.float32
+                ),
+                obstacle=spaces.Box(
+                    np.array([-self.max_distance, -1.0, -1.0, -1.0]),
+                    np.array([self.max_distance, 1.0, 1.0, 1.0]),
+                    dtype=np.float32,
+                ),
+            )
+        )
+
+    def obstacles(self, position: np.ndarray, heading: np.ndarray) -> np.ndarray:
+        """
+        Distance and direction away from the nearest obstacle of a batch of aircraft
+
+        :param position: (N, 3) NED positions [m]
+        :param heading: (N,) headings [rad]
+        :return: (N, 4) signed distance [m] and the forward, right and down components of its gradient
+        """
+        obstacle_map = self.env.obstacle_map
+        distance = np.clip(
+            obstacle_map.distance(position), -self.max_distance, self.max_distance
+        )
+        gradient = np.clip(obstacle_map.gradient(position), -1.0, 1.0)
+        c, s = np.cos(heading), np.sin(heading)
+        return np.stack(
+            [
+                distance,
+                c * gradient[:, 0] + s * gradient[:, 1],
+                -s * gradient[:, 0] + c * gradient[:, 1],
+                gradient[:, 2],
+            ],
+            axis=-1,
+        ).astype(np.float32)
+
+    def observe(self) -> Dict[str, np.ndarray]:
+        state = self.observer_vehicle.dict
+        position = np.array([[state["x"], state["y"], state["z"]]])
+        return OrderedDict(
+            [
+                (
+                    "observation",
+                    np.array([state[f] for f in self.features], dtype=np.float32),
+                ),
+                ("obstacle", self.obstacles(position, np.array([state["yaw"]]))[0]),
+            ]
+        )
+
+
 def observation_factory(env: "AbstractEnv", config: dict) -> ObservationType:
     if config["type"] == "Dynamics" or config["type"] == "dynamics":
         return DynamicObservation(env, **config)
@@ -382,5 +916,17 @@ def observation_factory(env: "AbstractEnv", config: dict) -> ObservationType:
         return DynamicGoalObservation(env, **config)
     elif config["type"] == "LateralGoal" or config["type"] == "lateral_goal":
         return LateralGoalObservation(env, **config)
+    elif config["type"] == "Image" or config["type"] == "image":
+        return ImageObservation(env, **config)
+    elif config["type"] == "TerrainPatch" or config["type"] == "terrain_patch":
+        return TerrainPatchObservation(env, **config)
+    elif config["type"] == "TerrainRange" or config["type"] == "terrain_range":
+        return TerrainRangeObservation(env, **config)
+    elif config["type"] == "LandingSites" or config["type"] == "landing_sites":
+        return LandingSiteObservation(env, **config)
+    elif config["type"] == "Approach" or config["type"] == "approach":
+        return ApproachObservation(env, **config)
+    elif config["type"] == "Obstacles" or config["type"] == "obstacles":
+        return ObstacleObservation(env, **config)
     else:
         raise ValueError("Unknown observation type")
@@ -4,7 +4,7 @@ from typing import Dict, Text
 
 import numpy as np
 from gymnasium import Env
-from pyflyer import Aircraft, World
+from pyflyer import World
 
 from flyer_env import utils
 from flyer_env.aircraft import ControlledAircraft
@@ -91,8 +91,10 @@ class FlyerEnv(AbstractEnv, GoalEnv):
         self.world.assets_dir = path
         path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "terrain_data")
         self.world.terrain_data_dir = path
-        world_seed = self.np_random.randint(100)  # set 100 possible seeds by default
-        self.world.create_map(world_seed, area=self.config["area"])
+        self.world_seed = self.np_random.randint(
+            100
+        )  # set 100 possible seeds by default
+        self.world.create_map(self.world_seed, area=self.config["area"])
         self.world.render_type = "aircraft_fixed"
 
     def _create_vehicles(self) -> None:
@@ -102,7 +104,7 @@ class FlyerEnv(AbstractEnv, GoalEnv):
         start_pos = [0.0, 0.0, -1000.0]
         heading = 0.0
         airspeed = 100.0
-        aircraft = Aircraft(data_path=path)
+        aircraft = self._create_aircraft(path)
         aircraft.reset(pos=start_pos, heading=heading, airspeed=airspeed)
         self.world.add_aircraft(aircraft)
 
@@ -113,6 +115,7 @@ class FlyerEnv(AbstractEnv, GoalEnv):
             vehicle = ControlledAircraft(
                 self.world.vehicles[0],
                 dt=1 / self.config["simulation_frequency"],
+                controller=self.config["action"].get("controller", "pid"),
             )
         self.controlled_vehicles.append(vehicle)
 
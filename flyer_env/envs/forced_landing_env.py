@@ -1,10 +1,12 @@
 import os
 from typing import Dict, Text
 
-from pyflyer import Aircraft, World
+import numpy as np
+from pyflyer import World
 
 from flyer_env import utils
 from flyer_env.aircraft import ControlledAircraft
+from flyer_env.aircraft.reachability import glide_footprint
 from flyer_env.envs.common.abstract import AbstractEnv
 from flyer_env.envs.common.action import Action
 
@@ -28,7 +30,13 @@ class ForcedLandingEnv(AbstractEnv):
                 "duration": 500.0,  # simulation duration [s]
                 "collision_reward": -200.0,  # max -ve reward for crashing
                 "landing_reward": 100.0,  # max +ve reward for landing successfully
+                "landing_radius": 250.0,  # distance from a landing site a touchdown is rewarded within [m]
+                "touchdown_height": 2.0,  # height above the ground counted as a touchdown [m]
+                # If True touch down on the Python heightmap below the aircraft, which approximates but is not pyflyer's
+                # terrain, else on sea level
+                "terrain_touchdown": False,
                 "normalize_reward": True,
+                "reachability": False,  # if True, terminate once no landing site is within gliding reach
             }
         )
         return config
@@ -46,6 +54,7 @@ class ForcedLandingEnv(AbstractEnv):
         self.world.assets_dir = path
         path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "terrain_data")
         self.world.terrain_data_dir = path
+        self.world_seed = seed
         self.world.create_map(seed, area=self.config["area"])
         return
 
@@ -55,7 +64,7 @@ class ForcedLandingEnv(AbstractEnv):
         start_pos = [0.0, 0.0, -1000.0]
         heading = 0.0
         airspeed = 100.0
-        aircraft = Aircraft(data_path=path)
+        aircraft = self._create_aircraft(path)
         aircraft.reset(pos=start_pos, heading=heading, airspeed=airspeed)
         self.world.add_aircraft(aircraft)
 
@@ -66,6 +75,7 @@ class ForcedLandingEnv(AbstractEnv):
             vehicle = ControlledAircraft(
                 self.world.vehicles[0],
                 dt=1 / self.config["simulation_frequency"],
+                controller=self.config["action"].get("controller", "pid"),
             )
         self.controlled_vehicles.append(vehicle)
 
@@ -94,9 +104,36 @@ class ForcedLandingEnv(AbstractEnv):
     def _landing_reward(self):
         """
         Reward for successfully landing without crashing
+
+        A touchdown is rewarded by the score of the best landing site within landing_radius of it, falling off
+        linearly with the distance from the site.
+        """
+        if self.vehicle.crashed or not self._touched_down():
+            return 0.0
+        position = self.vehicle.position
+        radius = self.config["landing_radius"]
+        sites = self.landing_sites
+        # Sites are spaced further apart than the landing radius, so only a few can be in range
+        indices, distances = sites.query(np.asarray(position[:2]), radius, k=4)
+        found = indices[0] >= 0
+        if not np.any(found):
+            return 0.0
+        return float(
+            np.max(
+                sites.scores[indices[0, found]] * (1.0 - distances[0, found] / radius)
+            )
+        )
+
+    def _touched_down(self) -> bool:
         """
-        # TODO: Implement reward for succesfully landing in correct location
-        return 0.0
+        Whether the aircraft is within touchdown_height of the ground, the heightmap below it with terrain_touchdown
+        and sea level without
+        """
+        x, y, z = self.vehicle.position
+        ground = 0.0
+        if self.config["terrain_touchdown"]:
+            ground = float(np.asarray(self.heightmap.height([x], [y]))[0])
+        return -z <= ground + self.config["touchdown_height"]
 
     def _crash_reward(self):
         """
@@ -107,16 +144,40 @@ class ForcedLandingEnv(AbstractEnv):
         else:
             return 0.0
 
+    def _reachable_sites(self) -> np.ndarray:
+        """
+        How far inside the aircraft's glide footprint each landing site lies, positive for reachable sites [m]
+        """
+        state = self.vehicle.dict
+        sites = self.landing_sites
+        margin = glide_footprint().margin(
+            np.array([[state["x"], state["y"], state["z"]]]),
+            state["yaw"],
+            np.linalg.norm([state["u"], state["v"], state["w"]]),
+            sites.positions,
+            sites.elevations,
+            None if self.wind_velocity is None else self.wind_velocity[:1],
+        )
+        return margin[0]
+
+    def _info(self, obs, action) -> dict:
+        info = super()._info(obs, action)
+        if self.config["reachability"]:
+            info["reachable_sites"] = int(np.sum(self._reachable_sites() > 0.0))
+        return info
+
     def _is_terminated(self) -> bool:
         """
-        The episode is over if the the ego vehicle crashed, or it hits the ground
+        The episode is over if the the ego vehicle crashed, or it touches down, or with reachability enabled when no
+        landing site is left within gliding reach
         """
 
         # If crashed terminate
         if self.vehicle.crashed:
-            print("Crashed!")
             return True
-        if self.vehicle.position[2] > 0:
+        if self._touched_down():
+            return True
+        if self.config["reachability"] and not np.any(self._reachable_sites() > 0.0):
             return True
         # TODO: Fix Termination
         # # If landed
@@ -2,12 +2,13 @@ import os
 from typing import Dict, Text
 
 import numpy as np
-from pyflyer import Aircraft, World
+from pyflyer import World
 
 from flyer_env import utils
 from flyer_env.aircraft import ControlledAircraft
 from flyer_env.envs.common.abstract import AbstractEnv
 from flyer_env.envs.common.action import Action
+from flyer_env.world.runway import Runway, RunwayIndex
 
 
 class RunwayEnv(AbstractEnv):
@@ -36,6 +37,7 @@ class RunwayEnv(AbstractEnv):
                     "runway_length": 1500.0,
                     "runway_heading": 0.0,
                 },  # trajectory configuration details
+                "runways": None,  # further runways, a number placed at random or a list of runway configurations
             }
         )
         return config
@@ -53,18 +55,41 @@ class RunwayEnv(AbstractEnv):
         self.world.assets_dir = path
         path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "terrain_data")
         self.world.terrain_data_dir = path
-        world_seed = self.np_random.randint(100)  # set 100 possible seeds by default
-        self.world.create_map(world_seed, area=self.config["area"])
+        self.world_seed = self.np_random.randint(
+            100
+        )  # set 100 possible seeds by default
+        self.world.create_map(self.world_seed, area=self.config["area"])
         return
 
     def _create_runway(self) -> None:
-        """Create a runway for the aircraft to land on"""
+        """Create the runways for the aircraft to land on, the runway_configuration first"""
         runway_config = self.config["runway_configuration"]
-        self.world.add_runway(
-            runway_position=runway_config["runway_position"],
-            runway_width=runway_config["runway_width"],
-            runway_heading=runway_config["runway_heading"],
-        )
+        self.runway = Runway.from_config(runway_config)
+
+        runways = self.config["runways"]
+        if runways is None:
+            self.runways = RunwayIndex([self.runway])
+        elif isinstance(runways, int):
+            extent = np.array(self.config["area"]) * self.config["scaling"]
+            self.runways = RunwayIndex.random(
+                self.np_random, runways, extent, runways=[self.runway]
+            )
+        else:
+            self.runways = RunwayIndex(
+                [self.runway] + [Runway.from_config(config) for config in runways]
+            )
+
+        for runway in self.runways:
+            self.world.add_runway(
+                runway_position=runway.position.tolist(),
+                runway_width=runway.width,
+                runway_heading=runway.heading,
+            )
+
+    def _landed(self) -> bool:
+        """Whether the aircraft is on the ground over any runway"""
+        v_pos = np.asarray(self.vehicle.position)
+        return v_pos[-1] > -4 and self.runways.runway_at(v_pos[None, :2])[0] >= 0
 
     def _create_vehicles(self) -> None:
         """Create an aircaft to fly around the world"""
@@ -72,7 +97,7 @@ class RunwayEnv(AbstractEnv):
         start_pos = [0.0, 0.0, -1000.0]
         heading = 0.0
         airspeed = 100.0
-        aircraft = Aircraft(data_path=path)
+        aircraft = self._create_aircraft(path)
         aircraft.reset(pos=start_pos, heading=heading, airspeed=airspeed)
         self.world.add_aircraft(aircraft)
 
@@ -83,6 +108,7 @@ class RunwayEnv(AbstractEnv):
             vehicle = ControlledAircraft(
                 self.world.vehicles[0],
                 dt=1 / self.config["simulation_frequency"],
+                controller=self.config["action"].get("controller", "pid"),
             )
         self.controlled_vehicles.append(vehicle)
 
@@ -112,8 +138,7 @@ class RunwayEnv(AbstractEnv):
         """
         Reward for landing successfully
         """
-        v_pos = self.vehicle.position
-        if v_pos[-1] > -4 and self.world.point_on_runway(v_pos[0:2]):
+        if self._landed():
             return self.config["landing_reward"]
         return 0.0
 
@@ -131,14 +156,12 @@ class RunwayEnv(AbstractEnv):
         The episode is over if the the ego vehicle crashed, or it hits the ground
         """
 
-        v_pos = self.vehicle.position
-
         # If crashed terminate
         if self.vehicle.crashed:
             print("Crashed!")
             return True
         # If landed
-        if v_pos[-1] > -4 and self.world.point_on_runway(v_pos[0:2]):
+        if self._landed():
             print("Landed!")
             return True
         return False
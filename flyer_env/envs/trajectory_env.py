@@ -2,10 +2,11 @@ import os
 from typing import Dict, Text
 
 import numpy as np
-from pyflyer import Aircraft, World
+from pyflyer import World
 
 from flyer_env import utils
 from flyer_env.aircraft import ControlledAircraft
+from flyer_env.aircraft.paths import Path
 from flyer_env.aircraft.trajectory import TrajectoryTarget
 from flyer_env.envs.common.abstract import AbstractEnv
 from flyer_env.envs.common.action import Action
@@ -54,6 +55,7 @@ class TrajectoryEnv(AbstractEnv):
         self.world.assets_dir = path
         path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "terrain_data")
         self.world.terrain_data_dir = path
+        self.world_seed = seed
         self.world.create_map(seed, area=self.config["area"])
         return
 
@@ -64,7 +66,7 @@ class TrajectoryEnv(AbstractEnv):
         start_pos = [0.0, 0.0, -1000.0]
         heading = 0.0
         airspeed = 100.0
-        aircraft = Aircraft(data_path=path)
+        aircraft = self._create_aircraft(path)
         aircraft.reset(pos=start_pos, heading=heading, airspeed=airspeed)
         self.world.add_aircraft(aircraft)
         self.world.render_type = "aircraft"
@@ -76,6 +78,7 @@ class TrajectoryEnv(AbstractEnv):
             vehicle = ControlledAircraft(
                 self.world.vehicles[0],
                 dt=1 / self.config["simulation_frequency"],
+                controller=self.config["action"].get("controller", "pid"),
             )
         self.controlled_vehicles.append(vehicle)
 
@@ -95,19 +98,30 @@ class TrajectoryEnv(AbstractEnv):
 
         start_pos = traj_start_pos(ac_pos, ac_hdg, self.config["start_displacement"])
 
-        self.goal = start_pos
         self.traj_target = TrajectoryTarget(
             speed=v["u"], start_position=start_pos, start_heading=v["yaw"]
         )
-        traj_funcs = {
-            "sl": self.traj_target.straight_and_level,
-            "climb": self.traj_target.climb,
-            "descend": self.traj_target.descend,
-            "lt": self.traj_target.left_turn,
-            "rt": self.traj_target.right_turn,
-        }
-        func = traj_funcs[trajectory_config["name"]]
-        self.traj_func = func(**trajectory_config)
+        # Compile the whole episode up front, the target is then looked up by tick
+        n_steps = (
+            int(np.ceil(self.config["duration"] * self.config["simulation_frequency"]))
+            + 1
+        )
+        if trajectory_config["name"] == "path":
+            # Composite path from the trajectory library, flown at constant speed
+            self.path = Path.from_config(trajectory_config, start_pos, v["yaw"])
+            self.trajectory = self.path.reference(
+                speed=trajectory_config.get("speed", v["u"]),
+                dt=1 / self.config["simulation_frequency"],
+                n_steps=n_steps,
+            )
+        else:
+            self.trajectory = self.traj_target.compile(
+                dt=1 / self.config["simulation_frequency"],
+                n_steps=n_steps,
+                **trajectory_config,
+            )
+        # Updated in place so observations holding a reference to the goal follow the target
+        self.goal = self.trajectory.position(0).copy()
 
     def _reward(self, action: Action) -> float:
         """
@@ -141,11 +155,10 @@ class TrajectoryEnv(AbstractEnv):
         return {"crash_reward": crash_reward, "traj_reward": traj_reward}
 
     def _traj_reward(self) -> float:
-        dt = 1 / self.config["simulation_frequency"]
         # traj_reward = self.config["traj_reward"]
-        t_pos, done = self.traj_target.update(self.traj_func, dt=dt)
-        dist = self.controlled_vehicles[0].goal_dist(t_pos)
-        self.goal = t_pos
+        tick = int(round(self.time * self.config["simulation_frequency"]))
+        self.goal[:] = self.trajectory.position(tick)
+        dist = self.controlled_vehicles[0].goal_dist(self.goal)
         dist = dist - self.config["start_displacement"]
         if np.abs(dist) < 1.0:
             reward = 1.0
@@ -164,9 +177,11 @@ class TrajectoryEnv(AbstractEnv):
 
     def _info(self, obs, action) -> Dict[str, float]:
         """
-        Dictionary for the trajectory target
+        Dictionary of the base information and the trajectory target
         """
-        return {"t_pos": self.goal}
+        info = super()._info(obs, action)
+        info["t_pos"] = self.goal.copy()
+        return info
 
     def _is_terminated(self) -> bool:
         """
@@ -1,4 +1,6 @@
-from typing import List, Sequence, Tuple, Union
+import hashlib
+import inspect
+from typing import Any, Callable, List, Sequence, Tuple, Union
 
 import numpy as np
 
@@ -19,3 +21,33 @@ Interval = Union[
 def lmap(v: float, x: Interval, y: Interval) -> float:
     """Linear map of value v with range x to desired range y."""
     return y[0] + (v - x[0]) * (y[1] - y[0]) / (x[1] - x[0])
+
+
+def defaults(function: Callable) -> Tuple[Tuple[str, Any], ...]:
+    """(name, value) pairs of the default arguments of a function"""
+    return tuple(
+        (name, parameter.default)
+        for name, parameter in inspect.signature(function).parameters.items()
+        if parameter.default is not inspect.Parameter.empty
+    )
+
+
+def cache_digest(*parts: Any) -> str:
+    """
+    Short digest identifying a result cached on disk, so results of other parameters or of older code are not loaded
+
+    :param parts: values the result depends on, such as a format version, model parameters and builder defaults
+    :return: 12 hexadecimal digits
+    """
+
+    def plain(value: Any) -> Any:
+        # Arrays in full and dicts in a fixed order, their reprs are truncated or ordered by insertion
+        if isinstance(value, np.ndarray):
+            return value.tolist()
+        if isinstance(value, dict):
+            return tuple((key, plain(value[key])) for key in sorted(value))
+        if isinstance(value, (list, tuple)):
+            return tuple(plain(item) for item in value)
+        return value
+
+    return hashlib.sha1(repr(plain(parts)).encode()).hexdigest()[:12]
@@ -0,0 +1 @@
+from flyer_env.world.wind import WindModel
@@ -0,0 +1,274 @@
+from collections import OrderedDict
+from typing import Callable, Iterable, Sequence, Tuple
+
+import numpy as np
+
+from flyer_env.world.generator import TerrainGenerator
+from flyer_env.world.terrain import Heightmap
+
+
+def chunk_seed(seed: int, chunk: Tuple[int, int]) -> int:
+    """
+    Deterministic seed of a chunk, derived from the world seed and the chunk's index
+
+    :param seed: world seed
+    :param chunk: (i, j) index of the chunk
+    :return: the chunk's seed
+    """
+    entropy = [seed, chunk[0] % 2**32, chunk[1] % 2**32]
+    return int(np.random.SeedSequence(entropy).generate_state(1)[0])
+
+
+class ChunkedTerrain:
+    """
+    Terrain of an unbounded world, generated in square chunks around the aircraft on demand
+
+    Chunk (i, j) covers x in [i * chunk_size, (i + 1) * chunk_size) and likewise in y, sampled every resolution on a
+    grid that includes the chunk's far edges, so neighbouring chunks share their border samples and each chunk is
+    interpolated on its own. Elevations are generated by a TerrainGenerator of the world seed, normalised by the
+    noise's fixed range rather than by the extremes of a map, so chunks join seamlessly whichever are generated first.
+    Tile classes are drawn from each chunk's own seed, so they are reproduced whenever the chunk is regenerated.
+
+    Chunks are held in an LRU cache of capacity chunks, the least recently used evicted first, so memory is bounded by
+    the capacity however far the aircraft flies. update keeps the chunks within view of the aircraft loaded and
+    generates the chunks ahead of it before they are needed.
+    """
+
+    def __init__(
+        self,
+        seed: int,
+        chunk_size: float = 4000.0,
+        resolution: float = 100.0,
+        capacity: int = 64,
+        view_distance: float = 5000.0,
+        prefetch: int = 2,
+        amplitude: float = 400.0,
+        wavelength: float = 8000.0,
+        octaves: int = 3,
+        tile_size: float = 25.0,
+    ) -> None:
+        """
+        Create the terrain of a world, no chunks are generated until they are used
+
+        :param seed: world seed
+        :param chunk_size: size of a chunk [m], a multiple of resolution
+        :param resolution: grid spacing [m]
+        :param capacity: number of chunks held in memory
+        :param view_distance: distance around the aircraft kept loaded by update [m]
+        :param prefetch: number of chunks ahead of the aircraft generated by update
+        :param amplitude: elevation of the highest peaks above the lowest ground [m]
+        :param wavelength: wavelength of the coarsest octave [m]
+        :param octaves: number of octaves, each of half the wavelength and amplitude of the last
+        :param tile_size: size of a tile, a divisor of chunk_size [m]
+        """
+        self.seed = seed
+        self.chunk_size = float(chunk_size)
+        self.resolution = float(resolution)
+        self.samples = int(round(chunk_size / resolution)) + 1
+        self.capacity = capacity
+        self.view_distance = view_distance
+        self.prefetch = prefetch
+        self.amplitude = amplitude
+        self.wavelength = wavelength
+        self.octaves = octaves
+        self.tile_size = float(tile_size)
+        if (
+            2 * int(np.ceil(view_distance / chunk_size)) + 1
+        ) ** 2 + prefetch > capacity:
+            raise ValueError("capacity is too small to hold the chunks in view")
+
+        self.generator = TerrainGenerator(seed, amplitude, wavelength, octaves)
+        self.chunks: "OrderedDict[Tuple[int, int], np.ndarray]" = OrderedDict()
+        self.tile_chunks: "OrderedDict[Tuple[int, int], np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._window = (None, None)
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def chunk_seed(self, chunk: Tuple[int, int]) -> int:
+        """Deterministic seed of a chunk, for randomness local to the chunk"""
+        return chunk_seed(self.seed, chunk)
+
+    def generate(self, chunk: Tuple[int, int]) -> np.ndarray:
+        """
+        Generate the elevations of a chunk, without caching them
+
+        :param chunk: (i, j) index of the chunk
+        :return: (samples, samples) elevations [m]
+        """
+        offsets = np.arange(self.samples) * self.resolution
+        x = chunk[0] * self.chunk_size + offsets
+        y = chunk[1] * self.chunk_size + offsets
+        return self.generator.heights(x, y)
+
+    def _cached(
+        self,
+        cache: OrderedDict,
+        chunk: Tuple[int, int],
+        generate: Callable[[Tuple[int, int]], np.ndarray],
+    ) -> np.ndarray:
+        """Get a chunk from an LRU cache, generating it and evicting the least recently used chunk if it is missing"""
+        chunk = (int(chunk[0]), int(chunk[1]))
+        value = cache.get(chunk)
+        if value is not None:
+            self.hits += 1
+            cache.move_to_end(chunk)
+            return value
+        self.misses += 1
+        value = generate(chunk)
+        cache[chunk] = value
+        if len(cache) > self.capacity:
+            cache.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def chunk(self, chunk: Tuple[int, int]) -> np.ndarray:
+        """
+        Get the elevations of a chunk from the cache, generating it and evicting the least recently used chunk if it
+        is missing
+
+        :param chunk: (i, j) index of the chunk
+        :return: (samples, samples) elevations [m]
+        """
+        return self._cached(self.chunks, chunk, self.generate)
+
+    def tiles(self, chunk: Tuple[int, int], tile_names: Sequence[str]) -> np.ndarray:
+        """
+        Get the tile classes of a chunk from their own LRU cache, drawing them from the chunk's seed if they are missing
+
+        :param chunk: (i, j) index of the chunk
+        :param tile_names: names of the tiles, the classes index into them
+        :return: (tiles, tiles) indices into tile_names, tile (0, 0) in the chunk's south-west corner
+        """
+
+        def generate(chunk: Tuple[int, int]) -> np.ndarray:
+            centres = (
+                np.arange(round(self.chunk_size / self.tile_size)) + 0.5
+            ) * self.tile_size
+            return self.generator.tiles(
+                chunk[0] * self.chunk_size + centres,
+                chunk[1] * self.chunk_size + centres,
+                tile_names,
+                self.chunk_seed(chunk),
+            )
+
+        return self._cached(self.tile_chunks, chunk, generate)
+
+    def load(self, chunks: Iterable[Tuple[int, int]]) -> None:
+        """Ensure chunks are cached, marking them as recently used"""
+        for chunk in chunks:
+            self.chunk(chunk)
+
+    def index(self, x, y) -> Tuple[np.ndarray, np.ndarray]:
+        """(N,) (i, j) indices of the chunks containing positions"""
+        return (
+            np.floor(np.asarray(x, dtype=float) / self.chunk_size).astype(int),
+            np.floor(np.asarray(y, dtype=float) / self.chunk_size).astype(int),
+        )
+
+    def update(self, position: np.ndarray, heading: float) -> None:
+        """
+        Load the chunks within view_distance of an aircraft and prefetch the chunks ahead of it
+
+        The chunks ahead are generated last, so they are the most recently used and the last to be evicted.
+
+        :param position: (2,) or (3,) position of the aircraft [m]
+        :param heading: heading of the aircraft [rad]
+        """
+        i, j = self.index(position[0], position[1])
+        reach = int(np.ceil(self.view_distance / self.chunk_size))
+        offsets = np.arange(-reach, reach + 1)
+        self.load(
+            zip((i + offsets).repeat(len(offsets)), np.tile(j + offsets, len(offsets)))
+        )
+        direction = np.array([np.cos(heading), np.sin(heading)])
+        ahead = (
+            np.asarray(position[:2], dtype=float)
+            + (self.view_distance + self.chunk_size * np.arange(1, self.prefetch + 1))[
+                :, None
+            ]
+            * direction
+        )
+        self.load(zip(*self.index(ahead[:, 0], ahead[:, 1])))
+
+    def height(self, x, y) -> np.ndarray:
+        """
+        Interpolate the elevation bilinearly, generating the chunks the positions lie in if they are missing
+
+        :param x: (N,) north positions [m]
+        :param y: (N,) east positions [m]
+        :return: (N,) elevations [m]
+        """
+        x, y = np.broadcast_arrays(
+            np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        )
+        i, j = self.index(x, y)
+        chunks, inverse = np.unique(
+            np.stack([i.ravel(), j.ravel()], axis=-1), axis=0, return_inverse=True
+        )
+        inverse = inverse.ravel()
+        h = np.stack([self.chunk(chunk) for chunk in chunks])
+        # Position within each chunk in grid units
+        u = (x.ravel() - i.ravel() * self.chunk_size) / self.resolution
+        v = (y.ravel() - j.ravel() * self.chunk_size) / self.resolution
+        lu = np.minimum(u.astype(int), self.samples - 2)
+        lv = np.minimum(v.astype(int), self.samples - 2)
+        wu, wv = u - lu, v - lv
+        heights = (1.0 - wu) * (
+            (1.0 - wv) * h[inverse, lu, lv] + wv * h[inverse, lu, lv + 1]
+        ) + wu * ((1.0 - wv) * h[inverse, lu + 1, lv] + wv * h[inverse, lu + 1, lv + 1])
+        return heights.reshape(x.shape)
+
+    def window(self, lower: np.ndarray, upper: np.ndarray) -> Heightmap:
+        """
+        Stitch the chunks covering a rectangle into a heightmap
+
+        The last window is kept, so repeated calls over the same chunks, such as ray casts each step, reuse it and its
+        elevation pyramid.
+
+        :param lower: (2,) (x, y) south-west corner of the rectangle [m]
+        :param upper: (2,) (x, y) north-east corner of the rectangle [m]
+        :return: the heightmap of the chunks
+        """
+        (i0, j0), (i1, j1) = self.index(*lower), self.index(*upper)
+        key = (int(i0), int(j0), int(i1), int(j1))
+        if self._window[0] != key:
+            n = self.samples - 1
+            heights = np.zeros(
+                ((i1 - i0 + 1) * n + 1, (j1 - j0 + 1) * n + 1), np.float32
+            )
+            for i in range(i0, i1 + 1):
+                for j in range(j0, j1 + 1):
+                    heights[
+                        (i - i0) * n : (i - i0 + 1) * n + 1,
+                        (j - j0) * n : (j - j0 + 1) * n + 1,
+                    ] = self.chunk((i, j))
+            origin = (i0 * self.chunk_size, j0 * self.chunk_size)
+            self._window = (key, Heightmap(heights, origin, self.resolution))
+        return self._window[1]
+
+    def raycast(
+        self,
+        origins: np.ndarray,
+        directions: np.ndarray,
+        max_range: float = 5000.0,
+        **kwargs,
+    ) -> np.ndarray:
+        """
+        Distance along a batch of rays to the terrain, cast through the window of chunks the rays can reach
+
+        :param origins: (N, 3) NED ray origins [m]
+        :param directions: (N, 3) NED unit ray directions
+        :param max_range: range beyond which rays miss [m]
+        :param kwargs: arguments of Heightmap.raycast
+        :return: (N,) distances to the terrain [m], inf for rays that miss
+        """
+        origins = np.asarray(origins, dtype=float).reshape(-1, 3)
+        window = self.window(
+            origins[:, :2].min(axis=0) - max_range,
+            origins[:, :2].max(axis=0) + max_range,
+        )
+        return window.raycast(origins, directions, max_range, **kwargs)
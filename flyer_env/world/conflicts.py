@@ -0,0 +1,157 @@
+import itertools
+from typing import Tuple
+
+import numpy as np
+
+# Offsets to the cell itself and half of its 26 neighbours, so each pair of neighbouring cells is visited once
+HALF_STENCIL = np.array(
+    [
+        offset
+        for offset in itertools.product((-1, 0, 1), repeat=3)
+        if offset >= (0, 0, 0)
+    ]
+)
+
+
+def candidate_pairs(positions: np.ndarray, cell_size: float) -> np.ndarray:
+    """
+    Broad phase, the pairs of aircraft in the same or neighbouring cells of a uniform grid
+
+    Each aircraft's cell is hashed to a unique integer key and the keys sorted once, so the aircraft in a neighbouring
+    cell are a contiguous run of the sorted keys found by binary search. Every pair closer than cell_size is returned,
+    in O(N log N) for aircraft spread over many cells.
+
+    :param positions: (N, 3) NED positions [m]
+    :param cell_size: size of the cells [m]
+    :return: (P, 2) indices of the pairs, each pair once
+    """
+    positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+    if len(positions) < 2:
+        return np.zeros((0, 2), dtype=int)
+    cells = np.floor(positions / cell_size).astype(np.int64)
+    # Shift the cells so every neighbouring cell is non-negative, then number the cells of the bounding box
+    cells -= cells.min(axis=0) - 1
+    strides = np.cumprod(np.r_[1, cells.max(axis=0)[:0:-1] + 2])[::-1]
+    keys = cells @ strides
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+
+    neighbours = (keys[:, None] + HALF_STENCIL @ strides).ravel()
+    start = np.searchsorted(sorted_keys, neighbours, side="left")
+    counts = np.searchsorted(sorted_keys, neighbours, side="right") - start
+    # Expand each (aircraft, neighbouring cell) into a pair with every aircraft in the cell
+    first = np.repeat(np.arange(len(neighbours)) // len(HALF_STENCIL), counts)
+    runs = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    second = order[np.repeat(start, counts) + runs]
+    same_cell = np.repeat(np.arange(len(neighbours)) % len(HALF_STENCIL) == 0, counts)
+    keep = ~same_cell | (first < second)
+    return np.stack([first[keep], second[keep]], axis=-1)
+
+
+def closest_approach(
+    positions: np.ndarray, velocities: np.ndarray, pairs: np.ndarray, horizon: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Narrow phase, the closest approach of pairs of aircraft flying straight at constant velocity
+
+    :param positions: (N, 3) NED positions [m]
+    :param velocities: (N, 3) NED velocities [m/s]
+    :param pairs: (P, 2) indices of the pairs
+    :param horizon: length of the interval swept from the current positions [s]
+    :return: the (P,) times of closest approach, negative once the aircraft are separating [s], and the (P,) least
+        distances between each pair within the interval [m]
+    """
+    positions = np.asarray(positions, dtype=float)
+    velocities = np.asarray(velocities, dtype=float)
+    offset = positions[pairs[:, 1]] - positions[pairs[:, 0]]
+    closing = velocities[pairs[:, 1]] - velocities[pairs[:, 0]]
+    speed2 = np.einsum("ij,ij->i", closing, closing)
+    times = np.divide(
+        -np.einsum("ij,ij->i", offset, closing),
+        speed2,
+        out=np.zeros(len(pairs)),
+        where=speed2 > 0.0,
+    )
+    sweep = np.clip(times, 0.0, horizon)
+    distances = np.linalg.norm(offset + closing * sweep[:, None], axis=-1)
+    return times, distances
+
+
+class Conflicts:
+    """
+    Losses of separation between aircraft over an interval, found by sweeping spheres around every aircraft
+
+    Each aircraft is a sphere moving in a straight line over the interval. A spatial hash finds the candidate pairs
+    whose spheres could come within the separation distance, then the closest approach of every candidate is solved in
+    closed form in one vectorized pass. A conflict is a pair coming within the separation distance during the
+    interval, a collision a pair whose spheres of collision_radius touch.
+    """
+
+    def __init__(
+        self,
+        pairs: np.ndarray,
+        times: np.ndarray,
+        distances: np.ndarray,
+        collisions: np.ndarray,
+    ) -> None:
+        """
+        Create the conflicts
+
+        :param pairs: (C, 2) indices of the aircraft in conflict, the lower index first
+        :param times: (C,) times of closest approach [s]
+        :param distances: (C,) least distances within the interval [m]
+        :param collisions: (C,) True for the conflicts that are collisions
+        """
+        self.pairs = pairs
+        self.times = times
+        self.distances = distances
+        self.collisions = collisions
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    @classmethod
+    def detect(
+        cls,
+        positions: np.ndarray,
+        velocities: np.ndarray,
+        horizon: float,
+        separation: float = 150.0,
+        collision_radius: float = 10.0,
+    ) -> "Conflicts":
+        """
+        Find the conflicts between a batch of aircraft
+
+        :param positions: (N, 3) NED positions at the start of the interval [m]
+        :param velocities: (N, 3) NED velocities over the interval [m/s]
+        :param horizon: length of the interval, a simulation tick or a look-ahead time [s]
+        :param separation: least acceptable distance between aircraft [m]
+        :param collision_radius: radius of the sphere around each aircraft [m]
+        :return: the conflicts, ordered by pair
+        """
+        positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        velocities = np.asarray(velocities, dtype=float).reshape(-1, 3)
+        reach = 0.0
+        if len(velocities):
+            reach = 2.0 * np.linalg.norm(velocities, axis=-1).max() * horizon
+        pairs = candidate_pairs(positions, separation + reach)
+        times, distances = closest_approach(positions, velocities, pairs, horizon)
+        conflict = distances < separation
+        pairs = np.sort(pairs[conflict], axis=1)
+        order = np.lexsort(pairs.T[::-1])
+        return cls(
+            pairs[order],
+            times[conflict][order],
+            distances[conflict][order],
+            distances[conflict][order] < 2.0 * collision_radius,
+        )
+
+    def involving(self, idx: int) -> "Conflicts":
+        """The conflicts of one aircraft"""
+        mask = np.any(self.pairs == idx, axis=1)
+        return Conflicts(
+            self.pairs[mask],
+            self.times[mask],
+            self.distances[mask],
+            self.collisions[mask],
+        )
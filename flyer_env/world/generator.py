@@ -0,0 +1,364 @@
+import functools
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from flyer_env.utils import cache_digest
+from flyer_env.world.terrain import CACHE_DIR, Heightmap, heightmap_digest
+
+# Version of the cached files, bumped when their contents or the way they are built change
+CACHE_VERSION = 2
+
+# Constants of opensimplex's 2D noise
+STRETCH_CONSTANT2 = -0.211324865405187  # (1 / sqrt(2 + 1) - 1) / 2
+SQUISH_CONSTANT2 = 0.366025403784439  # (sqrt(2 + 1) - 1) / 2
+NORM_CONSTANT2 = 47
+# Gradients approximating the directions to the vertices of an octagon from its centre
+GRADIENTS2 = np.array([5, 2, 2, 5, -5, 2, -2, 5, 5, -2, 2, -5, -5, -2, -2, -5])
+
+
+def _lcg(state: int) -> int:
+    """Next state of opensimplex's 64-bit linear congruential generator, wrapped to a signed integer"""
+    state = (state * 6364136223846793005 + 1442695040888963407) & 0xFFFFFFFFFFFFFFFF
+    return state - (1 << 64) if state >= 1 << 63 else state
+
+
+def permutation(seed: int) -> np.ndarray:
+    """
+    Permutation table of a seed, shuffled as opensimplex shuffles it, so simplex2 matches OpenSimplex(seed).noise2
+
+    :param seed: noise seed
+    :return: (256,) permutation of 0 to 255
+    """
+    state = _lcg(_lcg(_lcg(seed)))
+    source = np.arange(256)
+    perm = np.zeros(256, dtype=np.int64)
+    for i in range(255, -1, -1):
+        state = _lcg(state)
+        r = (state + 31) % (i + 1)
+        perm[i] = source[r]
+        source[r] = source[i]
+    return perm
+
+
+def _contribution(perm, xsb, ysb, dx, dy) -> np.ndarray:
+    """Contribution of the lattice vertices (xsb, ysb) at offsets (dx, dy) from them"""
+    attn = 2.0 - dx * dx - dy * dy
+    index = perm[(perm[xsb & 0xFF] + ysb) & 0xFF] & 0x0E
+    gradient = GRADIENTS2[index] * dx + GRADIENTS2[index + 1] * dy
+    return np.where(attn > 0.0, np.square(np.square(attn)) * gradient, 0.0)
+
+
+def simplex2(perm: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    OpenSimplex noise evaluated over arrays of points with array operations
+
+    A port of opensimplex's noise2 in which the branches of each point's simplex become masks over the whole array, so
+    a grid of any shape is evaluated in a handful of NumPy calls rather than a loop over its points. It returns the
+    same values as OpenSimplex(seed).noise2 for the permutation of the seed.
+
+    :param perm: (256,) permutation table of the seed, from permutation
+    :param x: first coordinates, of any shape
+    :param y: second coordinates, broadcast with x
+    :return: noise in [-1, 1], of the broadcast shape of x and y
+    """
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+    # Place the points on the stretched grid and find their rhombus super-cells
+    stretch = (x + y) * STRETCH_CONSTANT2
+    xs, ys = x + stretch, y + stretch
+    xsb, ysb = np.floor(xs), np.floor(ys)
+    squish = (xsb + ysb) * SQUISH_CONSTANT2
+    xins, yins = xs - xsb, ys - ysb
+    in_sum = xins + yins
+    dx0, dy0 = x - (xsb + squish), y - (ysb + squish)
+    xsb, ysb = xsb.astype(np.int64), ysb.astype(np.int64)
+
+    value = _contribution(
+        perm, xsb + 1, ysb, dx0 - 1.0 - SQUISH_CONSTANT2, dy0 - SQUISH_CONSTANT2
+    )
+    value += _contribution(
+        perm, xsb, ysb + 1, dx0 - SQUISH_CONSTANT2, dy0 - 1.0 - SQUISH_CONSTANT2
+    )
+
+    # The extra vertex of each point, in the triangle at (0, 0) or at (1, 1)
+    lower = in_sum <= 1.0
+    right = xins > yins
+    near_lower = lower & ((1.0 - in_sum > xins) | (1.0 - in_sum > yins))
+    near_upper = ~lower & ((2.0 - in_sum < xins) | (2.0 - in_sum < yins))
+    s2 = 2.0 * SQUISH_CONSTANT2
+    cases = [
+        near_lower & right,
+        near_lower & ~right,
+        lower & ~near_lower,
+        near_upper & right,
+        near_upper & ~right,
+    ]
+    xsv = np.select(cases, [xsb + 1, xsb - 1, xsb + 1, xsb + 2, xsb], xsb)
+    ysv = np.select(cases, [ysb - 1, ysb + 1, ysb + 1, ysb, ysb + 2], ysb)
+    dx_ext = np.select(
+        cases, [dx0 - 1.0, dx0 + 1.0, dx0 - 1.0 - s2, dx0 - 2.0 - s2, dx0 - s2], dx0
+    )
+    dy_ext = np.select(
+        cases, [dy0 + 1.0, dy0 - 1.0, dy0 - 1.0 - s2, dy0 - s2, dy0 - 2.0 - s2], dy0
+    )
+
+    # The vertex at (0, 0), or at (1, 1) in the upper triangle
+    shift = np.where(lower, 0, 1)
+    offset = np.where(lower, 0.0, 1.0 + s2)
+    value += _contribution(perm, xsb + shift, ysb + shift, dx0 - offset, dy0 - offset)
+    value += _contribution(perm, xsv, ysv, dx_ext, dy_ext)
+    return value / NORM_CONSTANT2
+
+
+class TerrainGenerator:
+    """
+    Elevations and biomes of a world from layered simplex noise, evaluated over whole grids with array operations
+
+    The octaves of a grid are stacked and evaluated in a single call of simplex2. Elevations are normalised by the
+    noise's fixed range, so any region of the world is generated the same on its own, in chunks or as part of a map.
+    Biomes are classified from the elevation and a second, moisture, noise field, and tile classes drawn within each
+    biome from a seed, so the tiles of a chunk are reproduced from the chunk's seed.
+    """
+
+    BIOMES: List[str] = ["water", "sand", "grass", "forest", "highland"]
+    # Tiles of each biome and their frequencies
+    BIOME_TILES: Dict[str, Dict[str, float]] = {
+        "water": {"water": 1.0},
+        "sand": {"sand": 1.0},
+        "grass": {
+            "grass": 0.5,
+            "normal-grass": 0.3,
+            "2-flowers": 0.1,
+            "4-flowers": 0.05,
+            "8-poppies": 0.05,
+        },
+        "forest": {
+            "forest-grass": 0.45,
+            "tree": 0.35,
+            "forest-leaves": 0.15,
+            "log": 0.05,
+        },
+        "highland": {"light-mud": 0.6, "mud": 0.3, "forest-dirt": 0.1},
+    }
+
+    def __init__(
+        self,
+        seed: int,
+        amplitude: float = 400.0,
+        wavelength: float = 8000.0,
+        octaves: int = 3,
+        sea_level: float = 0.35,
+        beach: float = 0.02,
+        highland: float = 0.65,
+        forest: float = 0.15,
+        moisture_wavelength: float = 6000.0,
+    ) -> None:
+        """
+        Create the generator of a world
+
+        :param seed: world seed
+        :param amplitude: elevation of the highest peaks above the lowest ground [m]
+        :param wavelength: wavelength of the coarsest octave [m]
+        :param octaves: number of octaves, each of half the wavelength and amplitude of the last
+        :param sea_level: fraction of the amplitude below which is water
+        :param beach: fraction of the amplitude above the sea level that is sand
+        :param highland: fraction of the amplitude above which is highland
+        :param forest: moisture, in [-1, 1], above which grassland is forest
+        :param moisture_wavelength: wavelength of the moisture noise [m]
+        """
+        self.seed = seed
+        self.amplitude = amplitude
+        self.wavelength = wavelength
+        self.octaves = octaves
+        self.sea_level = sea_level
+        self.beach = beach
+        self.highland = highland
+        self.forest = forest
+        self.moisture_wavelength = moisture_wavelength
+        self.perm = permutation(seed)
+        moisture_seed = np.random.SeedSequence([seed, 1]).generate_state(1)[0]
+        self.moisture_perm = permutation(int(moisture_seed))
+
+    def octaves_at(self, resolution: Optional[float] = None) -> int:
+        """Number of octaves resolved by a grid, those with at least two samples per wavelength"""
+        if resolution is None:
+            return self.octaves
+        resolvable = int(np.floor(np.log2(self.wavelength / (2.0 * resolution)))) + 1
+        return int(np.clip(resolvable, 1, self.octaves))
+
+    def noise(self, x, y, octaves: Optional[int] = None) -> np.ndarray:
+        """
+        Sum of the octaves of the elevation noise, every octave evaluated in one call
+
+        :param x: north positions, of any shape [m]
+        :param y: east positions, broadcast with x [m]
+        :param octaves: number of octaves summed, defaults to all of them
+        :return: noise, each octave of half the amplitude of the last
+        """
+        octaves = self.octaves if octaves is None else octaves
+        x, y = np.broadcast_arrays(
+            np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        )
+        frequency = (2.0 ** np.arange(octaves) / self.wavelength).reshape(
+            (-1,) + (1,) * x.ndim
+        )
+        weights = 0.5 ** np.arange(octaves)
+        layers = simplex2(self.perm, x * frequency, y * frequency)
+        return np.tensordot(weights, layers, axes=1)
+
+    def heights(
+        self, x: np.ndarray, y: np.ndarray, resolution: Optional[float] = None
+    ) -> np.ndarray:
+        """
+        Elevations over a grid
+
+        :param x: (X,) north positions of the grid's rows [m]
+        :param y: (Y,) east positions of the grid's columns [m]
+        :param resolution: grid spacing, octaves finer than the grid resolves are left out [m]
+        :return: (X, Y) elevations, in [0, amplitude] [m]
+        """
+        octaves = self.octaves_at(resolution)
+        noise = self.noise(np.asarray(x)[:, None], np.asarray(y)[None, :], octaves)
+        norm = 2.0 - 0.5 ** (octaves - 1)
+        return (0.5 * self.amplitude * (noise / norm + 1.0)).astype(np.float32)
+
+    def pyramid(
+        self,
+        origin: Tuple[float, float],
+        extent: Tuple[float, float],
+        resolution: float,
+        levels: int = 4,
+    ) -> List[Heightmap]:
+        """
+        Heightmaps of a rectangle at successively halved resolutions
+
+        Each level is generated from the noise directly, leaving out the octaves it cannot resolve, so the coarse
+        levels of distant terrain cost a fraction of the finest.
+
+        :param origin: (x, y) south-west corner of the rectangle [m]
+        :param extent: (x, y) size of the rectangle [m]
+        :param resolution: grid spacing of the finest level [m]
+        :param levels: number of levels
+        :return: the heightmaps, finest first
+        """
+        pyramid = []
+        for level in range(levels):
+            spacing = resolution * 2**level
+            shape = np.ceil(np.asarray(extent, dtype=float) / spacing).astype(int) + 1
+            x = origin[0] + np.arange(shape[0]) * spacing
+            y = origin[1] + np.arange(shape[1]) * spacing
+            pyramid.append(Heightmap(self.heights(x, y, spacing), origin, spacing))
+        return pyramid
+
+    def moisture(self, x, y) -> np.ndarray:
+        """Moisture noise in [-1, 1] at positions [m]"""
+        frequency = 1.0 / self.moisture_wavelength
+        return simplex2(
+            self.moisture_perm,
+            np.asarray(x, dtype=float) * frequency,
+            np.asarray(y, dtype=float) * frequency,
+        )
+
+    def biomes(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """
+        Biomes over a grid
+
+        :param x: (X,) north positions of the grid's rows [m]
+        :param y: (Y,) east positions of the grid's columns [m]
+        :return: (X, Y) indices into BIOMES
+        """
+        elevation = self.heights(x, y) / self.amplitude
+        moisture = self.moisture(np.asarray(x)[:, None], np.asarray(y)[None, :])
+        return np.select(
+            [
+                elevation < self.sea_level,
+                elevation < self.sea_level + self.beach,
+                elevation > self.highland,
+                moisture > self.forest,
+            ],
+            [0, 1, 4, 3],
+            2,
+        )
+
+    def tiles(
+        self,
+        x: np.ndarray,
+        y: np.ndarray,
+        tile_names: Sequence[str],
+        seed: int,
+    ) -> np.ndarray:
+        """
+        Tile classes over a grid of tile centres, drawn within each tile's biome
+
+        :param x: (X,) north positions of the tile centres [m]
+        :param y: (Y,) east positions of the tile centres [m]
+        :param tile_names: names of the tiles, the returned classes index into them
+        :param seed: seed of the draw, e.g. the chunk's seed
+        :return: (X, Y) uint8 indices into tile_names
+        """
+        biomes = self.biomes(x, y)
+        draw = np.random.default_rng(seed).uniform(size=biomes.shape)
+        tiles = np.zeros(biomes.shape, dtype=np.uint8)
+        for idx, biome in enumerate(self.BIOMES):
+            names = list(self.BIOME_TILES[biome])
+            cumulative = np.cumsum(list(self.BIOME_TILES[biome].values()))
+            choice = np.minimum(
+                np.searchsorted(cumulative / cumulative[-1], draw, side="right"),
+                len(names) - 1,
+            )
+            classes = np.array(
+                [list(tile_names).index(name) for name in names], dtype=np.uint8
+            )
+            tiles = np.where(biomes == idx, classes[choice], tiles)
+        return tiles
+
+
+def tile_map_digest(tile_names: Tuple[str, ...]) -> str:
+    """Digest of the way tile maps are drawn, naming the cached tile maps and the results built from them"""
+    return cache_digest(
+        CACHE_VERSION,
+        heightmap_digest(),
+        TerrainGenerator.BIOMES,
+        TerrainGenerator.BIOME_TILES,
+        tile_names,
+    )
+
+
+@functools.lru_cache(maxsize=16)
+def tile_map(
+    seed: int,
+    area: Tuple[int, int],
+    tile_size: float,
+    tile_names: Tuple[str, ...],
+    cache_dir: Optional[str] = CACHE_DIR,
+) -> np.ndarray:
+    """
+    Get the tile classes of a world's map, drawn within the biomes of its terrain from the world seed and cached on
+    disk alongside the heightmap
+
+    :param seed: world seed
+    :param area: (x, y) size of the map [tiles], the map is centred on the origin
+    :param tile_size: size of a tile [m]
+    :param tile_names: names of the tiles, the classes index into them
+    :param cache_dir: directory tile maps are cached in, if None tile maps are not stored
+    :return: (x, y) uint8 indices into tile_names, tile (0, 0) in the map's south-west corner
+    """
+    path = None
+    if cache_dir is not None:
+        digest = tile_map_digest(tile_names)
+        name = f"tiles_{seed}_{area[0]}x{area[1]}_{tile_size}_{digest}.npy"
+        path = os.path.join(cache_dir, name)
+        if os.path.exists(path):
+            return np.load(path)
+
+    x, y = ((np.arange(count) + 0.5 - 0.5 * count) * tile_size for count in area)
+    tiles = TerrainGenerator(seed).tiles(x, y, tile_names, seed)
+
+    if path is not None:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.save(path, tiles)
+        except OSError:
+            pass
+    return tiles
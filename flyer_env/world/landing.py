@@ -0,0 +1,230 @@
+import functools
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import ndimage
+from scipy.spatial import cKDTree
+from skimage.feature import peak_local_max
+
+from flyer_env.utils import cache_digest, defaults
+from flyer_env.world.generator import tile_map, tile_map_digest
+from flyer_env.world.terrain import CACHE_DIR, Heightmap, heightmap, heightmap_digest
+
+# Version of the cached files, bumped when their contents or the way they are built change
+CACHE_VERSION = 1
+
+# Tiles a forced landing should avoid
+OBSTACLE_TILES: List[str] = ["leaves", "tree", "water", "log", "forest-leaves"]
+
+
+def obstacle_mask(
+    tile_map: np.ndarray, tile_names: Sequence[str], obstacles: Sequence[str] = None
+) -> np.ndarray:
+    """
+    Mark the obstacle tiles of a tile map
+
+    :param tile_map: (x, y) array of indices into tile_names
+    :param tile_names: names of the tiles
+    :param obstacles: names of the obstacle tiles, defaults to OBSTACLE_TILES
+    :return: (x, y) boolean mask, True for obstacle tiles
+    """
+    obstacles = OBSTACLE_TILES if obstacles is None else obstacles
+    indices = [idx for idx, name in enumerate(tile_names) if name in obstacles]
+    return np.isin(np.asarray(tile_map), indices)
+
+
+class LandingSites:
+    """
+    Candidate forced landing sites of a world, held in a KD-tree
+
+    Sites are scored once per world from the heightmap, and optionally an obstacle map, so queries during an episode
+    are KD-tree lookups. Sites are stored best first, so the best sites within a radius are those of lowest index.
+    """
+
+    def __init__(
+        self, positions: np.ndarray, elevations: np.ndarray, scores: np.ndarray
+    ) -> None:
+        """
+        Create the landing sites
+
+        :param positions: (S, 2) (x, y) positions of the sites, ordered by decreasing score [m]
+        :param elevations: (S,) elevations of the sites [m]
+        :param scores: (S,) suitability of the sites, in (0, 1]
+        """
+        self.positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        self.elevations = np.asarray(elevations, dtype=float)
+        self.scores = np.asarray(scores, dtype=float)
+        self.tree = cKDTree(self.positions)
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    @classmethod
+    def build(
+        cls,
+        terrain: Heightmap,
+        obstacles: Optional[np.ndarray] = None,
+        tile_size: float = 25.0,
+        length: float = 500.0,
+        max_slope: float = 0.1,
+        max_roughness: float = 5.0,
+        max_obstacles: float = 0.2,
+        min_score: float = 0.25,
+        spacing: float = 1000.0,
+    ) -> "LandingSites":
+        """
+        Score the terrain and pick the best local sites
+
+        Each grid point of the heightmap is scored on a window of about length across it by the steepest slope, the
+        roughness, the standard deviation of the terrain about its local mean, and the fraction of obstacle tiles. Each
+        term is normalised by its limit and the score is one minus the largest, so a site exceeding any limit scores
+        zero. Sites are the local maxima of the score at least spacing apart that score above min_score.
+
+        :param terrain: heightmap of the world
+        :param obstacles: (x, y) obstacle mask of the tile map, tile (0, 0) in the south-west corner of the heightmap
+        :param tile_size: size of a tile [m]
+        :param length: length of the ground a landing needs [m]
+        :param max_slope: largest acceptable slope
+        :param max_roughness: largest acceptable roughness [m]
+        :param max_obstacles: largest acceptable fraction of obstacle tiles
+        :param min_score: lowest score of a site
+        :param spacing: minimum distance between sites [m]
+        :return: the landing sites
+        """
+        h = terrain.heights.astype(float)
+        window = max(int(round(length / terrain.resolution)), 1) + 1
+        dx, dy = terrain.gradient()
+        slope = ndimage.maximum_filter(np.hypot(dx, dy), size=window)
+        residual = h - ndimage.uniform_filter(h, size=window, mode="nearest")
+        roughness = np.sqrt(
+            ndimage.uniform_filter(np.square(residual), size=window, mode="nearest")
+        )
+        cost = np.maximum(slope / max_slope, roughness / max_roughness)
+
+        if obstacles is not None:
+            obstacles = np.asarray(obstacles, dtype=float)
+            density = ndimage.uniform_filter(
+                obstacles,
+                size=max(int(round(length / tile_size)), 1),
+                mode="nearest",
+            )
+            # Sample the density at the heightmap's grid points
+            x = terrain.origin[0] + np.arange(h.shape[0]) * terrain.resolution
+            y = terrain.origin[1] + np.arange(h.shape[1]) * terrain.resolution
+            extent = np.array(obstacles.shape) * tile_size
+            ix = np.clip(((x + 0.5 * extent[0]) / tile_size).astype(int), 0, None)
+            iy = np.clip(((y + 0.5 * extent[1]) / tile_size).astype(int), 0, None)
+            ix = np.minimum(ix, obstacles.shape[0] - 1)
+            iy = np.minimum(iy, obstacles.shape[1] - 1)
+            cost = np.maximum(cost, density[np.ix_(ix, iy)] / max_obstacles)
+
+        score = np.clip(1.0 - cost, 0.0, 1.0)
+        peaks = peak_local_max(
+            score,
+            min_distance=max(int(round(0.5 * spacing / terrain.resolution)), 1),
+            threshold_abs=min_score,
+            exclude_border=False,
+        )
+        peaks = peaks[np.argsort(-score[peaks[:, 0], peaks[:, 1]], kind="stable")]
+        positions = terrain.origin + peaks * terrain.resolution
+        return cls(
+            positions,
+            h[peaks[:, 0], peaks[:, 1]],
+            score[peaks[:, 0], peaks[:, 1]],
+        )
+
+    def save(self, path: str) -> None:
+        """Save the sites to an .npz file"""
+        np.savez(
+            path,
+            positions=self.positions,
+            elevations=self.elevations,
+            scores=self.scores,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "LandingSites":
+        """Load sites saved with save"""
+        with np.load(path) as data:
+            return cls(data["positions"], data["elevations"], data["scores"])
+
+    def query(self, position, radius, k: int = 4) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The k best sites within a radius of each of a batch of positions
+
+        :param position: (N, 2) (x, y) positions [m]
+        :param radius: (N,) search radii, e.g. the glide ranges [m]
+        :param k: number of sites
+        :return: the (N, k) indices of the sites, best first, and their (N, k) distances [m], padded with -1 and inf
+            when fewer than k sites are in range
+        """
+        position = np.asarray(position, dtype=float).reshape(-1, 2)
+        radius = np.broadcast_to(np.asarray(radius, dtype=float), len(position))
+        indices = np.full((len(position), k), -1, dtype=int)
+        distances = np.full((len(position), k), np.inf)
+        if len(self) == 0:
+            return indices, distances
+        for idx, sites in enumerate(
+            self.tree.query_ball_point(position, np.maximum(radius, 0.0))
+        ):
+            best = np.sort(np.asarray(sites, dtype=int))[:k]
+            indices[idx, : len(best)] = best
+            distances[idx, : len(best)] = np.hypot(
+                *(self.positions[best] - position[idx]).T
+            )
+        return indices, distances
+
+
+@functools.lru_cache(maxsize=16)
+def landing_sites(
+    seed: int,
+    area: Tuple[int, int] = (1024, 1024),
+    tile_size: float = 25.0,
+    cache_dir: Optional[str] = CACHE_DIR,
+    tile_names: Optional[Tuple[str, ...]] = None,
+) -> LandingSites:
+    """
+    Get the landing sites of a world, caching them on disk alongside the heightmap
+
+    Sites are scored on the terrain, and with tile_names on the obstacle tiles of the world's tile map too. Cached
+    files are named by a digest of the heightmap's and tile map's generation and the scoring defaults, so sites scored
+    differently are rebuilt rather than loaded stale.
+
+    :param seed: world seed
+    :param area: (x, y) size of the map [tiles]
+    :param tile_size: size of a tile [m]
+    :param cache_dir: directory sites are cached in, if None sites are not stored
+    :param tile_names: names of the tiles of the tile map, if None sites are scored on the terrain alone
+    :return: the landing sites
+    """
+    path = None
+    if cache_dir is not None:
+        digest = cache_digest(
+            CACHE_VERSION,
+            heightmap_digest(),
+            defaults(LandingSites.build),
+            None if tile_names is None else tile_map_digest(tile_names),
+        )
+        path = os.path.join(
+            cache_dir, f"landing_{seed}_{area[0]}x{area[1]}_{tile_size}_{digest}.npz"
+        )
+        if os.path.exists(path):
+            return LandingSites.load(path)
+
+    obstacles = None
+    if tile_names is not None:
+        obstacles = obstacle_mask(
+            tile_map(seed, area, tile_size, tile_names, cache_dir), tile_names
+        )
+    sites = LandingSites.build(
+        heightmap(seed, area, tile_size, cache_dir), obstacles, tile_size
+    )
+
+    if path is not None:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            sites.save(path)
+        except OSError:
+            pass
+    return sites
@@ -0,0 +1,63 @@
+from typing import Optional, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+class NeighbourIndex:
+    """
+    Spatial index of the positions of every aircraft in the world, rebuilt each tick
+
+    Building the KD-tree takes O(N log N), and each k-nearest-neighbour query O(k log N), so the neighbours of every
+    aircraft and all pairs within a separation distance are found in O(N log N) rather than by comparing every pair.
+    Rebuilding the tree in one call is cheaper than moving single aircraft through it.
+    """
+
+    def __init__(self) -> None:
+        self.positions = np.zeros((0, 3))
+        self.tree = cKDTree(self.positions)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def update(self, positions: np.ndarray) -> None:
+        """
+        Rebuild the index on the current positions
+
+        :param positions: (N, 3) NED positions [m]
+        """
+        self.positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        self.tree = cKDTree(self.positions)
+
+    def neighbours(
+        self, k: int, indices: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The k nearest other aircraft of each of a set of aircraft
+
+        :param k: number of neighbours
+        :param indices: (M,) aircraft whose neighbours are found, defaults to every aircraft
+        :return: the (M, k) indices of the neighbours, nearest first, and their (M, k) distances [m], padded with -1
+            and inf when there are fewer than k other aircraft
+        """
+        indices = np.arange(len(self)) if indices is None else np.asarray(indices)
+        # Each query finds the aircraft itself, which is not always first when aircraft coincide
+        distances, neighbours = self.tree.query(self.positions[indices], k=k + 1)
+        distances = distances.reshape(len(indices), k + 1)
+        neighbours = neighbours.reshape(len(indices), k + 1)
+        own = neighbours == indices[:, None]
+        own[:, -1] |= ~own.any(axis=1)
+        keep = np.argsort(own, axis=1, kind="stable")[:, :k]
+        distances = np.take_along_axis(distances, keep, axis=1)
+        neighbours = np.take_along_axis(neighbours, keep, axis=1)
+        missing = neighbours >= len(self)
+        return np.where(missing, -1, neighbours), distances
+
+    def pairs(self, radius: float) -> np.ndarray:
+        """
+        Every pair of aircraft closer than a radius
+
+        :param radius: separation distance [m]
+        :return: (P, 2) indices of the pairs, the lower index first
+        """
+        return self.tree.query_pairs(radius, output_type="ndarray").reshape(-1, 2)
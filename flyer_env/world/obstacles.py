@@ -0,0 +1,256 @@
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import ndimage
+from skimage.draw import polygon2mask
+
+from flyer_env.world.terrain import Heightmap
+
+
+class ObstacleMap:
+    """
+    Signed distance to the obstacles and no-fly zones of a world, rasterised once per world
+
+    Every obstacle is a horizontal footprint, a cylinder's disc or a polygon, extruded over an altitude band between a
+    floor and a ceiling. Obstacles sharing a band are rasterised together onto one grid and its horizontal signed
+    distance field computed with a Euclidean distance transform. A query interpolates each band's field bilinearly and
+    combines it with the vertical distance to the band, so its cost grows with the number of distinct bands and not
+    with the number of obstacles. Distances are positive outside the obstacles and negative inside.
+
+    A band is either between altitudes or, for obstacles standing on the terrain such as the obstacle tiles, between
+    heights above the ground, whose elevation is held on the same grid.
+
+    Row i and column j of each field is at x = origin[0] + i * resolution, y = origin[1] + j * resolution, positions
+    off the grid are clamped to its edges.
+    """
+
+    def __init__(
+        self,
+        distances: np.ndarray,
+        bands: np.ndarray,
+        origin: Tuple[float, float],
+        resolution: float,
+        relative: Optional[np.ndarray] = None,
+        ground: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Create an obstacle map
+
+        :param distances: (B, X, Y) horizontal signed distances to the footprints of each band [m]
+        :param bands: (B, 2) floor and ceiling altitudes of each band, or heights above the ground if relative [m]
+        :param origin: (x, y) position of distances[:, 0, 0] [m]
+        :param resolution: grid spacing [m]
+        :param relative: (B,) True for the bands above the ground, defaults to none
+        :param ground: (X, Y) elevation of the ground, defaults to sea level [m]
+        """
+        self.distances = np.asarray(distances, dtype=np.float32)
+        self.bands = np.asarray(bands, dtype=float).reshape(-1, 2)
+        self.origin = np.asarray(origin, dtype=float)
+        self.resolution = float(resolution)
+        self.relative = (
+            np.zeros(len(self.bands), dtype=bool)
+            if relative is None
+            else np.asarray(relative, dtype=bool).reshape(-1)
+        )
+        self.ground = (
+            np.zeros(self.distances.shape[1:], dtype=np.float32)
+            if ground is None
+            else np.asarray(ground, dtype=np.float32)
+        )
+
+    def __len__(self) -> int:
+        return len(self.bands)
+
+    @classmethod
+    def build(
+        cls,
+        shapes: Sequence[Dict] = (),
+        obstacles: Optional[np.ndarray] = None,
+        area: Tuple[int, int] = (1024, 1024),
+        tile_size: float = 25.0,
+        resolution: float = 25.0,
+        obstacle_height: float = 20.0,
+        terrain: Optional[Heightmap] = None,
+    ) -> "ObstacleMap":
+        """
+        Rasterise the obstacles of a world
+
+        Each shape is a dict, a cylinder {"position": (x, y), "radius": r} or a polygon {"vertices": [(x, y), ...]},
+        with optional "floor" and "ceiling" altitudes, defaulting to sea level and no ceiling. Objects placed in the
+        world, such as trees, are given as cylinders. The obstacle tiles stand obstacle_height tall on the terrain.
+
+        :param shapes: the cylinders and polygons
+        :param obstacles: (x, y) obstacle mask of the tile map, tile (0, 0) in the south-west corner of the map
+        :param area: (x, y) size of the map [tiles], the map is centred on the origin
+        :param tile_size: size of a tile [m]
+        :param resolution: grid spacing [m]
+        :param obstacle_height: height of the obstacle tiles above the ground [m]
+        :param terrain: heightmap the obstacle tiles stand on, if None they stand at sea level
+        :return: the obstacle map
+        """
+        extent = np.array(area, dtype=float) * tile_size
+        # Grid points at the centres of cells, so a tile the size of a cell is rasterised onto its own grid point
+        shape = tuple(np.ceil(extent / resolution).astype(int))
+        origin = -0.5 * (np.array(shape) - 1) * resolution
+        x = origin[0] + np.arange(shape[0]) * resolution
+        y = origin[1] + np.arange(shape[1]) * resolution
+
+        masks: Dict[Tuple[float, float, bool], np.ndarray] = {}
+
+        def band_mask(
+            floor: float, ceiling: float, relative: bool = False
+        ) -> np.ndarray:
+            return masks.setdefault(
+                (float(floor), float(ceiling), relative), np.zeros(shape, dtype=bool)
+            )
+
+        for spec in shapes:
+            mask = band_mask(spec.get("floor", 0.0), spec.get("ceiling", np.inf))
+            if "vertices" in spec:
+                # Vertices in grid coordinates, a point is inside if its grid point is
+                vertices = (
+                    np.asarray(spec["vertices"], dtype=float) - origin
+                ) / resolution
+                mask |= polygon2mask(shape, vertices)
+            else:
+                # Only the grid points in the disc's bounding box are tested
+                cx, cy = spec["position"]
+                radius = spec["radius"]
+                lower = np.searchsorted(x, cx - radius), np.searchsorted(y, cy - radius)
+                upper = (
+                    np.searchsorted(x, cx + radius, side="right"),
+                    np.searchsorted(y, cy + radius, side="right"),
+                )
+                window = mask[lower[0] : upper[0], lower[1] : upper[1]]
+                window |= (
+                    np.square(x[lower[0] : upper[0]] - cx)[:, None]
+                    + np.square(y[lower[1] : upper[1]] - cy)[None, :]
+                    <= radius**2
+                )
+
+        if obstacles is not None and np.any(obstacles):
+            obstacles = np.asarray(obstacles, dtype=bool)
+            ix = ((x + 0.5 * extent[0]) / tile_size).astype(int)
+            iy = ((y + 0.5 * extent[1]) / tile_size).astype(int)
+            ix = np.clip(ix, 0, obstacles.shape[0] - 1)
+            iy = np.clip(iy, 0, obstacles.shape[1] - 1)
+            band_mask(0.0, obstacle_height, True)[...] |= obstacles[np.ix_(ix, iy)]
+
+        ground = None if terrain is None else terrain.height(x[:, None], y[None, :])
+
+        bands = [band for band, mask in masks.items() if mask.any()]
+        distances = np.zeros((len(bands),) + shape, dtype=np.float32)
+        for idx, band in enumerate(bands):
+            mask = masks[band]
+            # Place the boundary halfway between the grid points inside and outside
+            outside = ndimage.distance_transform_edt(~mask) - 0.5
+            inside = ndimage.distance_transform_edt(mask) - 0.5
+            distances[idx] = resolution * np.where(mask, -inside, outside)
+        return cls(
+            distances,
+            np.array([band[:2] for band in bands]).reshape(-1, 2),
+            origin,
+            resolution,
+            np.array([band[2] for band in bands], dtype=bool),
+            ground,
+        )
+
+    def save(self, path: str) -> None:
+        """Save the obstacle map to an .npz file"""
+        np.savez(
+            path,
+            distances=self.distances,
+            bands=self.bands,
+            origin=self.origin,
+            resolution=self.resolution,
+            relative=self.relative,
+            ground=self.ground,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "ObstacleMap":
+        """Load an obstacle map saved with save"""
+        with np.load(path) as data:
+            return cls(
+                data["distances"],
+                data["bands"],
+                data["origin"],
+                float(data["resolution"]),
+                data["relative"],
+                data["ground"],
+            )
+
+    def horizontal(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Interpolate the horizontal signed distance to the footprints of every band bilinearly
+
+        :param positions: (N, 2) or (N, 3) positions [m]
+        :return: (B, N) horizontal signed distances [m]
+        """
+        return self._interpolate(self.distances, positions)
+
+    def ground_height(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Interpolate the elevation of the ground the relative bands stand on bilinearly
+
+        :param positions: (N, 2) or (N, 3) positions [m]
+        :return: (N,) elevations [m]
+        """
+        return self._interpolate(self.ground[None], positions)[0]
+
+    def _interpolate(self, fields: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        """Interpolate (F, X, Y) fields on the grid bilinearly at (N, 2+) positions, returning (F, N) values"""
+        positions = np.asarray(positions, dtype=float)
+        shape = np.array(fields.shape[1:])
+        idx, weights = [], []
+        for axis in range(2):
+            value = (positions[..., axis] - self.origin[axis]) / self.resolution
+            value = np.clip(value, 0.0, shape[axis] - 1)
+            lower = np.minimum(value.astype(int), shape[axis] - 2)
+            idx.append(lower)
+            weights.append(value - lower)
+        d = fields
+        i, j = idx
+        wx, wy = weights
+        return (1.0 - wx) * ((1.0 - wy) * d[:, i, j] + wy * d[:, i, j + 1]) + wx * (
+            (1.0 - wy) * d[:, i + 1, j] + wy * d[:, i + 1, j + 1]
+        )
+
+    def distance(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Signed distance to the nearest obstacle of a batch of positions
+
+        :param positions: (N, 3) NED positions [m]
+        :return: (N,) signed distances, negative inside an obstacle, inf if the map has no obstacles [m]
+        """
+        positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        if len(self) == 0:
+            return np.full(len(positions), np.inf)
+        horizontal = self.horizontal(positions)
+        # Altitude, or height above the ground for the relative bands
+        altitude = -positions[:, 2] - np.where(
+            self.relative[:, None], self.ground_height(positions), 0.0
+        )
+        # Distance beyond the altitude band, negative within it
+        vertical = np.maximum(
+            self.bands[:, 0:1] - altitude, altitude - self.bands[:, 1:2]
+        )
+        outside = np.hypot(np.maximum(horizontal, 0.0), np.maximum(vertical, 0.0))
+        inside = np.minimum(np.maximum(horizontal, vertical), 0.0)
+        return np.min(outside + inside, axis=0)
+
+    def gradient(self, positions: np.ndarray, step: float = None) -> np.ndarray:
+        """
+        Gradient of the signed distance by central differences, pointing away from the nearest obstacle
+
+        :param positions: (N, 3) NED positions [m]
+        :param step: difference step, defaults to the grid spacing [m]
+        :return: (N, 3) NED gradients
+        """
+        positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        step = self.resolution if step is None else step
+        offsets = step * np.concatenate([np.eye(3), -np.eye(3)])
+        samples = self.distance((positions[:, None] + offsets).reshape(-1, 3))
+        samples = samples.reshape(len(positions), 2, 3)
+        gradient = (samples[:, 0] - samples[:, 1]) / (2.0 * step)
+        return np.where(np.isfinite(gradient), gradient, 0.0)
@@ -0,0 +1,295 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+RUNWAY_LENGTH = 1500.0  # length of the runways added to pyflyer's world [m]
+
+
+class Runway:
+    """
+    A runway and its straight-in approach, in a local frame fixed once at reset
+
+    The local frame has its origin on the centreline at the landing threshold, the near end of the runway when landing
+    along the runway heading. Its axes are the distance along the centreline, positive towards the far end, the
+    distance across it, positive to the right, and the height above the runway. The glideslope descends at glideslope
+    radians to the aim point, aim_distance past the threshold. Every quantity is evaluated for a batch of positions
+    with a handful of array operations.
+    """
+
+    def __init__(
+        self,
+        position: Tuple[float, float] = (0.0, 0.0),
+        heading: float = 0.0,
+        length: float = RUNWAY_LENGTH,
+        width: float = 20.0,
+        elevation: float = 0.0,
+        glideslope: float = np.radians(3.0),
+        aim_distance: float = 300.0,
+    ) -> None:
+        """
+        Create a runway
+
+        :param position: (x, y) position of the centre of the runway [m]
+        :param heading: landing direction, clockwise from north [rad]
+        :param length: length of the runway [m]
+        :param width: width of the runway [m]
+        :param elevation: elevation of the runway [m]
+        :param glideslope: angle of the glideslope above the horizontal [rad]
+        :param aim_distance: distance of the glideslope's aim point past the threshold [m]
+        """
+        self.position = np.asarray(position, dtype=float)
+        self.heading = float(heading)
+        self.length = float(length)
+        self.width = float(width)
+        self.elevation = float(elevation)
+        self.glideslope = float(glideslope)
+        self.aim_distance = float(aim_distance)
+
+        self.direction = np.array([np.cos(self.heading), np.sin(self.heading)])
+        # Rows map (x, y) offsets to (along, cross) distances
+        self.rotation = np.array(
+            [self.direction, [-self.direction[1], self.direction[0]]]
+        )
+        self.threshold = self.position - 0.5 * self.length * self.direction
+        self.tan_glideslope = np.tan(self.glideslope)
+
+    @classmethod
+    def from_config(cls, config: dict) -> "Runway":
+        """
+        Create the runway of an environment's runway_configuration
+
+        :param config: the runway_configuration dict
+        :return: the runway
+        """
+        return cls(
+            position=config["runway_position"],
+            heading=config["runway_heading"],
+            length=config.get("runway_length", RUNWAY_LENGTH),
+            width=config["runway_width"],
+            elevation=config.get("runway_elevation", 0.0),
+            glideslope=config.get("glideslope", np.radians(3.0)),
+            aim_distance=config.get("aim_distance", 300.0),
+        )
+
+    def to_local(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Transform positions into the runway frame
+
+        :param positions: (N, 3) NED positions, or (N, 2) (x, y) positions [m]
+        :return: (N, 3) along-track, cross-track and height above the runway, the height is zero for (N, 2) positions
+        """
+        positions = np.asarray(positions, dtype=float)
+        local = np.zeros(positions.shape[:-1] + (3,))
+        local[..., :2] = (positions[..., :2] - self.threshold) @ self.rotation.T
+        if positions.shape[-1] == 3:
+            local[..., 2] = -positions[..., 2] - self.elevation
+        return local
+
+    def along_track(self, positions: np.ndarray) -> np.ndarray:
+        """(N,) distance past the threshold along the centreline [m]"""
+        return self.to_local(positions)[..., 0]
+
+    def cross_track(self, positions: np.ndarray) -> np.ndarray:
+        """(N,) distance right of the centreline [m]"""
+        return self.to_local(positions)[..., 1]
+
+    def contains(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Whether positions lie over the runway
+
+        :param positions: (N, 3) or (N, 2) positions [m]
+        :return: (N,) True for positions within the runway's length and width
+        """
+        local = self.to_local(positions)
+        return (
+            (local[..., 0] >= 0.0)
+            & (local[..., 0] <= self.length)
+            & (np.abs(local[..., 1]) <= 0.5 * self.width)
+        )
+
+    def glideslope_height(self, along: np.ndarray) -> np.ndarray:
+        """(N,) height of the glideslope above the runway at along-track distances [m]"""
+        return (self.aim_distance - np.asarray(along)) * self.tan_glideslope
+
+    def glideslope_deviation(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Height above the glideslope
+
+        :param positions: (N, 3) NED positions [m]
+        :return: (N,) height above the glideslope, positive above it [m]
+        """
+        local = self.to_local(positions)
+        return local[..., 2] - self.glideslope_height(local[..., 0])
+
+    def heading_error(self, headings: np.ndarray) -> np.ndarray:
+        """(N,) heading relative to the runway heading, wrapped to [-pi, pi) [rad]"""
+        return (np.asarray(headings) - self.heading + np.pi) % (2.0 * np.pi) - np.pi
+
+    def approach(self, positions: np.ndarray, headings: np.ndarray) -> np.ndarray:
+        """
+        Approach guidance quantities of a batch of aircraft
+
+        :param positions: (N, 3) NED positions [m]
+        :param headings: (N,) headings [rad]
+        :return: (N, 5) along-track distance, cross-track distance, height above the runway, glideslope deviation
+            and heading error
+        """
+        local = self.to_local(positions)
+        return np.concatenate(
+            [
+                local,
+                (local[..., 2] - self.glideslope_height(local[..., 0]))[..., None],
+                self.heading_error(headings)[..., None],
+            ],
+            axis=-1,
+        )
+
+
+class RunwayIndex:
+    """
+    Many runways held in a KD-tree over their centres
+
+    The runways' frames are stacked into arrays, so a batch of positions is transformed into the frames of the
+    candidate runways the KD-tree returns in one gather. A position over a runway lies within the runway's half
+    diagonal, reach, of its centre, so only the runways whose centres are within the largest reach are tested.
+    """
+
+    def __init__(self, runways: List[Runway]) -> None:
+        """
+        Create a runway index
+
+        :param runways: the runways
+        """
+        self.runways = list(runways)
+        self.centres = np.array([runway.position for runway in self.runways]).reshape(
+            -1, 2
+        )
+        self.thresholds = np.array([runway.threshold for runway in self.runways])
+        self.rotations = np.array([runway.rotation for runway in self.runways])
+        self.lengths = np.array([runway.length for runway in self.runways])
+        self.widths = np.array([runway.width for runway in self.runways])
+        self.elevations = np.array([runway.elevation for runway in self.runways])
+        self.reach = np.hypot(0.5 * self.lengths, 0.5 * self.widths)
+        self.tree = cKDTree(self.centres)
+
+    def __len__(self) -> int:
+        return len(self.runways)
+
+    def __getitem__(self, idx: int) -> Runway:
+        return self.runways[idx]
+
+    @classmethod
+    def random(
+        cls,
+        np_random,
+        count: int,
+        extent: Tuple[float, float],
+        width_range: Tuple[float, float] = (20.0, 45.0),
+        spacing: float = 3000.0,
+        runways: Optional[List[Runway]] = None,
+    ) -> "RunwayIndex":
+        """
+        Place runways at random across a map
+
+        Candidate centres are sampled in one batch and kept greedily while they are at least spacing from every kept
+        runway, so fewer than count runways are placed when the map is too crowded. Only the heading and width are
+        sampled, the runways have the fixed length of those pyflyer's world adds.
+
+        :param np_random: random number generator
+        :param count: number of runways to place
+        :param extent: (x, y) size of the map centred on the origin [m]
+        :param width_range: range of the runway widths [m]
+        :param spacing: minimum distance between runway centres [m]
+        :param runways: runways placed beforehand, which are kept first
+        :return: the runway index
+        """
+        runways = list(runways or [])
+        half = 0.5 * np.asarray(extent, dtype=float) - spacing
+        candidates = np_random.uniform(-half, half, (4 * count, 2))
+        centres = [runway.position for runway in runways]
+        placed = 0
+        for candidate in candidates:
+            if placed == count:
+                break
+            if (
+                centres
+                and np.min(np.hypot(*(np.array(centres) - candidate).T)) < spacing
+            ):
+                continue
+            centres.append(candidate)
+            runways.append(
+                Runway(
+                    position=candidate,
+                    heading=np_random.uniform(0.0, 2.0 * np.pi),
+                    width=np_random.uniform(*width_range),
+                )
+            )
+            placed += 1
+        return cls(runways)
+
+    def local(self, positions: np.ndarray, indices: np.ndarray) -> np.ndarray:
+        """
+        Transform positions into the frames of given runways
+
+        :param positions: (N, 3) NED positions, or (N, 2) (x, y) positions [m]
+        :param indices: (N, ...) runway index for each position
+        :return: (N, ..., 3) along-track, cross-track and height above each runway
+        """
+        positions = np.asarray(positions, dtype=float)
+        indices = np.asarray(indices)
+        extra = (1,) * (indices.ndim - 1)
+        offset = (
+            positions[..., :2].reshape((-1,) + extra + (2,)) - self.thresholds[indices]
+        )
+        local = np.zeros(indices.shape + (3,))
+        local[..., :2] = np.einsum("...ij,...j->...i", self.rotations[indices], offset)
+        if positions.shape[-1] == 3:
+            local[..., 2] = (
+                -positions[:, 2].reshape((-1,) + extra) - self.elevations[indices]
+            )
+        return local
+
+    def nearest(
+        self, positions: np.ndarray, k: int = 1
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The k runways with the nearest centres to each of a batch of positions
+
+        :param positions: (N, 3) or (N, 2) positions [m]
+        :param k: number of runways
+        :return: the (N, k) runway indices and (N, k) horizontal distances to their centres [m], nearest first, padded
+            with len(self) and inf when there are fewer than k runways
+        """
+        positions = np.asarray(positions, dtype=float).reshape(-1, positions.shape[-1])
+        distances, indices = self.tree.query(positions[:, :2], k=k)
+        return indices.reshape(-1, k), distances.reshape(-1, k)
+
+    def runway_at(self, positions: np.ndarray, candidates: int = 4) -> np.ndarray:
+        """
+        The runway each of a batch of positions lies over
+
+        :param positions: (N, 3) or (N, 2) positions [m]
+        :param candidates: number of nearest runways tested, enough unless runways overlap
+        :return: (N,) runway indices, -1 for positions over no runway
+        """
+        positions = np.asarray(positions, dtype=float).reshape(-1, positions.shape[-1])
+        k = min(candidates, len(self))
+        _, indices = self.tree.query(
+            positions[:, :2], k=k, distance_upper_bound=self.reach.max()
+        )
+        indices = indices.reshape(-1, k)
+        valid = indices < len(self)
+        indices = np.where(valid, indices, 0)
+        local = self.local(positions[:, :2], indices)
+        over = (
+            valid
+            & (local[..., 0] >= 0.0)
+            & (local[..., 0] <= self.lengths[indices])
+            & (np.abs(local[..., 1]) <= 0.5 * self.widths[indices])
+        )
+        return np.where(
+            np.any(over, axis=1),
+            indices[np.arange(len(indices)), np.argmax(over, axis=1)],
+            -1,
+        )
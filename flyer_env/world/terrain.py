@@ -0,0 +1,290 @@
+import functools
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from flyer_env.utils import cache_digest, defaults
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "flyer_env", "terrain")
+# Version of the cached files, bumped when their contents or the way they are built change
+CACHE_VERSION = 2
+
+
+class Heightmap:
+    """
+    Terrain elevation sampled on a regular grid
+
+    Row i and column j of heights is the elevation at x = origin[0] + i * resolution, y = origin[1] + j * resolution,
+    with x north and y east as in the NED frame. Elevations are positive up.
+    """
+
+    def __init__(
+        self, heights: np.ndarray, origin: Tuple[float, float], resolution: float
+    ) -> None:
+        """
+        Create a heightmap
+
+        :param heights: (X, Y) elevations [m]
+        :param origin: (x, y) position of heights[0, 0] [m]
+        :param resolution: grid spacing [m]
+        """
+        self.heights = np.asarray(heights, dtype=np.float32)
+        self.origin = np.asarray(origin, dtype=float)
+        self.resolution = float(resolution)
+        self._pyramid = None
+
+    @property
+    def extent(self) -> np.ndarray:
+        """(x, y) size of the grid [m]"""
+        return (np.array(self.heights.shape) - 1) * self.resolution
+
+    @classmethod
+    def generate(
+        cls,
+        seed: int,
+        area: Tuple[int, int] = (1024, 1024),
+        tile_size: float = 25.0,
+        resolution: float = 100.0,
+        amplitude: float = 400.0,
+        wavelength: float = 8000.0,
+        octaves: int = 3,
+    ) -> "Heightmap":
+        """
+        Generate the heightmap of a world from layered simplex noise, evaluated over the whole grid at once by a
+        TerrainGenerator
+
+        Elevations are normalised by the noise's fixed range, as the chunks of a ChunkedTerrain are, so the heightmap
+        and the streamed terrain of a seed are the same terrain.
+
+        :param seed: world seed
+        :param area: (x, y) size of the map [tiles], the map is centred on the origin
+        :param tile_size: size of a tile [m]
+        :param resolution: grid spacing [m]
+        :param amplitude: range of the elevations [m]
+        :param wavelength: wavelength of the coarsest octave [m]
+        :param octaves: number of octaves, each of half the wavelength and amplitude of the last
+        :return: the heightmap
+        """
+        # Imported here, the generator builds heightmaps
+        from flyer_env.world.generator import TerrainGenerator
+
+        extent = np.array(area, dtype=float) * tile_size
+        shape = np.ceil(extent / resolution).astype(int) + 1
+        origin = -0.5 * (shape - 1) * resolution
+        x = origin[0] + np.arange(shape[0]) * resolution
+        y = origin[1] + np.arange(shape[1]) * resolution
+
+        generator = TerrainGenerator(seed, amplitude, wavelength, octaves)
+        return cls(generator.heights(x, y), origin, resolution)
+
+    def save(self, path: str) -> None:
+        """Save the heightmap to an .npz file"""
+        np.savez(
+            path, heights=self.heights, origin=self.origin, resolution=self.resolution
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "Heightmap":
+        """Load a heightmap saved with save"""
+        with np.load(path) as data:
+            return cls(data["heights"], data["origin"], float(data["resolution"]))
+
+    def height(self, x, y) -> np.ndarray:
+        """
+        Interpolate the elevation bilinearly, clamping to the edges of the grid
+
+        :param x: (N,) north positions [m]
+        :param y: (N,) east positions [m]
+        :return: (N,) elevations [m]
+        """
+        shape = np.array(self.heights.shape)
+        idx, weights = [], []
+        for axis, value in enumerate((x, y)):
+            value = (
+                np.asarray(value, dtype=float) - self.origin[axis]
+            ) / self.resolution
+            value = np.clip(value, 0.0, shape[axis] - 1)
+            lower = np.minimum(value.astype(int), shape[axis] - 2)
+            idx.append(lower)
+            weights.append(value - lower)
+        h = self.heights
+        i, j = idx
+        wx, wy = weights
+        return (1.0 - wx) * ((1.0 - wy) * h[i, j] + wy * h[i, j + 1]) + wx * (
+            (1.0 - wy) * h[i + 1, j] + wy * h[i + 1, j + 1]
+        )
+
+    def gradient(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(X, Y) slopes dh/dx and dh/dy of the grid"""
+        return tuple(np.gradient(self.heights.astype(float), self.resolution))
+
+    def pyramid(self) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        """
+        Minimum and maximum elevation mip pyramids, built on first use
+
+        Level 0 holds the bounds of each grid cell, which bound the bilinear surface over the cell, and each level above
+        pools 2 x 2 cells of the one below, so cell (i, j) of level k covers 2^k x 2^k grid cells.
+
+        :return: the lists of minimum and maximum elevations of each level
+        """
+        if self._pyramid is None:
+            h = self.heights
+            corners = [h[:-1, :-1], h[1:, :-1], h[:-1, 1:], h[1:, 1:]]
+            minima, maxima = [np.minimum.reduce(corners)], [np.maximum.reduce(corners)]
+            while max(maxima[-1].shape) > 1:
+                for levels, pool, pad in (
+                    (minima, np.minimum, np.inf),
+                    (maxima, np.maximum, -np.inf),
+                ):
+                    level = levels[-1]
+                    level = np.pad(
+                        level,
+                        [(0, level.shape[0] % 2), (0, level.shape[1] % 2)],
+                        constant_values=pad,
+                    )
+                    levels.append(
+                        pool.reduce(
+                            [
+                                level[0::2, 0::2],
+                                level[1::2, 0::2],
+                                level[0::2, 1::2],
+                                level[1::2, 1::2],
+                            ]
+                        )
+                    )
+            self._pyramid = (minima, maxima)
+        return self._pyramid
+
+    def raycast(
+        self,
+        origins: np.ndarray,
+        directions: np.ndarray,
+        max_range: float = 5000.0,
+        level: int = 2,
+        chunk: int = 64,
+        refinements: int = 2,
+    ) -> np.ndarray:
+        """
+        Distance along a batch of rays to the terrain
+
+        The rays are marched in chunks of points half a grid cell apart, every ray and point of a chunk at once. Each
+        point is first tested against the bounds of its cell in one level of the elevation pyramid, which settles
+        points above the cell's maximum or below its minimum with a single gather, and only the remaining points near
+        the surface are interpolated. The first crossing of each ray is refined by regula falsi, and rays that hit drop
+        out before the next chunk.
+
+        :param origins: (N, 3) NED ray origins [m]
+        :param directions: (N, 3) NED unit ray directions
+        :param max_range: range beyond which rays miss [m]
+        :param level: level of the pyramid the points are tested against
+        :param chunk: number of points along each ray marched at once
+        :param refinements: number of regula falsi steps refining a crossing
+        :return: (N,) distances to the terrain [m], inf for rays that miss
+        """
+        minima, maxima = self.pyramid()
+        level = min(level, len(maxima) - 1)
+        lows, highs = minima[level], maxima[level]
+        cells = np.array(maxima[0].shape)
+
+        origins = np.asarray(origins, dtype=float).reshape(-1, 3)
+        directions = np.asarray(directions, dtype=float).reshape(-1, 3)
+        # Marched in (x, y, altitude) coordinates
+        start = origins * [1.0, 1.0, -1.0]
+        step = directions * [1.0, 1.0, -1.0]
+        spacing = 0.5 * self.resolution
+        samples = spacing * np.arange(int(np.ceil(max_range / spacing)) + 1)
+
+        def clearance(t, rays):
+            point = start[rays] + t[:, None] * step[rays]
+            return point[:, 2] - self.height(point[:, 0], point[:, 1])
+
+        distances = np.full(len(start), np.inf)
+        active = np.arange(len(start))
+        for first in range(0, len(samples), chunk):
+            if len(active) == 0:
+                break
+            t = samples[first : first + chunk + 1]
+            point = start[active, None] + t[:, None] * step[active, None]
+            grid = (point[..., :2] - self.origin) / self.resolution
+            inside = np.all((grid >= 0.0) & (grid < cells), axis=-1)
+            cell = np.where(inside[..., None], grid, 0.0).astype(int) >> level
+            altitude = point[..., 2]
+            under = inside & (altitude <= lows[cell[..., 0], cell[..., 1]])
+            near = inside & ~under & (altitude <= highs[cell[..., 0], cell[..., 1]])
+            if np.any(near):
+                p = point[near]
+                under[near] = p[:, 2] <= self.height(p[:, 0], p[:, 1])
+
+            crossed = np.any(under, axis=1)
+            if np.any(crossed):
+                hit = active[crossed]
+                index = np.argmax(under[crossed], axis=1)
+                t_high = t[index]
+                t_low = t[np.maximum(index - 1, 0)]
+                c_high, c_low = clearance(t_high, hit), clearance(t_low, hit)
+                for _ in range(refinements + 1):
+                    middle = t_low + (t_high - t_low) * np.clip(
+                        c_low / np.maximum(c_low - c_high, 1e-9), 0.0, 1.0
+                    )
+                    c_middle = clearance(middle, hit)
+                    below = c_middle <= 0.0
+                    t_high = np.where(below, middle, t_high)
+                    c_high = np.where(below, c_middle, c_high)
+                    t_low = np.where(below, t_low, middle)
+                    c_low = np.where(below, c_low, c_middle)
+                distances[hit] = np.where(
+                    (index == 0) & (first == 0),
+                    0.0,
+                    np.where(middle <= max_range, middle, np.inf),
+                )
+            # Rays that hit or have left the heightmap drop out
+            active = active[~crossed & inside[:, -1]]
+        return distances
+
+
+def heightmap_digest() -> str:
+    """Digest of the way heightmaps are generated, naming the cached heightmaps and the results built from them"""
+    from flyer_env.world.generator import TerrainGenerator
+
+    return cache_digest(
+        CACHE_VERSION, defaults(Heightmap.generate), defaults(TerrainGenerator)
+    )
+
+
+@functools.lru_cache(maxsize=16)
+def heightmap(
+    seed: int,
+    area: Tuple[int, int] = (1024, 1024),
+    tile_size: float = 25.0,
+    cache_dir: Optional[str] = CACHE_DIR,
+) -> Heightmap:
+    """
+    Get the heightmap of a world, caching it on disk
+
+    Cached files are named by heightmap_digest, so heightmaps generated differently are rebuilt rather than loaded.
+
+    :param seed: world seed
+    :param area: (x, y) size of the map [tiles]
+    :param tile_size: size of a tile [m]
+    :param cache_dir: directory heightmaps are cached in, if None heightmaps are not stored
+    :return: the heightmap
+    """
+    path = None
+    if cache_dir is not None:
+        name = (
+            f"heightmap_{seed}_{area[0]}x{area[1]}_{tile_size}_{heightmap_digest()}.npz"
+        )
+        path = os.path.join(cache_dir, name)
+        if os.path.exists(path):
+            return Heightmap.load(path)
+
+    terrain = Heightmap.generate(seed, area, tile_size)
+
+    if path is not None:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            terrain.save(path)
+        except OSError:
+            pass
+    return terrain
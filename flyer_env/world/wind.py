@@ -0,0 +1,415 @@
+import functools
+import os
+from typing import Optional, Tuple, Union
+
+import numpy as np
+from scipy.ndimage import uniform_filter
+from scipy.signal import bilinear, lfilter, lfilter_zi
+
+from flyer_env.utils import cache_digest, defaults
+from flyer_env.world.terrain import CACHE_DIR, Heightmap, heightmap, heightmap_digest
+
+FT = 0.3048  # [m]
+# Version of the cached files, bumped when their contents or the way they are built change
+CACHE_VERSION = 1
+
+# Wind speed at 6 m (20 ft) of the MIL-F-8785C low altitude turbulence intensities [m/s]
+LOW_ALTITUDE_WIND = {"none": 0.0, "light": 7.7, "moderate": 15.4, "severe": 23.1}
+# Turbulence intensities above 2000 ft, from the MIL-F-8785C exceedance probability curves [m/s]
+HIGH_ALTITUDE_SIGMA = {"none": 0.0, "light": 1.5, "moderate": 3.0, "severe": 6.5}
+
+
+def dryden_scales(altitude: float, turbulence: Union[str, float]):
+    """
+    MIL-F-8785C Dryden turbulence length scales and intensities
+
+    Below 1000 ft the low altitude model is used, above 2000 ft the medium/high altitude model, and the two are
+    interpolated linearly in between.
+
+    :param altitude: altitude above ground [m]
+    :param turbulence: "none", "light", "moderate" or "severe", or the high altitude intensity [m/s]
+    :return: the (3,) (u, v, w) length scales [m] and (3,) intensities [m/s]
+    """
+    if isinstance(turbulence, str):
+        wind_20, sigma_high = (
+            LOW_ALTITUDE_WIND[turbulence],
+            HIGH_ALTITUDE_SIGMA[turbulence],
+        )
+    else:
+        sigma_high = float(turbulence)
+        wind_20 = (
+            sigma_high * LOW_ALTITUDE_WIND["moderate"] / HIGH_ALTITUDE_SIGMA["moderate"]
+        )
+
+    h = np.clip(altitude / FT, 10.0, 1000.0)
+    factor = 0.177 + 0.000823 * h
+    length_low = np.array([h / factor**1.2, h / factor**1.2, h]) * FT
+    sigma_w = 0.1 * wind_20
+    sigma_low = np.array([sigma_w / factor**0.4, sigma_w / factor**0.4, sigma_w])
+
+    length_high = np.full(3, 1750.0 * FT)
+    sigma_high = np.full(3, sigma_high)
+
+    weight = np.clip((altitude / FT - 1000.0) / 1000.0, 0.0, 1.0)
+    return (
+        (1.0 - weight) * length_low + weight * length_high,
+        (1.0 - weight) * sigma_low + weight * sigma_high,
+    )
+
+
+class WindField:
+    """
+    Steady wind varying over the terrain, stored on a coarse 3-D grid
+
+    The field is a diagnostic model of the mean flow over the heightmap rather than a flow solution. Near the ground
+    the wind is turned along the contours of steep slopes (valley channelling), sped up over terrain higher than its
+    surroundings and lifted or sunk by flowing up or down the slopes (ridge lift), each effect decaying with height
+    above the terrain. Above that the wind follows the power law shear profile, and below the terrain it is zero.
+
+    Grid point (i, j, k) is at x = origin[0] + i * spacing[0], y = origin[1] + j * spacing[1] and altitude
+    origin[2] + k * spacing[2].
+    """
+
+    def __init__(
+        self, winds: np.ndarray, origin: np.ndarray, spacing: np.ndarray
+    ) -> None:
+        """
+        Create a wind field
+
+        :param winds: (X, Y, Z, 3) NED wind velocities [m/s]
+        :param origin: (x, y, altitude) position of winds[0, 0, 0] [m]
+        :param spacing: (x, y, altitude) grid spacing [m]
+        """
+        self.winds = np.asarray(winds, dtype=np.float32)
+        self.origin = np.asarray(origin, dtype=float)
+        self.spacing = np.asarray(spacing, dtype=float)
+
+    @classmethod
+    def build(
+        cls,
+        terrain: Heightmap,
+        speed: float,
+        direction: float = 0.0,
+        shear_exponent: float = 1.0 / 7.0,
+        reference_altitude: float = 10.0,
+        spacing: Tuple[float, float, float] = (500.0, 500.0, 100.0),
+        ceiling: float = 3000.0,
+        decay: float = 300.0,
+    ) -> "WindField":
+        """
+        Compute the field over a heightmap
+
+        :param terrain: the heightmap
+        :param speed: steady wind speed at the reference height above the terrain [m/s]
+        :param direction: direction the wind blows from, clockwise from north [rad]
+        :param shear_exponent: exponent of the power law shear profile
+        :param reference_altitude: height above the terrain the wind speed is given at [m]
+        :param spacing: (x, y, altitude) grid spacing [m]
+        :param ceiling: altitude of the top of the grid [m]
+        :param decay: height above the terrain over which the terrain effects decay [m]
+        :return: the wind field
+        """
+        shape = np.maximum(np.ceil(terrain.extent / spacing[:2]).astype(int) + 1, 2)
+        x = terrain.origin[0] + np.arange(shape[0]) * spacing[0]
+        y = terrain.origin[1] + np.arange(shape[1]) * spacing[1]
+        altitudes = np.arange(0.0, ceiling + spacing[2], spacing[2])
+        gx, gy = np.meshgrid(x, y, indexing="ij")
+
+        # Terrain smoothed to the grid spacing, its slopes and its height above the surrounding terrain
+        window = max(int(round(spacing[0] / terrain.resolution)), 1)
+        smooth = Heightmap(
+            uniform_filter(terrain.heights.astype(float), window),
+            terrain.origin,
+            terrain.resolution,
+        )
+        slope_x, slope_y = (
+            Heightmap(slope, terrain.origin, terrain.resolution).height(gx, gy)
+            for slope in smooth.gradient()
+        )
+        h = smooth.height(gx, gy)
+        surroundings = uniform_filter(
+            terrain.heights.astype(float), 4 * window, mode="nearest"
+        )
+        relief = h - Heightmap(surroundings, terrain.origin, terrain.resolution).height(
+            gx, gy
+        )
+
+        # Wind blows from direction, so the vector points the opposite way
+        wind_dir = -np.array([np.cos(direction), np.sin(direction)])
+        slope = np.sqrt(slope_x * slope_x + slope_y * slope_y)
+        normal = (
+            np.stack([slope_x, slope_y], axis=-1) / np.maximum(slope, 1e-9)[..., None]
+        )
+
+        agl = altitudes[None, None, :] - h[..., None]
+        ground = np.exp(-np.maximum(agl, 0.0) / decay)
+        wind_speed = speed * np.power(
+            np.maximum(agl, 1.0) / reference_altitude, shear_exponent
+        )
+        wind_speed *= 1.0 + 0.5 * np.clip(relief / decay, -1.0, 1.0)[..., None] * ground
+
+        # Turn the flow along the contours in proportion to the steepness of the slope
+        blocking = np.clip(slope / 0.3, 0.0, 1.0)[..., None] * ground
+        into_slope = normal @ wind_dir
+        horizontal = (
+            wind_dir
+            - (blocking * into_slope[..., None])[..., None] * normal[:, :, None, :]
+        )
+        horizontal /= np.maximum(np.linalg.norm(horizontal, axis=-1), 1e-9)[..., None]
+        horizontal *= wind_speed[..., None]
+
+        # Flow up the slope is lifted, positive up
+        lift = (
+            horizontal[..., 0] * slope_x[..., None]
+            + horizontal[..., 1] * slope_y[..., None]
+        ) * ground
+
+        winds = np.concatenate([horizontal, -lift[..., None]], axis=-1)
+        winds[agl < 0.0] = 0.0
+        origin = np.array([x[0], y[0], altitudes[0]])
+        return cls(winds, origin, np.asarray(spacing, dtype=float))
+
+    def save(self, path: str) -> None:
+        """Save the field to an .npz file"""
+        np.savez(path, winds=self.winds, origin=self.origin, spacing=self.spacing)
+
+    @classmethod
+    def load(cls, path: str) -> "WindField":
+        """Load a field saved with save"""
+        with np.load(path) as data:
+            return cls(data["winds"], data["origin"], data["spacing"])
+
+    def lookup(self, position) -> np.ndarray:
+        """
+        Interpolate the field trilinearly, clamping to the edges of the grid
+
+        :param position: (N, 3) NED positions [m]
+        :return: (N, 3) NED wind velocities [m/s]
+        """
+        position = np.asarray(position, dtype=float)
+        coords = np.stack(
+            [position[..., 0], position[..., 1], -position[..., 2]], axis=-1
+        )
+        shape = np.array(self.winds.shape[:3])
+        value = np.clip((coords - self.origin) / self.spacing, 0.0, shape - 1)
+        lower = np.minimum(value.astype(int), shape - 2)
+        weight = value - lower
+
+        result = 0.0
+        for corner in np.ndindex(2, 2, 2):
+            w = np.prod(np.where(corner, weight, 1.0 - weight), axis=-1)
+            i, j, k = (lower + corner).T
+            result = result + w[..., None] * self.winds[i, j, k]
+        return result
+
+
+@functools.lru_cache(maxsize=16)
+def wind_field(
+    seed: int,
+    area: Tuple[int, int] = (1024, 1024),
+    tile_size: float = 25.0,
+    speed: float = 0.0,
+    direction: float = 0.0,
+    shear_exponent: float = 1.0 / 7.0,
+    reference_altitude: float = 10.0,
+    cache_dir: Optional[str] = CACHE_DIR,
+) -> WindField:
+    """
+    Get the wind field over the terrain of a world, caching it on disk alongside the heightmap
+
+    Cached files are named by a digest of the heightmap's generation and the field's defaults, so fields built
+    differently are rebuilt rather than loaded stale.
+
+    :param seed: world seed
+    :param area: (x, y) size of the map [tiles]
+    :param tile_size: size of a tile [m]
+    :param speed: steady wind speed at the reference height above the terrain [m/s]
+    :param direction: direction the wind blows from, clockwise from north [rad]
+    :param shear_exponent: exponent of the power law shear profile
+    :param reference_altitude: height above the terrain the wind speed is given at [m]
+    :param cache_dir: directory fields are cached in, if None fields are not stored
+    :return: the wind field
+    """
+    path = None
+    if cache_dir is not None:
+        digest = cache_digest(
+            CACHE_VERSION, heightmap_digest(), defaults(WindField.build)
+        )
+        name = (
+            f"wind_{seed}_{area[0]}x{area[1]}_{tile_size}_{speed:.3f}_{direction:.6f}_"
+            f"{shear_exponent:.6f}_{reference_altitude:.3f}_{digest}.npz"
+        )
+        path = os.path.join(cache_dir, name)
+        if os.path.exists(path):
+            return WindField.load(path)
+
+    field = WindField.build(
+        heightmap(seed, area, tile_size, cache_dir),
+        speed,
+        direction,
+        shear_exponent,
+        reference_altitude,
+    )
+
+    if path is not None:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            field.save(path)
+        except OSError:
+            pass
+    return field
+
+
+class WindModel:
+    """
+    Steady wind with a power law shear profile and Dryden turbulence, for a batch of aircraft
+
+    The turbulence is white noise shaped by the discretised Dryden filters. Noise for every aircraft is generated and
+    filtered in blocks of block_size ticks at once, the filter state carrying over between blocks, so sampling the wind
+    at a tick is an index into the current block. The filters are designed for a reference airspeed and altitude held
+    over the episode.
+    """
+
+    def __init__(
+        self,
+        n_aircraft: int = 1,
+        dt: float = 0.01,
+        speed: float = 0.0,
+        direction: float = 0.0,
+        shear_exponent: float = 1.0 / 7.0,
+        reference_altitude: float = 10.0,
+        turbulence: Union[str, float] = "none",
+        airspeed: float = 100.0,
+        altitude: float = 1000.0,
+        block_size: int = 4096,
+        field: Optional[WindField] = None,
+    ) -> None:
+        """
+        Create a wind model
+
+        :param n_aircraft: number of aircraft sampling the wind
+        :param dt: timestep of a tick [s]
+        :param speed: steady wind speed at the reference altitude [m/s]
+        :param direction: direction the steady wind blows from, clockwise from north [rad]
+        :param shear_exponent: exponent of the power law shear profile, 0 for no shear
+        :param reference_altitude: altitude the steady wind speed is given at [m]
+        :param turbulence: "none", "light", "moderate" or "severe", or the high altitude intensity [m/s]
+        :param airspeed: airspeed the Dryden filters are designed for [m/s]
+        :param altitude: altitude the Dryden filters are designed for [m]
+        :param block_size: number of ticks of turbulence generated at once
+        :param field: steady wind varying over the terrain, replacing the uniform steady wind when positions are given
+        """
+        self.n_aircraft = n_aircraft
+        self.dt = dt
+        self.speed = speed
+        self.direction = direction
+        self.shear_exponent = shear_exponent
+        self.reference_altitude = reference_altitude
+        self.block_size = block_size
+        self.field = field
+
+        # Blowing from direction, so the wind vector points the opposite way
+        self.steady_direction = -np.array([np.cos(direction), np.sin(direction), 0.0])
+
+        lengths, self.sigmas = dryden_scales(altitude, turbulence)
+        self.filters = []
+        for idx, (length, sigma) in enumerate(zip(lengths, self.sigmas)):
+            tau = length / airspeed
+            if idx == 0:
+                num = [np.sqrt(2.0 * tau / np.pi)]
+                den = [tau, 1.0]
+            else:
+                num = np.sqrt(tau / np.pi) * np.array([np.sqrt(3.0) * tau, 1.0])
+                den = [tau * tau, 2.0 * tau, 1.0]
+            b, a = bilinear(num, den, fs=1.0 / dt)
+            self.filters.append((sigma * b, a))
+
+        self.np_random = np.random.default_rng()
+        self.states = None
+        self.block = None
+        self.block_start = 0
+
+    def reset(self, np_random: Optional[np.random.Generator] = None) -> None:
+        """
+        Start a new episode, generating the first block of turbulence
+
+        The filters start from a random gust of the turbulence intensity, so the turbulence needs no warm up.
+
+        :param np_random: random number generator the noise is drawn from
+        """
+        if np_random is not None:
+            self.np_random = np_random
+        self.states = []
+        for (b, a), sigma in zip(self.filters, self.sigmas):
+            # Scaled to the state holding the output at a unit step
+            zi = lfilter_zi(b, a) / max(np.sum(b) / np.sum(a), 1e-12)
+            initial = sigma * self.np_random.standard_normal(self.n_aircraft)
+            self.states.append(zi[:, None] * initial[None, :])
+        self.block_start = 0
+        self._generate()
+
+    def _generate(self) -> None:
+        """Filter the next block of white noise"""
+        # Unit one-sided power spectral density in angular frequency
+        noise = self.np_random.standard_normal((3, self.block_size, self.n_aircraft))
+        noise *= np.sqrt(np.pi / self.dt)
+        self.block = np.zeros((self.block_size, self.n_aircraft, 3))
+        for idx, (b, a) in enumerate(self.filters):
+            self.block[..., idx], self.states[idx] = lfilter(
+                b, a, noise[idx], axis=0, zi=self.states[idx]
+            )
+
+    def steady(self, altitude) -> np.ndarray:
+        """
+        Steady wind at a batch of altitudes
+
+        :param altitude: (N,) altitudes above ground [m]
+        :return: (N, 3) NED wind velocities [m/s]
+        """
+        altitude = np.maximum(np.asarray(altitude, dtype=float), 1.0)
+        speed = self.speed * np.power(
+            altitude / self.reference_altitude, self.shear_exponent
+        )
+        return speed[..., None] * self.steady_direction
+
+    def gusts(self, tick: int, heading=None) -> np.ndarray:
+        """
+        Turbulence of every aircraft at a tick, ticks must be sampled in increasing order
+
+        :param tick: tick index since reset
+        :param heading: (N,) headings the longitudinal and lateral gusts are aligned with [rad], north if None
+        :return: (N, 3) NED gust velocities [m/s]
+        """
+        if self.block is None:
+            self.reset()
+        while tick >= self.block_start + self.block_size:
+            self.block_start += self.block_size
+            self._generate()
+        gusts = self.block[tick - self.block_start]
+        if heading is None:
+            return gusts
+        c, s = np.cos(heading), np.sin(heading)
+        return np.stack(
+            [
+                c * gusts[:, 0] - s * gusts[:, 1],
+                s * gusts[:, 0] + c * gusts[:, 1],
+                gusts[:, 2],
+            ],
+            axis=-1,
+        )
+
+    def __call__(self, tick: int, altitude, heading=None, position=None) -> np.ndarray:
+        """
+        Total wind of every aircraft at a tick
+
+        :param tick: tick index since reset
+        :param altitude: (N,) altitudes above ground [m]
+        :param heading: (N,) headings the gusts are aligned with [rad], north if None
+        :param position: (N, 3) NED positions the steady wind is looked up at in the field, if the model has one
+        :return: (N, 3) NED wind velocities [m/s]
+        """
+        if self.field is not None and position is not None:
+            steady = self.field.lookup(position)
+        else:
+            steady = self.steady(np.broadcast_to(altitude, (self.n_aircraft,)))
+        return steady + self.gusts(tick, heading)
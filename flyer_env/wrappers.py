@@ -26,7 +26,7 @@ def capped_cubic_video_schedule(episode_id: int) -> bool:
 
 
 class RecordVideo(gym.Wrapper, gym.utils.RecordConstructorArgs):
-    """This wrapper records videos of rollouts. Based on gym.RecordVideo, but with a frequency.
+    """This wrapper records videos of rollouts. Based on gym.RecordVideo, but with a target frame rate.
 
     Usually, you only want to record episodes intermittently, say every hundredth episode.
     To do this, you can specify **either** ``episode_trigger`` **or** ``step_trigger`` (not both).
@@ -36,14 +36,17 @@ class RecordVideo(gym.Wrapper, gym.utils.RecordConstructorArgs):
     By default, the recording will be stopped once a `terminated` or `truncated` signal has been emitted by the environment. However, you can
     also create recordings of fixed length (possibly spanning several episodes) by passing a strictly positive value for
     ``video_length``.
+
+    Frames are scheduled against the simulated time of the environment, so ``env.render()`` is only called on the steps
+    where a frame is due at the target ``fps``. Rendering cost therefore scales with the video frame rate rather than
+    the ``simulation_frequency`` of the environment.
     """
 
     def __init__(
         self,
         env: gym.Env,
         video_folder: str,
-        dt: float,
-        record_frequency: float = 1.0,
+        fps: Optional[float] = None,
         episode_trigger: Callable[[int], bool] = None,
         step_trigger: Callable[[int], bool] = None,
         video_length: int = 0,
@@ -55,18 +58,20 @@ class RecordVideo(gym.Wrapper, gym.utils.RecordConstructorArgs):
         Args:
             env: The environment that will be wrapped
             video_folder (str): The folder where the recordings will be stored
-            dt: time step of underlying simulation
-            record_frequency: how often to record a frame [Hz]
+            fps (float): Target frame rate of the video in simulated time [Hz]. Defaults to the
+                ``render_frequency`` of the environment config
             episode_trigger: Function that accepts an integer and returns ``True`` iff a recording should be started at this episode
             step_trigger: Function that accepts an integer and returns ``True`` iff a recording should be started at this step
-            video_length (int): The length of recorded episodes. If 0, entire episodes are recorded.
-                Otherwise, snippets of the specified length are captured
+            video_length (int): The length of recorded episodes in frames. If 0, entire episodes are recorded.
+                Otherwise, clips of the specified length are captured and no further frames are rendered until the
+                next trigger
             name_prefix (str): Will be prepended to the filename of the recordings
             disable_logger (bool): Whether to disable moviepy logger or not.
         """
         gym.utils.RecordConstructorArgs.__init__(
             self,
             video_folder=video_folder,
+            fps=fps,
             episode_trigger=episode_trigger,
             step_trigger=step_trigger,
             video_length=video_length,
@@ -93,9 +98,16 @@ class RecordVideo(gym.Wrapper, gym.utils.RecordConstructorArgs):
         self.video_recorder: Optional[video_recorder.VideoRecorder] = None
         self.disable_logger = disable_logger
 
-        self.dt = dt
-        self.record_frequency = record_frequency
-        self.time_since_last_frame = 0.0
+        config = self._env_config()
+        if fps is None:
+            fps = config.get("render_frequency", env.metadata.get("render_fps", 30))
+        assert fps > 0.0, "fps must be strictly positive"
+        self.fps = fps
+        self.frame_period = 1.0 / fps
+        # Fallback timestep when the simulated time cannot be read from the env, e.g. vector envs
+        self.dt = 1.0 / config.get("simulation_frequency", fps)
+        self.episode_steps = 0
+        self.next_frame_time = 0.0
 
         self.video_folder = os.path.abspath(video_folder)
         # Create output folder if needed
@@ -126,15 +138,12 @@ class RecordVideo(gym.Wrapper, gym.utils.RecordConstructorArgs):
         observations = super().reset(**kwargs)
         self.terminated = False
         self.truncated = False
-        self.time_since_last_frame = 0.0
+        self.episode_steps = 0
+        self.next_frame_time = 0.0
         if self.recording:
             assert self.video_recorder is not None
             self.video_recorder.recorded_frames = []
-            self.video_recorder.capture_frame()
-            self.recorded_frames += 1
-            if self.video_length > 0:
-                if self.recorded_frames > self.video_length:
-                    self.close_video_recorder()
+            self.capture_frame()
         elif self._video_enabled():
             self.start_video_recorder()
         return observations
@@ -154,10 +163,44 @@ class RecordVideo(gym.Wrapper, gym.utils.RecordConstructorArgs):
             metadata={"step_id": self.step_id, "episode_id": self.episode_id},
             disable_logger=self.disable_logger,
         )
+        # Play the video back in simulated time rather than at the env's render_fps
+        self.video_recorder.frames_per_sec = self.fps
 
-        self.video_recorder.capture_frame()
-        self.recorded_frames = 1
+        self.recorded_frames = 0
         self.recording = True
+        self.next_frame_time = self._simulation_time()
+        self.capture_frame()
+
+    def capture_frame(self):
+        """Render a frame into the video, schedule the next frame and close the recorder once a clip is complete."""
+        assert self.video_recorder is not None
+        self.video_recorder.capture_frame()
+        self.recorded_frames += 1
+
+        # Skip any frames that were missed if the env steps slower than the video frame rate
+        while self._frame_due():
+            self.next_frame_time += self.frame_period
+
+        if self.video_length > 0 and self.recorded_frames > self.video_length:
+            self.close_video_recorder()
+
+    def _frame_due(self) -> bool:
+        """Whether the next frame is due at the current simulated time"""
+        # Half a timestep of tolerance to absorb floating point drift in the accumulated simulation time
+        return self._simulation_time() + 0.5 * self.dt >= self.next_frame_time
+
+    def _simulation_time(self) -> float:
+        """Simulated time of the current episode [s]"""
+        try:
+            return self.env.unwrapped.time
+        except AttributeError:
+            return self.episode_steps * self.dt
+
+    def _env_config(self) -> dict:
+        try:
+            return self.env.unwrapped.config
+        except AttributeError:
+            return {}
 
     def _video_enabled(self):
         if self.step_trigger:
@@ -178,34 +221,28 @@ class RecordVideo(gym.Wrapper, gym.utils.RecordConstructorArgs):
         if not (self.terminated or self.truncated):
             # increment steps and episodes
             self.step_id += 1
+            self.episode_steps += 1
             if not self.is_vector_env:
-                if terminateds or truncateds:
+                done = terminateds or truncateds
+                if done:
                     self.episode_id += 1
                     self.terminated = terminateds
                     self.truncated = truncateds
-            elif terminateds[0] or truncateds[0]:
-                self.episode_id += 1
-                self.terminated = terminateds[0]
-                self.truncated = truncateds[0]
+            else:
+                done = terminateds[0] or truncateds[0]
+                if done:
+                    self.episode_id += 1
+                    self.terminated = terminateds[0]
+                    self.truncated = truncateds[0]
 
             if self.recording:
-                self.time_since_last_frame += self.dt
-                if self.time_since_last_frame > self.record_frequency:
-                    assert self.video_recorder is not None
-                    self.video_recorder.capture_frame()
-                    self.recorded_frames += 1
-                    if self.video_length > 0:
-                        if self.recorded_frames > self.video_length:
-                            self.close_video_recorder()
-                    else:
-                        if not self.is_vector_env:
-                            if terminateds or truncateds:
-                                self.close_video_recorder()
-                        elif terminateds[0] or truncateds[0]:
-                            self.close_video_recorder()
-                    self.time_since_last_frame = 0.0
-
-            elif self._video_enabled():
+                if self._frame_due():
+                    self.capture_frame()
+                if self.recording and self.video_length == 0 and done:
+                    self.close_video_recorder()
+
+            # Episode triggered recordings only start on reset, so a finished clip is not restarted mid-episode
+            elif self.step_trigger and self._video_enabled():
                 self.start_video_recorder()
 
         return observations, rewards, terminateds, truncateds, infos
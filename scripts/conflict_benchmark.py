@@ -0,0 +1,50 @@
+import timeit
+
+import numpy as np
+
+from flyer_env.world.conflicts import Conflicts, closest_approach
+
+
+def traffic(count: int, density: float = 1e-9, seed: int = 0):
+    """Aircraft spread through a volume holding density aircraft per cubic metre, cruising at 60-120 m/s"""
+    rng = np.random.default_rng(seed)
+    side = (count / density) ** (1.0 / 3.0)
+    positions = rng.uniform(-0.5 * side, 0.5 * side, (count, 3))
+    heading = rng.uniform(-np.pi, np.pi, count)
+    speed = rng.uniform(60.0, 120.0, count)
+    velocities = np.stack(
+        [speed * np.cos(heading), speed * np.sin(heading), rng.normal(0.0, 2.0, count)],
+        axis=-1,
+    )
+    return positions, velocities
+
+
+def brute_force(positions, velocities, dt, separation):
+    """Sweep every pair of aircraft"""
+    pairs = np.stack(np.triu_indices(len(positions), 1), axis=-1)
+    _, distances = closest_approach(positions, velocities, pairs, dt)
+    return pairs[distances < separation]
+
+
+def main():
+    dt = 1.0 / 120.0
+    print(
+        f"{'aircraft':>8} {'conflicts':>9} {'hashed [ms]':>11} {'all pairs [ms]':>14}"
+    )
+    for count in [10, 100, 1000]:
+        positions, velocities = traffic(count)
+        number = max(10000 // count, 10)
+        hashed = timeit.timeit(
+            lambda: Conflicts.detect(positions, velocities, dt), number=number
+        )
+        pairs = timeit.timeit(
+            lambda: brute_force(positions, velocities, dt, 150.0), number=number
+        )
+        conflicts = Conflicts.detect(positions, velocities, dt)
+        print(
+            f"{count:>8} {len(conflicts):>9} {1e3 * hashed / number:>11.3f} {1e3 * pairs / number:>14.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -36,7 +36,7 @@ def main():
     env = gym.make("flyer-v1", config=env_config, render_mode="rgb_array")
     time = 0
     dt = 1 / env.unwrapped.config["simulation_frequency"]
-    env = RecordVideo(env, "videos", dt, 1 / env.unwrapped.config["render_frequency"])
+    env = RecordVideo(env, "videos", fps=env.unwrapped.config["render_frequency"])
     # env = RecordVideo(env, "videos")
 
     obs, info = env.reset()
@@ -54,6 +54,7 @@ def main():
         }
         obs, reward, terminated, truncated, info = env.step(action)
         # print(f'obs: {obs}')
+        time += dt
         times.append(time)
         observations.append(obs)
     env.close()
@@ -139,11 +139,48 @@ def test_pursuit_target():
             assert False
     assert True
 
-# TODO: Add a method to test track points
 
+def test_track_points():
 
-def _get_controlled_aircraft():
+    track_points = np.array([[5000.0, 0.0, -1000.0], [5000.0, 5000.0, -1100.0]])
+    max_steps = 1e6
+
+    action = {"track_points": track_points, "track_radius": 2000.0}
+    a = _get_controlled_aircraft()
+    a.act(action)
+    tracker = a.tracker
+    ids = 0
+
+    while 0.0 != pytest.approx(np.linalg.norm(track_points[-1, :2]-np.array([a.dict['x'], a.dict['y']])), abs=100.0):
+
+        a.act(action)
+        a.step(dt = 1 / FPS)
+        ids += 1
+        if ids > max_steps:
+            assert False
+    assert a.tracker is tracker
+    assert a.dict["z"] == pytest.approx(-1100.0, abs=100.0)
+
+
+def test_lqr_heading():
+
+    hdg_com = 10.0 * np.pi/180.0
+    max_steps = 1e6
+
+    action = {"heading": hdg_com, "alt": -1000.0, "speed": 100.0}
+    a = _get_controlled_aircraft(controller="lqr")
+    ids = 0
+    while a.dict["yaw"] != pytest.approx(hdg_com, rel=1e-2):
+        a.act(action)
+        a.step(dt = 1 / FPS)
+        ids += 1
+        if ids > max_steps:
+            assert False
+    assert True
+
+
+def _get_controlled_aircraft(controller="pid"):
     path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data/")
     acft = Aircraft(aircraft_name="TO", data_path = path)
     acft.reset(pos=init_conditions["pos"], heading=init_conditions["heading"], airspeed=init_conditions["airspeed"])
-    return ControlledAircraft(aircraft=acft, dt=1/FPS)
\ No newline at end of file
+    return ControlledAircraft(aircraft=acft, dt=1/FPS, controller=controller)
\ No newline at end of file
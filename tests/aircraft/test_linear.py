@@ -0,0 +1,62 @@
+import os
+
+import numpy as np
+import pytest
+
+from flyer_env.aircraft.dynamics import AircraftModel
+from flyer_env.aircraft.linear import LinearModel, linear_model, linearise
+
+DT = 0.01
+
+
+def test_linear_prediction():
+    model = AircraftModel("TO")
+    linear = linear_model("TO", 100.0, 1000.0, dt=DT, cache_dir=None)
+    state = linear.state.copy()
+    state[[6, 8, 10]] += [1.0, 0.5, 0.01]
+    controls = linear.controls + [0.0, 0.005, 0.02, 0.0]
+    assert linear.predict(state, controls) == pytest.approx(
+        model.step(state, controls, DT), abs=1e-3
+    )
+
+
+def test_linear_modes_stable():
+    linear = linear_model("TO", 100.0, 1000.0, cache_dir=None)
+    assert linear.A.shape == (12, 12)
+    assert linear.B.shape == (12, 4)
+    # Exclude the neutrally stable position and heading states
+    eigenvalues = np.linalg.eigvals(
+        linear.A[3:, 3:][np.ix_([0, 1, 3, 4, 5, 6, 7, 8], [0, 1, 3, 4, 5, 6, 7, 8])]
+    )
+    assert (eigenvalues.real < 0.0).all()
+
+
+def test_batch_linearise():
+    model = AircraftModel("TO")
+    linear = [
+        linear_model("TO", airspeed, 1000.0, cache_dir=None)
+        for airspeed in (80.0, 120.0)
+    ]
+    states = np.stack([lm.state for lm in linear])
+    controls = np.stack([lm.controls for lm in linear])
+    A, B = linearise(model, states, controls)
+    for idx, lm in enumerate(linear):
+        assert A[idx] == pytest.approx(lm.A)
+        assert B[idx] == pytest.approx(lm.B)
+
+
+def test_linear_cache(tmp_path):
+    linear = linear_model("TO", 90.0, 500.0, dt=DT, cache_dir=str(tmp_path))
+    files = os.listdir(tmp_path)
+    assert len(files) == 1
+    loaded = LinearModel.load(os.path.join(tmp_path, files[0]))
+    assert loaded.dt == DT
+    assert loaded.A == pytest.approx(linear.A)
+    assert loaded.offset == pytest.approx(linear.offset)
+
+    # Files are named by the model they were built from, so a changed model is not loaded stale
+    assert AircraftModel("TO").digest() == AircraftModel("TO").digest()
+    heavier = AircraftModel(
+        "TO", parameters={"mass": 2.0 * AircraftModel("TO")["mass"]}
+    )
+    assert heavier.digest() != AircraftModel("TO").digest()
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from flyer_env.aircraft.dynamics import AircraftModel
+from flyer_env.aircraft.lqr import GainSchedule, LQRController, gain_schedule
+
+DT = 0.01
+
+
+def test_lqr_tracks_commands():
+    model = AircraftModel("TO")
+    controller = LQRController(gain_schedule("TO", DT, cache_dir=None), n_aircraft=3)
+    states = model.trim_state(100.0, 1000.0, 0.0, np.zeros(3))
+    headings = np.array([0.5, -2.0, 0.0])
+    z = np.array([-1000.0, -1100.0, -900.0])
+    airspeeds = np.array([100.0, 110.0, 80.0])
+
+    for step in range(int(70.0 / DT)):
+        if step % 10 == 0:
+            controller.update_schedule(airspeeds, -z)
+        states = model.step(states, controller(states, headings, z), DT)
+
+    assert states[:, 5] == pytest.approx(headings, abs=1e-2)
+    assert states[:, 2] == pytest.approx(z, abs=1.0)
+    assert np.linalg.norm(states[:, 6:9], axis=1) == pytest.approx(airspeeds, abs=0.5)
+
+
+def test_gain_schedule_cache(tmp_path):
+    schedule = gain_schedule("TO", DT, cache_dir=str(tmp_path))
+    (path,) = tmp_path.glob(f"TO_{DT}_*.npz")
+    loaded = GainSchedule.load(str(path))
+    assert loaded.gains == pytest.approx(schedule.gains)
+    gains, states, controls = loaded.lookup(
+        loaded.airspeeds[[1]], loaded.altitudes[[2]]
+    )
+    assert gains[0] == pytest.approx(schedule.gains[1, 2])
+    assert states[0] == pytest.approx(schedule.states[1, 2])
+    assert controls[0] == pytest.approx(schedule.controls[1, 2])
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from flyer_env.aircraft.controller import ControlledAircraft
+from flyer_env.aircraft.model_aircraft import ModelAircraft
+
+DT = 0.01
+
+
+def test_model_aircraft_trim():
+    aircraft = ModelAircraft("TO")
+    aircraft.reset(pos=[100.0, -50.0, -1000.0], heading=0.5, airspeed=100.0)
+    controls = dict(zip(["aileron", "elevator", "tla", "rudder"], aircraft.controls))
+    for _ in range(int(5.0 / DT)):
+        aircraft.act(controls)
+        aircraft.step(DT)
+    assert aircraft.position[2] == pytest.approx(-1000.0, abs=2.0)
+    assert aircraft.heading == pytest.approx(0.5, abs=1e-3)
+    assert aircraft.airspeed == pytest.approx(100.0, abs=0.5)
+    assert aircraft.goal_dist(
+        [100.0 + 500.0 * np.cos(0.5), -50.0 + 500.0 * np.sin(0.5), -1000.0]
+    ) == pytest.approx(0.0, abs=5.0)
+    assert not aircraft.crashed
+
+
+def test_model_aircraft_wind():
+    still = ModelAircraft("TO")
+    still.reset(pos=[0.0, 0.0, -1000.0], heading=0.0, airspeed=100.0)
+    windy = ModelAircraft("TO")
+    windy.reset(pos=[0.0, 0.0, -1000.0], heading=0.0, airspeed=100.0)
+
+    # A headwind gust raises the airspeed, the ground speed is unchanged
+    windy.step(DT, np.array([-10.0, 0.0, 0.0]))
+    still.step(DT)
+    assert windy.airspeed == pytest.approx(still.airspeed + 10.0, abs=0.1)
+    assert windy.dict["u"] == pytest.approx(still.dict["u"] + 10.0, abs=0.1)
+
+    # The wind disturbs the attitude, not just the position
+    for _ in range(int(2.0 / DT)):
+        windy.step(DT, np.array([-10.0, 5.0, 0.0]))
+        still.step(DT)
+    assert abs(windy.dict["pitch"] - still.dict["pitch"]) > 1e-3
+    assert abs(windy.dict["roll"] - still.dict["roll"]) > 1e-4
+
+
+def test_autopilot_holds_airspeed_in_wind():
+    aircraft = ModelAircraft("TO")
+    aircraft.reset(pos=[0.0, 0.0, -1000.0], heading=0.0, airspeed=100.0)
+    vehicle = ControlledAircraft(aircraft, DT, controller="lqr")
+    wind = np.array([0.0, 10.0, 0.0])
+    for _ in range(int(30.0 / DT)):
+        vehicle.act({"heading": 0.0, "alt": -1000.0, "speed": 100.0})
+        vehicle.step(DT, wind)
+    state = vehicle.dict
+    assert np.linalg.norm([state["u"], state["v"], state["w"]]) == pytest.approx(
+        100.0, abs=0.5
+    )
+    assert state["z"] == pytest.approx(-1000.0, abs=1.0)
+    # The crosswind carries the aircraft east
+    assert state["y"] > 50.0
+
+
+# The crash cases of test_crash, which a pyflyer aircraft crashes in
+crashes = {
+    "long-overspeed": ([0.0, 0.0, -2.0], [300.0, 0.0, 0.0], 0.0, True),
+    "lat-overspeed": ([0.0, 0.0, -2.0], [0.0, 0.0, 100.0], 0.0, True),
+    "over-rotate": ([0.0, 0.0, -2.0], [0.0, 0.0, 0.0], np.radians(40.0), True),
+    "under-rotate": ([0.0, 0.0, -2.0], [0.0, 0.0, 0.0], np.radians(-10.0), True),
+    "high": ([0.0, 0.0, -1000.0], [500.0, 0.0, 30.0], np.radians(40.0), False),
+}
+
+
+@pytest.mark.parametrize("crash_type", crashes)
+def test_model_aircraft_crash(crash_type):
+    position, velocity, angle, crashed = crashes[crash_type]
+    aircraft = ModelAircraft("TO")
+    aircraft.reset(pos=[0.0, 0.0, -1000.0], heading=0.0, airspeed=100.0)
+    aircraft.state[0:3] = position
+    aircraft.state[6:9] = velocity
+    # Rotated in roll or pitch alike
+    for axis in (3, 4):
+        aircraft.state[3:5] = 0.0
+        aircraft.state[axis] = angle
+        aircraft._check_crash()
+        assert aircraft.crashed == crashed
+    # A crash lasts until reset
+    aircraft.state[0:3] = [0.0, 0.0, -1000.0]
+    aircraft._check_crash()
+    assert aircraft.crashed == crashed
+    aircraft.reset(pos=[0.0, 0.0, -1000.0], heading=0.0, airspeed=100.0)
+    assert not aircraft.crashed
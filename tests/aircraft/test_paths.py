@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from flyer_env.aircraft.paths import (
+    Path,
+    arc,
+    clothoid,
+    dubins,
+    helix,
+    spline,
+    straight,
+)
+
+START_POSITION = [0.0, 0.0, -1000.0]
+
+
+def test_arc_geometry():
+    radius = 500.0
+    path = Path.from_segments([arc(radius, np.pi / 2)], START_POSITION)
+    assert path.length == pytest.approx(radius * np.pi / 2, rel=1e-4)
+    assert path.position(path.length) == pytest.approx(
+        [radius, radius, -1000.0], abs=0.1
+    )
+    assert path.heading(path.length) == pytest.approx(np.pi / 2, abs=1e-3)
+    assert path.curvature(np.linspace(10.0, path.length - 10.0, 20)) == pytest.approx(
+        1 / radius, rel=1e-2
+    )
+
+
+def test_helix_climbs():
+    path = Path.from_segments([helix(300.0, -2.0 * np.pi, 200.0)], START_POSITION)
+    assert path.position(path.length) == pytest.approx([0.0, 0.0, -1200.0], abs=0.1)
+    assert np.all(np.diff(path.positions[:, 2]) <= 0.0)
+
+
+def test_clothoid_curvature():
+    path = Path.from_segments(
+        [straight(100.0), clothoid(400.0, 0.0, 1 / 400.0)], START_POSITION
+    )
+    s = np.linspace(120.0, 480.0, 10)
+    assert path.curvature(s) == pytest.approx((s - 100.0) / 400.0**2, abs=1e-4)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_dubins_reaches_end_pose(seed):
+    rng = np.random.default_rng(seed)
+    start_heading = rng.uniform(-np.pi, np.pi)
+    end_position = [*rng.uniform(-3000.0, 3000.0, 2), -1100.0]
+    end_heading = rng.uniform(-np.pi, np.pi)
+    path = Path.from_segments(
+        [dubins(end_position, end_heading, 400.0)], START_POSITION, start_heading
+    )
+    assert path.position(path.length) == pytest.approx(end_position, abs=0.5)
+    heading_error = (
+        np.mod(path.heading(path.length) - end_heading + np.pi, 2.0 * np.pi) - np.pi
+    )
+    assert heading_error == pytest.approx(0.0, abs=0.02)
+    # Curvature is bounded by the turn radius
+    assert np.all(np.abs(path.curvature(path.s[5:-5])) < 1.05 / 400.0)
+
+
+@pytest.mark.parametrize("kind", ["cubic", "bspline"])
+def test_spline_through_waypoints(kind):
+    waypoints = [
+        [500.0, 200.0, -1000.0],
+        [1000.0, -200.0, -1050.0],
+        [1500.0, 0.0, -1100.0],
+    ]
+    path = Path.from_segments([spline(waypoints, kind)], START_POSITION)
+    distances = np.linalg.norm(
+        path.positions[:, None, :] - np.array(waypoints)[None], axis=-1
+    )
+    assert distances.min(axis=0) == pytest.approx(0.0, abs=1.0)
+
+
+def test_vectorized_evaluation_and_reference():
+    path = Path.from_config(
+        {
+            "name": "path",
+            "segments": [
+                {"type": "straight", "length": 500.0},
+                {"type": "arc", "radius": 400.0, "angle": 1.0},
+            ],
+        },
+        START_POSITION,
+    )
+    s = np.linspace(0.0, path.length, 1000)
+    assert path.position(s).shape == (1000, 3)
+    assert path.tangent(s).shape == (1000, 3)
+    assert np.linalg.norm(path.tangent(s), axis=1) == pytest.approx(1.0)
+
+    speed, dt = 100.0, 0.01
+    reference = path.reference(speed, dt, n_steps=1000)
+    assert reference.position(500) == pytest.approx(path.position(500 * dt * speed))
+    assert not reference.done(0)
+    assert reference.done(999)
@@ -0,0 +1,41 @@
+import gymnasium as gym
+import numpy as np
+import pytest
+
+from flyer_env.aircraft.dynamics import AircraftModel
+from flyer_env.aircraft.randomisation import ParameterRandomiser
+
+
+def test_sample_bounds():
+    randomiser = ParameterRandomiser("TO", {"mass": 0.2, "c_L_alpha": 0.1})
+    values = randomiser.sample(np.random.default_rng(0), 1000)
+    assert values.shape == (1000, 2)
+    ratio = values / randomiser.base
+    assert np.all(ratio[:, 0] >= 0.8) and np.all(ratio[:, 0] <= 1.2)
+    assert np.all(ratio[:, 1] >= 0.9) and np.all(ratio[:, 1] <= 1.1)
+
+
+def test_batched_model():
+    randomiser = ParameterRandomiser("TO")
+    values = randomiser.sample(np.random.default_rng(0), 8)
+    batched = randomiser.model(values)
+    state = AircraftModel.trim_state(100.0, 1000.0, 0.0, 0.05)
+    controls = np.array([0.0, -0.05, 0.3, 0.0])
+    derivatives = batched.derivatives(np.tile(state, (8, 1)), controls)
+    for idx in (0, 7):
+        single = randomiser.model(values[idx])
+        assert derivatives[idx] == pytest.approx(single.derivatives(state, controls))
+
+
+def test_env_randomisation():
+    env = gym.make(
+        "flyer-v1",
+        config={"randomisation": {"scales": {"mass": 0.2}, "pool_size": 4}},
+    )
+    env.reset(seed=0)
+    _, _, _, _, info = env.step(env.action_space.sample())
+    parameters = info["aircraft_parameters"]
+    assert parameters.dtype == np.float32
+    assert parameters.shape == (1,)
+    assert parameters[0] in env.unwrapped.randomiser.pool[:, 0].astype(np.float32)
+    env.close()
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from flyer_env.aircraft.dynamics import AircraftModel
+from flyer_env.aircraft.reachability import (
+    GlideFootprint,
+    glide_footprint,
+    glide_polar,
+    simulate_glides,
+)
+
+
+def test_straight_glide():
+    model = AircraftModel("TO")
+    c_l, c_d = glide_polar(model)
+    glide_ratio = np.max(c_l / c_d)
+    positions, times = simulate_glides(model, [60.0, 100.0], 1000.0, 0.0)
+    # Heading north, the glide covers about the best glide ratio times the height
+    assert positions[:, 1] == pytest.approx(0.0, abs=1e-6)
+    assert positions[0, 0] == pytest.approx(1000.0 * glide_ratio, rel=0.15)
+    # Extra airspeed is traded for height
+    assert positions[1, 0] > positions[0, 0]
+    assert np.all(times > 0.0)
+
+
+def test_glide_footprint(tmp_path):
+    footprint = GlideFootprint.build(
+        AircraftModel("TO"), heights=np.array([0.0, 500.0, 1000.0, 2000.0])
+    )
+    assert np.all(np.diff(footprint.ranges, axis=1) >= 0.0)
+    assert np.all(footprint.ranges[:, 1:, 0] > footprint.ranges[:, 1:, -1])
+    ranges, _ = footprint.lookup(80.0, 1000.0, [0.5, -0.5])
+    assert ranges[0] == pytest.approx(ranges[1])
+
+    position = np.array([[0.0, 0.0, -1000.0], [0.0, 0.0, -1000.0]])
+    targets = np.array([[3000.0, 0.0], [-3000.0, 0.0], [0.0, 2000.0]])
+    margin = footprint.margin(position, [0.0, np.pi], [80.0, 80.0], targets, 0.0)
+    assert margin.shape == (2, 3)
+    assert margin[0, 0] > 0.0 and margin[1, 1] > 0.0
+    assert margin[0, 0] == pytest.approx(margin[1, 1])
+    assert margin[0, 2] > 0.0
+    # A tail wind carries the aircraft further downwind
+    wind = np.array([[10.0, 0.0, 0.0], [10.0, 0.0, 0.0]])
+    windy = footprint.margin(position, [0.0, np.pi], [80.0, 80.0], targets, 0.0, wind)
+    assert windy[0, 0] > margin[0, 0]
+    assert windy[1, 1] < margin[1, 1]
+
+    glide_footprint.cache_clear()
+    cached = glide_footprint("TO", cache_dir=str(tmp_path))
+    (path,) = tmp_path.glob("TO_*.npz")
+    loaded = GlideFootprint.load(str(path))
+    assert np.array_equal(loaded.ranges, cached.ranges)
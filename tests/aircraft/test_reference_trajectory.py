@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from flyer_env.aircraft.trajectory import TrajectoryTarget
+
+DT = 1 / 120.0
+N_STEPS = 6000
+SPEED = 100.0
+START_POSITION = [100.0, 0.0, -1000.0]
+trajectories = [
+    ("sl", {}),
+    ("climb", {"final_height": 200.0, "climb_angle": 10.0 * np.pi / 180.0}),
+    ("descend", {"final_height": -200.0, "climb_angle": -20.0 * np.pi / 180.0}),
+    ("lt", {}),
+    ("rt", {"end_heading": 30.0 * np.pi / 180.0}),
+]
+
+
+@pytest.mark.parametrize("name, config", trajectories)
+def test_compile_matches_update(name, config):
+    tt = TrajectoryTarget(SPEED, list(START_POSITION))
+    reference = tt.compile(name, DT, N_STEPS, **config)
+
+    tt = TrajectoryTarget(SPEED, list(START_POSITION))
+    traj_funcs = {
+        "sl": tt.straight_and_level,
+        "climb": tt.climb,
+        "descend": tt.descend,
+        "lt": tt.left_turn,
+        "rt": tt.right_turn,
+    }
+    traj_func = traj_funcs[name](**config)
+    for tick in range(1, N_STEPS + 1):
+        pos, done = tt.update(traj_func, DT)
+        assert reference.position(tick) == pytest.approx(pos)
+        assert reference.heading(tick) == pytest.approx(tt.heading)
+        assert reference.done(tick) == done
+
+
+def test_compile_cache_and_batch_lookup():
+    tt = TrajectoryTarget(SPEED, list(START_POSITION))
+    reference = tt.compile("lt", DT, N_STEPS)
+    assert tt.compile("lt", DT, N_STEPS) is reference
+    assert tt.position == START_POSITION  # compiling does not move the target
+
+    ticks = np.array([0, 10, N_STEPS, N_STEPS + 100])
+    positions = reference.position(ticks)
+    assert positions.shape == (len(ticks), 3)
+    assert np.array_equal(
+        positions[-1], positions[-2]
+    )  # ticks past the end hold the final state
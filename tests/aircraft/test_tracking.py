@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from flyer_env.aircraft.tracking import TrackPoints
+
+TARGET_POINTS = [
+    [0.0, 0.0],
+    [5000.0, -5000.0],
+    [5000.0, -3000.0],
+    [3000.0, 0.0],
+    [400.0, 0.0],
+]
+
+
+def _fly(nav_track, positions, states, n_steps=20000, speed=8.0):
+    min_distance = np.inf
+    for _ in range(n_steps):
+        headings, states = nav_track.arc_path(positions, states)
+        positions = positions + speed * np.stack(
+            [np.cos(headings), np.sin(headings)], axis=1
+        )
+        min_distance = min(
+            min_distance, np.linalg.norm(positions[0] - nav_track.final_point)
+        )
+    return min_distance, states
+
+
+def test_fillet_geometry():
+    nav_track = TrackPoints({0: [0.0, 0.0], 1: [1000.0, 0.0], 2: [1000.0, 1000.0]})
+    assert nav_track.n_fillets == 1
+    assert nav_track.filet_angle[0] == pytest.approx(np.pi / 2)
+    assert nav_track.centres[0] == pytest.approx([500.0, 500.0])
+    assert nav_track.z_in[0] == pytest.approx([500.0, 0.0])
+    assert nav_track.z_out[0] == pytest.approx([1000.0, 500.0])
+    assert nav_track.turning_direction[0] == 1.0
+
+
+def test_batch_matches_scalar():
+    goal_set = {idx: point for (idx, point) in enumerate(TARGET_POINTS)}
+    nav_track = TrackPoints(goal_set)
+    rng = np.random.default_rng(0)
+    positions = rng.uniform(-500.0, 500.0, (4, 2))
+    states = np.zeros((4, 2), dtype=int)
+    scalar_tracks = [TrackPoints(goal_set) for _ in positions]
+
+    for _ in range(2000):
+        headings, states = nav_track.arc_path(positions, states)
+        for idx, track in enumerate(scalar_tracks):
+            assert track.arc_path(positions[idx]) == headings[idx]
+            assert (track.goal_state, track.control_state) == tuple(states[idx])
+        positions = positions + 8.0 * np.stack(
+            [np.cos(headings), np.sin(headings)], axis=1
+        )
+
+
+def test_reaches_final_waypoint():
+    goal_set = {idx: point for (idx, point) in enumerate(TARGET_POINTS)}
+    nav_track = TrackPoints(goal_set)
+    min_distance, states = _fly(
+        nav_track, np.zeros((1, 2)), np.zeros((1, 2), dtype=int)
+    )
+    assert states[0, 0] == nav_track.n_fillets
+    assert min_distance < 10.0
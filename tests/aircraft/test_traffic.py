@@ -0,0 +1,69 @@
+import numpy as np
+
+from flyer_env.aircraft.traffic import Traffic
+
+
+def _fly(traffic, target, seconds):
+    speed = np.hypot(target["u"], target["v"])
+    for _ in range(int(seconds / traffic.dt)):
+        target["x"] += speed * traffic.dt * np.cos(target["yaw"])
+        target["y"] += speed * traffic.dt * np.sin(target["yaw"])
+        traffic.step(target)
+
+
+def test_cruise():
+    traffic = Traffic(20, 1 / 120.0)
+    traffic.reset(np.random.default_rng(0), np.array([0.0, 0.0, -1000.0]))
+    headings, altitudes = traffic.headings.copy(), traffic.altitudes.copy()
+    for _ in range(600):
+        traffic.step()
+    assert traffic.states.shape == (20, 12)
+    assert np.all(
+        np.abs(np.angle(np.exp(1j * (traffic.states[:, 5] - headings)))) < 0.05
+    )
+    assert np.all(np.abs(-traffic.states[:, 2] - altitudes) < 10.0)
+
+
+def test_formation():
+    traffic = Traffic(3, 1 / 120.0, "formation")
+    target = {
+        "x": 0.0,
+        "y": 0.0,
+        "z": -1000.0,
+        "yaw": 0.5,
+        "u": 100.0,
+        "v": 0.0,
+        "w": 0.0,
+    }
+    traffic.reset(np.random.default_rng(0), np.array([0.0, 0.0, -1000.0]), 0.5)
+    _fly(traffic, target, 30.0)
+    c, s = np.cos(0.5), np.sin(0.5)
+    aim = np.array([target["x"], target["y"]]) + traffic.slots @ np.array(
+        [[c, s], [-s, c]]
+    )
+    np.testing.assert_allclose(traffic.positions[:, :2], aim, atol=10.0)
+
+
+def test_pursuit():
+    traffic = Traffic(3, 1 / 120.0, "pursuit")
+    target = {
+        "x": 2000.0,
+        "y": 0.0,
+        "z": -1000.0,
+        "yaw": 0.0,
+        "u": 80.0,
+        "v": 0.0,
+        "w": 0.0,
+    }
+    traffic.reset(
+        np.random.default_rng(1),
+        np.array([0.0, 0.0, -1000.0]),
+        radius=1000.0,
+        altitude_range=(900.0, 1100.0),
+    )
+    # Chase from behind the target
+    traffic.states[:, 5] = 0.0
+    start = np.hypot(*(traffic.positions[:, :2] - [target["x"], target["y"]]).T)
+    _fly(traffic, target, 60.0)
+    end = np.hypot(*(traffic.positions[:, :2] - [target["x"], target["y"]]).T)
+    assert np.all(end < 0.6 * start)
@@ -1,7 +1,10 @@
 import pytest
 import os
+import numpy as np
 
 from pyflyer import Aircraft
+from flyer_env.aircraft.dynamics import AircraftModel
+from flyer_env.aircraft.trim import TrimTable, solve_trim, solve_trim_batch, trim_residuals, trim_table
 
 aircraft_types = ["TO"]  # Only setup for TO for now
 trim_results = {
@@ -21,3 +24,75 @@ trim_results = {
 #     assert trim[0] == pytest.approx(trim_results[aircraft_type][0], abs=1e-1)  # pitch attitude
 #     assert trim[1] == pytest.approx(trim_results[aircraft_type][1], rel=1e-2)  # elevator trim position
 #     assert trim[2] == pytest.approx(trim_results[aircraft_type][2], rel=1e-1)  # TLA trim position
+
+
+@pytest.mark.parametrize("aircraft_type", aircraft_types)
+def test_trim_table(aircraft_type):
+    table = trim_table(aircraft_type)
+    trim = table.lookup(100.0, 1000.0)
+    assert trim[2] == pytest.approx(trim_results[aircraft_type][2], rel=1e-2)  # TLA trim position
+    assert trim[1] == pytest.approx(trim_results[aircraft_type][1], abs=1e-2)  # elevator trim position
+    # Level flight at 100 m/s is held within the thrust limits at every altitude
+    level = table.axes[0] == 100.0, table.axes[2] == 0.0
+    assert (table.residuals[level[0]][..., level[1]] < 1e-6).all()
+    tla = table.values[level[0]][..., level[1], 2]
+    assert ((tla >= 0.0) & (tla <= 1.0)).all()
+
+
+def test_trim_table_interpolation():
+    table = trim_table("TO")
+    grid = table.lookup(
+        table.axes[0][:, None, None], table.axes[1][None, :, None], table.axes[2][None, None, :]
+    )
+    assert grid == pytest.approx(table.values)
+
+    # Between grid points the interpolated trim is close to a direct solve
+    model = AircraftModel("TO")
+    point = (95.0, 1250.0, np.deg2rad(1.25))
+    solved, residual = solve_trim(model, *point)
+    assert residual < 1e-6
+    assert table.lookup(*point) == pytest.approx(solved, abs=5e-3)
+    assert np.abs(trim_residuals(model, *point, table.lookup(*point))).max() < 0.1
+
+    # Batched lookups match scalar lookups and clamp outside the grid
+    airspeeds = np.array([60.0, 95.0, 300.0])
+    batch = table.lookup(airspeeds, 1250.0)
+    for airspeed, trim in zip(airspeeds, batch):
+        assert trim == pytest.approx(table.lookup(airspeed, 1250.0))
+    assert batch[-1] == pytest.approx(table.lookup(table.axes[0][-1], 1250.0))
+
+
+def test_trim_table_save_load(tmp_path):
+    model = AircraftModel("TO")
+    table = TrimTable.build(model, [90.0, 100.0], [0.0, 1000.0], [0.0, 0.05])
+    table.save(os.path.join(tmp_path, "TO.npz"))
+    loaded = TrimTable.load(os.path.join(tmp_path, "TO.npz"))
+    assert loaded.values == pytest.approx(table.values)
+    assert loaded.residuals == pytest.approx(table.residuals)
+    assert loaded.diagnostics == {}
+    with np.load(os.path.join(tmp_path, "TO.npz")) as data:
+        assert sorted(data.files) == ["airspeeds", "altitudes", "gammas", "residuals", "values"]
+    assert loaded.lookup(95.0, 500.0, 0.025) == pytest.approx(table.lookup(95.0, 500.0, 0.025))
+
+
+def test_trim_table_cache(tmp_path):
+    table = trim_table("TO", str(tmp_path))
+    (path,) = tmp_path.glob("TO_*.npz")
+    loaded = TrimTable.load(str(path))
+    assert loaded.values == pytest.approx(table.values)
+    assert loaded.residuals == pytest.approx(table.residuals)
+
+
+def test_population_trim():
+    model = AircraftModel("TO")
+    airspeeds = np.array([70.0, 100.0, 130.0])[:, None]
+    gammas = np.deg2rad([-5.0, 0.0, 5.0])[None, :]
+    trims, diagnostics = solve_trim_batch(model, airspeeds, 1000.0, gammas)
+    assert trims.shape == (3, 3, 3)
+    assert diagnostics["converged"].all()
+    assert diagnostics["history"].shape[1:] == (3, 3)
+    assert (np.diff(diagnostics["history"], axis=0) <= 1e-12).all()
+    for ida, airspeed in enumerate(airspeeds[:, 0]):
+        for idg, gamma in enumerate(gammas[0]):
+            solved, _ = solve_trim(model, airspeed, 1000.0, gamma)
+            assert trims[ida, idg] == pytest.approx(solved, abs=1e-6)
@@ -6,7 +6,8 @@ action_configs = [
     {"type": "LongitudinalAction"},
     {"type": "HeadingAction"},
     {"type": "ControlledAction"},
-    {"type": "PursuitAction"}
+    {"type": "PursuitAction"},
+    {"type": "TrackAction", "n_points": 2}
 ]
 
 
@@ -1,6 +1,8 @@
 import gymnasium as gym
+import numpy as np
 import pytest
 
+from flyer_env.aircraft.model_aircraft import ModelAircraft
 from flyer_env.envs.flyer_env import FlyerEnv
 
 envs = ["flyer-v1",
@@ -35,3 +37,114 @@ def test_env_reset_options(env_spec: str = "flyer-v1"):
     update_duration = default_duration * 2
     env.reset(options={"config": {"duration": update_duration}})
     assert env.unwrapped.config["duration"] == update_duration
+
+
+@pytest.mark.parametrize("env_spec", envs)
+def test_env_wind(env_spec):
+    env = gym.make(env_spec, config={"wind": {"speed": 10.0, "turbulence": "light"}})
+    env.reset()
+    # The aircraft is flown through the wind by the vectorized model
+    vehicle = env.unwrapped.vehicle
+    assert isinstance(getattr(vehicle, "aircraft", vehicle), ModelAircraft)
+    _, _, _, _, info = env.step(env.action_space.sample())
+    assert np.linalg.norm(info["wind"]) > 0.0
+    env.close()
+
+
+def test_trajectory_info():
+    env = gym.make("trajectory-v1", config={"wind": {"speed": 10.0}})
+    env.reset()
+    _, _, _, _, info = env.step(env.action_space.sample())
+    # The trajectory target is added to the information of the base environment
+    assert info["t_pos"] == pytest.approx(env.unwrapped.goal)
+    assert "wind" in info
+    env.close()
+
+
+def test_forced_landing_touchdown():
+    env = gym.make("forced_landing-v1")
+    env.reset()
+    unwrapped = env.unwrapped
+    sites = unwrapped.landing_sites
+    x, y = sites.positions[0].tolist()
+    elevation = float(sites.elevations[0])
+    aircraft = getattr(unwrapped.vehicle, "aircraft", unwrapped.vehicle)
+
+    # By default the aircraft touches down on sea level
+    aircraft.reset(pos=[x, y, -(elevation + 1.0)], heading=0.0, airspeed=50.0)
+    assert unwrapped._touched_down() == (elevation + 1.0 <= 2.0)
+    aircraft.reset(pos=[x, y, -1.0], heading=0.0, airspeed=50.0)
+    assert unwrapped._touched_down()
+
+    # On the terrain, above it is not a touchdown, even above sea level
+    unwrapped.config["terrain_touchdown"] = True
+    aircraft.reset(pos=[x, y, -(elevation + 100.0)], heading=0.0, airspeed=50.0)
+    assert not unwrapped._touched_down()
+    assert unwrapped._landing_reward() == 0.0
+
+    # Touching down on an elevated landing site is rewarded and ends the episode
+    aircraft.reset(pos=[x, y, -(elevation + 1.0)], heading=0.0, airspeed=50.0)
+    assert unwrapped._touched_down()
+    assert unwrapped._landing_reward() > 0.0
+    assert unwrapped._is_terminated()
+    env.close()
+
+
+def test_runways_match_world():
+    extra = {
+        "runway_position": [4000.0, -3000.0],
+        "runway_width": 30.0,
+        "runway_length": 1500.0,
+        "runway_heading": 0.5 * np.pi,
+    }
+    env = gym.make("runway-v1", config={"runways": [extra]})
+    env.reset()
+    unwrapped = env.unwrapped
+    runway = unwrapped.runway
+
+    # Points along and across the primary runway, either side of its ends and edges, agree with the world's runway
+    along, cross = np.meshgrid(
+        np.linspace(-105.0, runway.length + 105.0, 36),
+        np.array([-0.8, -0.4, 0.0, 0.4, 0.8]) * runway.width,
+    )
+    local = np.stack([along.ravel(), cross.ravel()], axis=-1)
+    points = runway.threshold + local @ runway.rotation
+    on_runway = [unwrapped.world.point_on_runway(point.tolist()) for point in points]
+    assert np.array_equal(runway.contains(points), on_runway)
+
+    # Every runway is added to the world
+    assert unwrapped.world.point_on_runway(extra["runway_position"])
+    env.close()
+
+
+def test_traffic_wind():
+    traffic = {"count": 3, "mode": "cruise"}
+    still = gym.make("flyer-v1", config={"traffic": traffic})
+    windy = gym.make("flyer-v1", config={"traffic": traffic, "wind": {"speed": 20.0}})
+    still.reset(seed=0)
+    windy.reset(seed=0)
+    # The wind model covers the ego aircraft and the traffic
+    assert windy.unwrapped.wind.n_aircraft == 1 + traffic["count"]
+    start = windy.unwrapped.traffic.positions.copy()
+    assert np.array_equal(start, still.unwrapped.traffic.positions)
+
+    action = still.action_space.sample()
+    for _ in range(10):
+        still.step(action)
+        windy.step(action)
+    assert not np.allclose(
+        windy.unwrapped.traffic.positions, still.unwrapped.traffic.positions
+    )
+    still.close()
+    windy.close()
+
+
+@pytest.mark.parametrize("env_spec", envs)
+def test_env_tile_map(env_spec):
+    env = gym.make(env_spec, config={"obstacles": {"tiles": True}})
+    env.reset()
+    unwrapped = env.unwrapped
+    # The world's tiles are drawn, and their obstacle tiles rasterised
+    assert unwrapped.tile_map.shape == tuple(unwrapped.config["area"])
+    assert np.any(unwrapped.obstacle_map.distances < 0.0)
+    env.close()
@@ -1,12 +1,193 @@
+import gymnasium as gym
+import numpy as np
 import pytest
 
 from flyer_env.envs.common.abstract import AbstractEnv
 from flyer_env.envs.common.observation import observation_factory
 
-spec = ["Dynamics"]
+spec = ["Dynamics", "Image"]
 
 
 @pytest.mark.parametrize("obs_spec", spec)
 def test_observation(obs_spec):
     config = {"type": obs_spec}
     observation_factory(AbstractEnv, config)
+
+
+@pytest.mark.parametrize("grayscale", [True, False])
+def test_image_observation(grayscale):
+    obs_config = {
+        "type": "Image",
+        "observation_shape": (32, 32),
+        "stack_size": 3,
+        "grayscale": grayscale,
+        "downsample": 2,
+    }
+    env = gym.make("flyer-v1", config={"observation": obs_config})
+    obs, _ = env.reset()
+    assert env.observation_space.contains(obs)
+    assert obs.dtype == np.uint8
+    # The stack is filled with the first frame on reset
+    assert np.array_equal(obs[0], obs[-1])
+
+    last_obs = obs
+    for _ in range(3):
+        obs, _, _, _, _ = env.step(env.action_space.sample())
+        assert env.observation_space.contains(obs)
+        # Frames shift back through the stack each step
+        assert np.array_equal(obs[:-1], last_obs[1:])
+        last_obs = obs
+    env.close()
+
+
+def test_image_observation_matches_render():
+    obs_config = {
+        "type": "Image",
+        "observation_shape": (48, 48),
+        "stack_size": 2,
+        "grayscale": False,
+    }
+    env = gym.make(
+        "flyer-v1",
+        config={"observation": obs_config, "screen_size": 48},
+        render_mode="rgb_array",
+    )
+    obs, _ = env.reset()
+    # Frames are in the same orientation as the rendered frames
+    assert np.array_equal(obs[-1], env.render())
+    env.close()
+
+
+def test_terrain_patch_observation():
+    env = gym.make(
+        "forced_landing-v1",
+        config={"observation": {"type": "TerrainPatch", "patch_shape": (8, 12)}},
+    )
+    obs, _ = env.reset()
+    assert env.observation_space.contains(obs)
+    assert obs["terrain"].shape == (8, 12)
+
+    # The first row is furthest ahead, and the window turns with the aircraft's heading
+    observation = env.unwrapped.observation_type
+    assert observation.forward[0] > observation.forward[-1]
+    patch = observation.patches(
+        np.array([[0.0, 0.0, -1000.0]]), np.array([0.5 * np.pi])
+    )
+    expected = env.unwrapped.heightmap.height(-observation.right, observation.forward)
+    assert patch[0].ravel() == pytest.approx(expected - 1000.0, abs=1e-2)
+    env.close()
+
+
+def test_terrain_range_observation():
+    env = gym.make(
+        "forced_landing-v1",
+        config={"observation": {"type": "TerrainRange", "max_range": 3000.0}},
+    )
+    obs, _ = env.reset()
+    assert env.observation_space.contains(obs)
+    observation = env.unwrapped.observation_type
+    assert obs["ranges"].shape == (len(observation.directions),)
+
+    # The last ray looks straight down
+    heightmap = env.unwrapped.heightmap
+    ranges = observation.ranges(np.array([[0.0, 0.0, -1000.0]]), np.array([0.3]))
+    assert ranges[0, -1] == pytest.approx(1000.0 - heightmap.height([0.0], [0.0])[0])
+    assert np.all(ranges <= 3000.0)
+    env.close()
+
+
+def test_landing_site_observation():
+    env = gym.make(
+        "forced_landing-v1",
+        config={"observation": {"type": "LandingSites", "sites_count": 3}},
+    )
+    obs, _ = env.reset()
+    assert env.observation_space.contains(obs)
+    assert obs["sites"].shape == (3, 4)
+
+    # Sites are given in the heading frame, best first
+    observation = env.unwrapped.observation_type
+    landing_sites = env.unwrapped.landing_sites
+    sites = observation.sites(np.array([[0.0, 0.0, -2000.0]]), np.array([0.5 * np.pi]))
+    found = sites[0, :, 3] > 0.0
+    assert np.all(np.diff(sites[0, found, 3]) <= 0.0)
+    best = landing_sites.positions[
+        np.argmin(np.abs(landing_sites.scores - sites[0, 0, 3]))
+    ]
+    assert sites[0, 0, :2] == pytest.approx([best[1], -best[0]], abs=1e-2)
+    env.close()
+
+
+def test_approach_observation():
+    env = gym.make("runway-v1", config={"observation": {"type": "Approach"}})
+    obs, _ = env.reset()
+    assert env.observation_space.contains(obs)
+    runway = env.unwrapped.runway
+    state = env.unwrapped.vehicle.dict
+    position = np.array([[state["x"], state["y"], state["z"]]])
+    assert obs["approach"][:3] == pytest.approx(runway.to_local(position)[0], abs=1e-2)
+    env.close()
+
+
+def test_nearest_approach_observation():
+    env = gym.make(
+        "runway-v1",
+        config={"runways": 20, "observation": {"type": "Approach", "nearest": True}},
+    )
+    obs, _ = env.reset()
+    assert env.observation_space.contains(obs)
+    assert len(env.unwrapped.runways) > 1
+    env.close()
+
+
+@pytest.mark.parametrize("mode", ["cruise", "formation", "pursuit"])
+def test_traffic_observation(mode):
+    env = gym.make(
+        "flyer-v1",
+        config={
+            "traffic": {"count": 3, "mode": mode},
+            "observation": {"type": "Dynamics", "vehicles_count": 5},
+        },
+    )
+    obs, info = env.reset()
+    assert obs.shape == (5, 12)
+    assert np.any(obs[1:4] != 0.0)
+    assert np.all(obs[4] == 0.0)
+    obs, _, _, _, info = env.step(env.action_space.sample())
+    assert "separation_violations" in info
+    assert info["collisions"] <= info["separation_violations"]
+    env.close()
+
+
+def test_obstacle_observation():
+    env = gym.make(
+        "flyer-v1",
+        config={
+            "obstacles": {
+                "shapes": [{"position": (0.0, 2000.0), "radius": 500.0}],
+                "tiles": True,
+            },
+            "observation": {"type": "Obstacles"},
+        },
+    )
+    obs, info = env.reset()
+    assert env.observation_space.contains(obs)
+    assert info["obstacle_distance"] == pytest.approx(obs["obstacle"][0], abs=1.0)
+    env.close()
+
+
+def test_streamed_terrain_observation():
+    env = gym.make(
+        "flyer-v1",
+        config={
+            "terrain_streaming": {"chunk_size": 2000.0, "capacity": 32},
+            "observation": {"type": "TerrainRange", "max_range": 3000.0},
+        },
+    )
+    obs, _ = env.reset()
+    assert env.observation_space.contains(obs)
+    for _ in range(5):
+        obs, _, _, _, _ = env.step(env.action_space.sample())
+    terrain = env.unwrapped.heightmap
+    assert 0 < len(terrain) <= 32
+    env.close()
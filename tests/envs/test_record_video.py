@@ -0,0 +1,38 @@
+import gymnasium as gym
+import pytest
+
+from flyer_env import RecordVideo
+
+FPS = 5.0
+
+
+@pytest.mark.parametrize("video_length", [0, 3])
+def test_record_video_frames(tmp_path, video_length):
+    env = gym.make("flyer-v1", render_mode="rgb_array")
+    env.unwrapped.configure({"duration": 2.0, "simulation_frequency": 50.0})
+    env = RecordVideo(
+        env, str(tmp_path), fps=FPS, video_length=video_length, disable_logger=True
+    )
+
+    renders = []
+    render = env.unwrapped.render
+
+    def counted_render():
+        renders.append(env.unwrapped.time)
+        return render()
+
+    env.unwrapped.render = counted_render
+
+    env.reset()
+    terminated = truncated = False
+    while not (terminated or truncated):
+        _, _, terminated, truncated, _ = env.step(env.action_space.sample())
+    env.close()
+
+    if video_length > 0:
+        # Only the clip is rendered, not the rest of the episode
+        assert len(renders) == video_length + 1
+    else:
+        # One frame at reset then one every 1 / FPS seconds of simulated time
+        assert len(renders) <= int(env.unwrapped.time * FPS) + 1
+    assert renders[1] == pytest.approx(1.0 / FPS, abs=1.0 / 50.0)
@@ -2,6 +2,8 @@ import gymnasium as gym
 import numpy as np
 import pytest
 
+from flyer_env.envs.common.graphics import TopDownRenderer
+
 envs = ["flyer-v1",
         "trajectory-v1",
         "runway-v1",
@@ -24,3 +26,69 @@ def test_render(env_spec):
         3
     )  # (H,W,C)
 
+
+
+@pytest.mark.parametrize("env_spec", envs)
+def test_numpy_render(env_spec):
+    env = gym.make(
+        env_spec, render_mode="rgb_array", config={"render_backend": "numpy"}
+    )
+    env.reset()
+    img = env.render()
+    env.close()
+    assert isinstance(img, np.ndarray)
+    assert img.dtype == np.uint8
+    assert img.shape == (
+        env.unwrapped.config["screen_size"],
+        env.unwrapped.config["screen_size"],
+        3
+    )  # (H,W,C)
+
+
+def test_numpy_render_batch():
+    n_envs = 4
+    envs = [gym.make("runway-v1").unwrapped for _ in range(n_envs)]
+    for env in envs:
+        env.reset()
+        env.step(env.action_space.sample())
+    renderer = TopDownRenderer(screen_size=(64, 96), resolution=10.0)
+    frames = renderer.render_envs(envs)
+    assert frames.shape == (n_envs, 64, 96, 3)
+    # Envs sharing a world share the cached static layer
+    assert len(renderer._layers) == min(
+        renderer.cache_size, len({renderer.layer_key(env) for env in envs})
+    )
+    for env, frame in zip(envs, frames):
+        assert np.array_equal(frame, renderer.render_envs([env])[0])
+
+
+def test_static_layer_cache_is_bounded():
+    renderer = TopDownRenderer(screen_size=(32, 32), resolution=50.0, cache_size=2)
+    layers = [
+        renderer.static_layer((16, 16), 25.0, key=(seed,)) for seed in range(3)
+    ]
+    assert list(renderer._layers) == [(1,), (2,)]
+    # A cached layer is reused and marked as recently used
+    assert renderer.static_layer((16, 16), 25.0, key=(1,)) is layers[1]
+    renderer.static_layer((16, 16), 25.0, key=(0,))
+    assert list(renderer._layers) == [(1,), (0,)]
+
+
+def test_static_layer_draws_all_runways():
+    extra = {
+        "runway_position": [4000.0, -3000.0],
+        "runway_width": 30.0,
+        "runway_length": 1500.0,
+        "runway_heading": 0.5 * np.pi,
+    }
+    env = gym.make("runway-v1", config={"runways": [extra]}).unwrapped
+    env.reset()
+    renderer = TopDownRenderer(screen_size=(32, 32), resolution=10.0)
+    assert len(renderer.runways(env)) == 2
+    layer, origin = renderer.static_layer(
+        env.config["area"], env.config["scaling"], runways=renderer.runways(env)
+    )
+    for runway in renderer.runways(env):
+        row = int((origin[0] - runway.position[0]) / renderer.resolution)
+        col = int((runway.position[1] - origin[1]) / renderer.resolution)
+        assert np.array_equal(layer[row, col], renderer.RUNWAY_COLOUR)
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from flyer_env.world.chunks import ChunkedTerrain, chunk_seed
+
+
+def test_chunks_are_seamless_and_deterministic():
+    terrain = ChunkedTerrain(3, chunk_size=2000.0, capacity=32, view_distance=2000.0)
+    x = np.linspace(-5000.0, 5000.0, 401)
+    y = np.linspace(-3000.0, 3000.0, 401)
+    heights = terrain.height(x, y)
+    assert np.all((heights >= 0.0) & (heights <= 400.0))
+
+    # Chunks generated in another order give the same terrain
+    other = ChunkedTerrain(3, chunk_size=2000.0, capacity=32, view_distance=2000.0)
+    np.testing.assert_allclose(other.height(x[::-1], y[::-1])[::-1], heights)
+
+    # No step across the border between chunks
+    border = terrain.height([1999.999, 2000.0, 2000.001], [123.0, 123.0, 123.0])
+    assert np.ptp(border) < 0.01
+
+    # Grid samples are the noise at the sample
+    assert terrain.height([2100.0], [-300.0])[0] == pytest.approx(
+        terrain.generate((1, -1))[1, 17], abs=1e-3
+    )
+    assert chunk_seed(3, (1, -1)) == terrain.chunk_seed((1, -1))
+    assert chunk_seed(3, (1, -1)) != chunk_seed(3, (-1, 1))
+
+
+def test_chunk_cache_eviction_and_prefetch():
+    terrain = ChunkedTerrain(
+        1, chunk_size=1000.0, capacity=12, view_distance=1000.0, prefetch=2
+    )
+    terrain.update(np.array([500.0, 500.0, -100.0]), 0.0)
+    assert (2, 0) in terrain.chunks and (3, 0) in terrain.chunks
+    for x in np.arange(500.0, 20000.0, 100.0):
+        terrain.update(np.array([x, 500.0, -100.0]), 0.0)
+        assert len(terrain) <= 12
+        i = int(x // 1000.0)
+        # The chunks around and ahead of the aircraft are loaded
+        assert (i - 1, 1) in terrain.chunks and (i + 3, 0) in terrain.chunks
+    assert terrain.evictions > 0
+    misses = terrain.misses
+    terrain.height([19950.0], [500.0])
+    assert terrain.misses == misses
+
+    with pytest.raises(ValueError):
+        ChunkedTerrain(1, chunk_size=1000.0, capacity=8, view_distance=1000.0)
+
+
+def test_chunked_raycast():
+    terrain = ChunkedTerrain(5, chunk_size=2000.0, capacity=32, view_distance=2000.0)
+    origins = np.array([[100000.0, 50000.0, -1000.0]])
+    directions = np.array([[0.0, 0.0, 1.0]])
+    distance = terrain.raycast(origins, directions, 2000.0)
+    ground = terrain.height(origins[:, 0], origins[:, 1])
+    np.testing.assert_allclose(distance, 1000.0 - ground, atol=0.5)
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from flyer_env.world.conflicts import Conflicts, candidate_pairs, closest_approach
+
+
+@pytest.mark.parametrize("count", [10, 100, 1000])
+def test_conflicts(count):
+    rng = np.random.default_rng(count)
+    positions = rng.uniform(-3000.0, 3000.0, (count, 3))
+    velocities = rng.normal(0.0, 60.0, (count, 3))
+    conflicts = Conflicts.detect(positions, velocities, 1.0, separation=200.0)
+
+    # Brute force over every pair
+    pairs = np.stack(np.triu_indices(count, 1), axis=-1)
+    times, distances = closest_approach(positions, velocities, pairs, 1.0)
+    expected = distances < 200.0
+    np.testing.assert_array_equal(conflicts.pairs, pairs[expected])
+    np.testing.assert_allclose(conflicts.times, times[expected])
+    np.testing.assert_allclose(conflicts.distances, distances[expected])
+
+
+def test_candidate_pairs():
+    positions = np.array(
+        [[0.0, 0.0, 0.0], [0.0, 0.0, 0.0], [90.0, 90.0, -90.0], [500.0, 0.0, 0.0]]
+    )
+    pairs = sorted(tuple(sorted(pair)) for pair in candidate_pairs(positions, 100.0))
+    assert pairs == [(0, 1), (0, 2), (1, 2)]
+
+
+def test_head_on_collision():
+    # Two aircraft 100 m apart closing at 100 m/s pass through each other mid-tick
+    positions = np.array(
+        [[0.0, 0.0, -100.0], [100.0, 0.0, -100.0], [0.0, 5000.0, -100.0]]
+    )
+    velocities = np.array([[50.0, 0.0, 0.0], [-50.0, 0.0, 0.0], [50.0, 0.0, 0.0]])
+    conflicts = Conflicts.detect(positions, velocities, 2.0)
+    assert len(conflicts) == 1
+    assert conflicts.pairs.tolist() == [[0, 1]]
+    assert conflicts.times[0] == pytest.approx(1.0)
+    assert conflicts.distances[0] == pytest.approx(0.0)
+    assert conflicts.collisions[0]
+    assert len(conflicts.involving(2)) == 0
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+from opensimplex import OpenSimplex
+
+from flyer_env.envs.common.graphics import TopDownRenderer
+from flyer_env.world.chunks import ChunkedTerrain
+from flyer_env.world.generator import TerrainGenerator, permutation, simplex2, tile_map
+
+
+@pytest.mark.parametrize("seed", [0, 7, 12345])
+def test_simplex2_matches_opensimplex(seed):
+    noise = OpenSimplex(seed)
+    points = np.random.default_rng(seed).uniform(-50.0, 50.0, (500, 2))
+    expected = [noise.noise2(x, y) for x, y in points]
+    np.testing.assert_allclose(
+        simplex2(permutation(seed), points[:, 0], points[:, 1]), expected, atol=1e-12
+    )
+
+
+def test_heights_are_deterministic_and_regional():
+    generator = TerrainGenerator(3)
+    x = np.arange(0.0, 4000.0, 100.0)
+    y = np.arange(-2000.0, 3000.0, 100.0)
+    heights = generator.heights(x, y)
+    assert heights.shape == (40, 50)
+    assert np.all((heights >= 0.0) & (heights <= 400.0))
+    np.testing.assert_array_equal(TerrainGenerator(3).heights(x, y), heights)
+    assert not np.allclose(TerrainGenerator(4).heights(x, y), heights)
+    # A region generated on its own matches the same region of a larger grid
+    np.testing.assert_allclose(
+        generator.heights(x[10:20], y[5:15]), heights[10:20, 5:15]
+    )
+
+
+def test_pyramid_levels():
+    generator = TerrainGenerator(1, wavelength=8000.0, octaves=5)
+    pyramid = generator.pyramid((-1000.0, 500.0), (8000.0, 4000.0), 250.0, levels=4)
+    assert [level.heights.shape for level in pyramid] == [
+        (33, 17),
+        (17, 9),
+        (9, 5),
+        (5, 3),
+    ]
+    assert [level.resolution for level in pyramid] == [250.0, 500.0, 1000.0, 2000.0]
+    # Coarse levels leave out the octaves they cannot resolve
+    assert [generator.octaves_at(level.resolution) for level in pyramid] == [5, 4, 3, 2]
+    # The coarsest octaves agree at the samples the levels share
+    np.testing.assert_allclose(
+        pyramid[1].heights, pyramid[0].heights[::2, ::2], atol=0.1 * generator.amplitude
+    )
+
+
+def test_biomes_and_tiles():
+    generator = TerrainGenerator(2)
+    x = np.arange(0.0, 20000.0, 200.0)
+    y = np.arange(0.0, 20000.0, 200.0)
+    biomes = generator.biomes(x, y)
+    heights = generator.heights(x, y) / generator.amplitude
+    assert np.all((biomes == 0) == (heights < generator.sea_level))
+    assert np.all(heights[biomes == 4] > generator.highland)
+    assert len(np.unique(biomes)) > 2
+
+    tile_names = TopDownRenderer.TILES
+    tiles = generator.tiles(x, y, tile_names, seed=9)
+    np.testing.assert_array_equal(generator.tiles(x, y, tile_names, seed=9), tiles)
+    assert np.all(np.array(tile_names)[tiles[biomes == 0]] == "water")
+    assert set(np.array(tile_names)[tiles[biomes == 2]]) <= set(
+        TerrainGenerator.BIOME_TILES["grass"]
+    )
+
+
+def test_chunk_tiles_are_cached_per_chunk():
+    terrain = ChunkedTerrain(4, chunk_size=1000.0, capacity=12, view_distance=1000.0)
+    tiles = terrain.tiles((2, -1), TopDownRenderer.TILES)
+    assert tiles.shape == (40, 40)
+    assert terrain.tiles((2, -1), TopDownRenderer.TILES) is tiles
+    # Regenerated chunks are drawn again from the chunk's seed
+    other = ChunkedTerrain(4, chunk_size=1000.0, capacity=12, view_distance=1000.0)
+    np.testing.assert_array_equal(other.tiles((2, -1), TopDownRenderer.TILES), tiles)
+    for i in range(20):
+        terrain.tiles((i, 0), TopDownRenderer.TILES)
+    assert len(terrain.tile_chunks) == 12
+
+
+def test_tile_map(tmp_path):
+    tile_names = tuple(TopDownRenderer.TILES)
+    tiles = tile_map(6, (64, 32), 25.0, tile_names, cache_dir=str(tmp_path))
+    assert tiles.shape == (64, 32) and tiles.dtype == np.uint8
+    assert len(list(tmp_path.glob("tiles_6_64x32_25.0_*.npy"))) == 1
+    np.testing.assert_array_equal(
+        tile_map(6, (64, 32), 25.0, tile_names, cache_dir=None), tiles
+    )
+    # Tile (0, 0) is the south-west tile of the map centred on the origin
+    corner = TerrainGenerator(6).tiles([-787.5], [-387.5], tile_names, 6)
+    assert tiles[0, 0] == corner[0, 0]
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from flyer_env.envs.common.graphics import TopDownRenderer
+from flyer_env.world.generator import tile_map
+from flyer_env.world.landing import LandingSites, landing_sites, obstacle_mask
+from flyer_env.world.terrain import Heightmap
+
+
+def test_landing_sites():
+    terrain = Heightmap.generate(1, (512, 512))
+    sites = LandingSites.build(terrain)
+    assert len(sites) > 0
+    assert np.all(np.diff(sites.scores) <= 0.0)
+    assert np.all((sites.scores > 0.25) & (sites.scores <= 1.0))
+    assert sites.elevations == pytest.approx(
+        terrain.height(*sites.positions.T), abs=1e-3
+    )
+
+    # The best sites in range come first, padded when there are fewer than k
+    position = np.array([[0.0, 0.0], [1e6, 0.0]])
+    indices, distances = sites.query(position, [5000.0, 100.0], k=3)
+    found = indices[0] >= 0
+    assert np.all(np.diff(indices[0, found]) > 0)
+    assert np.all(distances[0, found] <= 5000.0)
+    expected = np.flatnonzero(np.hypot(*sites.positions.T) <= 5000.0)[:3]
+    assert np.array_equal(indices[0, found], expected)
+    assert np.all(indices[1] == -1) and np.all(np.isinf(distances[1]))
+
+
+def test_landing_site_obstacles(tmp_path):
+    terrain = Heightmap.generate(1, (512, 512))
+    # Tile (0, 0) is in the south-west corner, so the southern half is covered in trees
+    trees = np.zeros((512, 512), dtype=int)
+    trees[:256] = 1
+    obstacles = obstacle_mask(trees, ["grass", "tree"])
+    sites = LandingSites.build(terrain, obstacles)
+    assert len(sites) > 0
+    assert np.all(sites.positions[:, 0] > -500.0)
+
+    cached = landing_sites(1, (512, 512), cache_dir=str(tmp_path))
+    assert len(list(tmp_path.glob("landing_1_512x512_25.0_*.npz"))) == 1
+    assert np.array_equal(cached.positions, LandingSites.build(terrain).positions)
+
+    # Sites scored on the world's tile map are cached under their own name
+    tile_names = tuple(TopDownRenderer.TILES)
+    tiles = landing_sites(1, (512, 512), cache_dir=str(tmp_path), tile_names=tile_names)
+    assert len(list(tmp_path.glob("landing_1_512x512_25.0_*.npz"))) == 2
+    world_tiles = tile_map(1, (512, 512), 25.0, tile_names, str(tmp_path))
+    expected = LandingSites.build(terrain, obstacle_mask(world_tiles, tile_names))
+    assert np.array_equal(tiles.positions, expected.positions)
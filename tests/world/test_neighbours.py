@@ -0,0 +1,30 @@
+import numpy as np
+
+from flyer_env.world.neighbours import NeighbourIndex
+
+
+def test_neighbours():
+    rng = np.random.default_rng(0)
+    positions = rng.uniform(-1000.0, 1000.0, (200, 3))
+    index = NeighbourIndex()
+    index.update(positions)
+
+    distances = np.linalg.norm(positions[:, None] - positions[None], axis=-1)
+    np.fill_diagonal(distances, np.inf)
+    neighbours, ranges = index.neighbours(4)
+    assert neighbours.shape == (200, 4)
+    assert np.all(neighbours != np.arange(200)[:, None])
+    np.testing.assert_allclose(ranges, np.sort(distances, axis=1)[:, :4])
+
+    pairs = index.pairs(100.0)
+    expected = np.argwhere(np.triu(distances < 100.0, 1))
+    assert sorted(map(tuple, pairs)) == sorted(map(tuple, expected))
+
+
+def test_neighbours_padding():
+    index = NeighbourIndex()
+    index.update(np.zeros((2, 3)))
+    neighbours, ranges = index.neighbours(3)
+    assert list(neighbours[0]) == [1, -1, -1]
+    assert np.isinf(ranges[0, 1:]).all()
+    assert len(index.pairs(1.0)) == 1
@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+
+from flyer_env.world.obstacles import ObstacleMap
+from flyer_env.world.terrain import Heightmap
+
+
+def test_cylinder_distance():
+    obstacle_map = ObstacleMap.build(
+        [
+            {
+                "position": (1000.0, 500.0),
+                "radius": 300.0,
+                "floor": 100.0,
+                "ceiling": 500.0,
+            }
+        ],
+        area=(256, 256),
+    )
+    rng = np.random.default_rng(0)
+    positions = np.stack(
+        [
+            rng.uniform(0.0, 2000.0, 1000),
+            rng.uniform(-500.0, 1500.0, 1000),
+            -rng.uniform(0.0, 1000.0, 1000),
+        ],
+        axis=-1,
+    )
+    # Exact signed distance to the cylinder
+    horizontal = np.hypot(positions[:, 0] - 1000.0, positions[:, 1] - 500.0) - 300.0
+    altitude = -positions[:, 2]
+    vertical = np.maximum(100.0 - altitude, altitude - 500.0)
+    expected = np.hypot(np.maximum(horizontal, 0.0), np.maximum(vertical, 0.0))
+    expected += np.minimum(np.maximum(horizontal, vertical), 0.0)
+    np.testing.assert_allclose(obstacle_map.distance(positions), expected, atol=20.0)
+
+
+def test_polygon_and_tiles(tmp_path):
+    tiles = np.zeros((256, 256), dtype=bool)
+    tiles[128, 128] = True
+    obstacle_map = ObstacleMap.build(
+        [
+            {
+                "vertices": [
+                    (-2000.0, -2000.0),
+                    (-2000.0, -1000.0),
+                    (-1000.0, -1000.0),
+                    (-1000.0, -2000.0),
+                ]
+            }
+        ],
+        tiles,
+        area=(256, 256),
+        obstacle_height=20.0,
+    )
+    assert len(obstacle_map) == 2
+    distances = obstacle_map.distance(
+        np.array(
+            [
+                [-1500.0, -1500.0, -3000.0],  # in the no-fly zone, which has no ceiling
+                [-1500.0, -500.0, -100.0],  # 500 m east of it
+                [10.0, 10.0, -10.0],  # in the tree tile
+                [10.0, 10.0, -50.0],  # 30 m above it
+            ]
+        )
+    )
+    assert distances[0] == pytest.approx(-500.0, abs=25.0)
+    assert distances[1] == pytest.approx(500.0, abs=25.0)
+    assert distances[2] < 0.0
+    assert distances[3] == pytest.approx(30.0, abs=1.0)
+
+    gradient = obstacle_map.gradient(np.array([[-1500.0, -500.0, -100.0]]))
+    np.testing.assert_allclose(gradient, [[0.0, 1.0, 0.0]], atol=0.05)
+
+    obstacle_map.save(tmp_path / "obstacles.npz")
+    loaded = ObstacleMap.load(tmp_path / "obstacles.npz")
+    np.testing.assert_array_equal(loaded.distances, obstacle_map.distances)
+    np.testing.assert_array_equal(loaded.bands, obstacle_map.bands)
+    np.testing.assert_array_equal(loaded.relative, obstacle_map.relative)
+
+
+def test_tiles_stand_on_raised_ground(tmp_path):
+    tiles = np.zeros((256, 256), dtype=bool)
+    tiles[128, 128] = True
+    # A plateau 200 m high under the tree tile
+    terrain = Heightmap(np.full((65, 65), 200.0), (-3200.0, -3200.0), 100.0)
+    obstacle_map = ObstacleMap.build(
+        obstacles=tiles, area=(256, 256), obstacle_height=20.0, terrain=terrain
+    )
+    distances = obstacle_map.distance(
+        np.array(
+            [
+                [10.0, 10.0, -210.0],  # in the tree tile
+                [10.0, 10.0, -250.0],  # 30 m above it
+                [10.0, 10.0, -10.0],  # under the plateau at sea level
+            ]
+        )
+    )
+    assert distances[0] < 0.0
+    assert distances[1] == pytest.approx(30.0, abs=1.0)
+    assert distances[2] > 150.0
+
+    obstacle_map.save(tmp_path / "obstacles.npz")
+    loaded = ObstacleMap.load(tmp_path / "obstacles.npz")
+    np.testing.assert_array_equal(loaded.ground, obstacle_map.ground)
+
+
+def test_no_obstacles():
+    obstacle_map = ObstacleMap.build([], area=(64, 64))
+    assert len(obstacle_map) == 0
+    assert np.isinf(obstacle_map.distance(np.zeros((2, 3)))).all()
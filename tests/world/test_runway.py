@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from flyer_env.world.runway import RUNWAY_LENGTH, Runway, RunwayIndex
+
+
+def test_runway_frame():
+    runway = Runway(position=(100.0, 200.0), heading=0.5 * np.pi, length=1000.0)
+    # Landing east, the threshold is at the west end and right of the centreline is south
+    assert runway.threshold == pytest.approx([100.0, -300.0])
+    positions = np.array(
+        [[100.0, -300.0, -10.0], [90.0, 0.0, 0.0], [100.0, 800.0, 0.0]]
+    )
+    local = runway.to_local(positions)
+    expected = [[0.0, 0.0, 10.0], [300.0, 10.0, 0.0], [1100.0, 0.0, 0.0]]
+    assert local == pytest.approx(np.array(expected))
+    assert np.array_equal(runway.contains(positions), [True, True, False])
+    assert runway.contains(positions[:, :2]).shape == (3,)
+
+
+def test_runway_approach():
+    runway = Runway(heading=0.0, length=1500.0, glideslope=np.radians(3.0))
+    # On the glideslope 5 km out, and 50 m above it
+    along = np.array([-5000.0, -5000.0])
+    height = (runway.aim_distance - along) * np.tan(np.radians(3.0)) + [0.0, 50.0]
+    positions = np.stack([-750.0 + along, [0.0, 30.0], -height], axis=-1)
+    assert runway.glideslope_deviation(positions) == pytest.approx([0.0, 50.0])
+
+    approach = runway.approach(positions, np.array([0.1, 2.0 * np.pi - 0.1]))
+    assert approach.shape == (2, 5)
+    assert approach[:, 0] == pytest.approx(along)
+    assert approach[:, 1] == pytest.approx([0.0, 30.0])
+    assert approach[:, 2] == pytest.approx(height)
+    assert approach[:, 4] == pytest.approx([0.1, -0.1])
+
+
+def test_runway_index():
+    rng = np.random.RandomState(0)
+    index = RunwayIndex.random(
+        rng, 200, (25600.0, 25600.0), spacing=1000.0, runways=[Runway()]
+    )
+    assert len(index) > 100
+    assert index[0].position == pytest.approx([0.0, 0.0])
+    assert index.lengths == pytest.approx(RUNWAY_LENGTH)
+
+    # Half the points are dropped on runways, the rest at random
+    positions = rng.uniform(-12800.0, 12800.0, (400, 2))
+    for idx in range(0, 400, 2):
+        runway = index[idx % len(index)]
+        positions[idx] = runway.threshold + rng.uniform(0.0, runway.length) * (
+            runway.direction
+        )
+    expected = np.full(len(positions), -1)
+    for idx, runway in enumerate(index.runways):
+        expected[(expected < 0) & runway.contains(positions)] = idx
+    assert np.array_equal(index.runway_at(positions), expected)
+    assert np.all(expected[::2] >= 0)
+
+    indices, distances = index.nearest(positions, k=3)
+    brute = np.hypot(*(positions[:, None] - index.centres).transpose(2, 0, 1))
+    assert distances == pytest.approx(np.sort(brute, axis=1)[:, :3])
+    local = index.local(positions, indices)
+    assert local.shape == (400, 3, 3)
+    assert local[0, 0] == pytest.approx(index[indices[0, 0]].to_local(positions)[0])
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from flyer_env.world.chunks import ChunkedTerrain
+from flyer_env.world.terrain import Heightmap, heightmap, heightmap_digest
+
+
+def test_heightmap_lookup():
+    terrain = Heightmap.generate(1, (256, 256))
+    assert terrain.heights.min() >= 0.0
+    assert terrain.heights.max() <= 400.0
+    # Bilinear lookup is exact at the grid points and at the centre of a cell
+    x = terrain.origin[0] + terrain.resolution * np.array([3.0, 3.5])
+    y = terrain.origin[1] + terrain.resolution * np.array([7.0, 7.5])
+    h = terrain.heights
+    assert terrain.height(x, y) == pytest.approx(
+        [h[3, 7], h[3:5, 7:9].mean()], rel=1e-5
+    )
+
+
+def test_heightmap_matches_chunks():
+    # The heightmap and the streamed chunks of a seed are the same terrain
+    terrain = Heightmap.generate(3, (256, 256))
+    chunks = ChunkedTerrain(3)
+    x, y = np.random.default_rng(0).uniform(-3000.0, 3000.0, (2, 256))
+    assert terrain.height(x, y) == pytest.approx(chunks.height(x, y), abs=1e-3)
+
+
+def test_heightmap_cache(tmp_path):
+    terrain = heightmap(5, (128, 128), cache_dir=str(tmp_path))
+    path = tmp_path / f"heightmap_5_128x128_25.0_{heightmap_digest()}.npz"
+    assert path.exists()
+    loaded = Heightmap.load(str(path))
+    assert np.array_equal(loaded.heights, terrain.heights)
+    assert np.array_equal(Heightmap.generate(5, (128, 128)).heights, terrain.heights)
+
+
+def test_heightmap_raycast():
+    terrain = Heightmap.generate(1, (256, 256))
+    rng = np.random.default_rng(0)
+    n = 64
+    origins = np.zeros((n, 3))
+    origins[:, :2] = rng.uniform(-1000.0, 1000.0, (n, 2))
+    origins[:, 2] = -terrain.height(origins[:, 0], origins[:, 1])
+    origins[:, 2] -= rng.uniform(50.0, 500.0, n)
+    azimuth, depression = rng.uniform(-np.pi, np.pi, n), rng.uniform(0.05, 1.5, n)
+    directions = np.stack(
+        [
+            np.cos(depression) * np.cos(azimuth),
+            np.cos(depression) * np.sin(azimuth),
+            np.sin(depression),
+        ],
+        axis=-1,
+    )
+    distances = terrain.raycast(origins, directions, max_range=2000.0)
+
+    # Brute force march in 1 m steps, the rays stay over the heightmap
+    t = np.arange(0.0, 2000.0, 1.0)
+    points = origins[:, None] + t[:, None] * directions[:, None]
+    below = -points[..., 2] <= terrain.height(points[..., 0], points[..., 1])
+    expected = np.where(below.any(axis=1), t[below.argmax(axis=1)], np.inf)
+    assert np.array_equal(np.isfinite(distances), np.isfinite(expected))
+    hit = np.isfinite(expected)
+    assert distances[hit] == pytest.approx(expected[hit], abs=1.0)
+
+    # Straight down, straight up and from below the ground
+    origin = np.array([[100.0, 200.0, -1000.0]])
+    assert terrain.raycast(origin, [[0.0, 0.0, 1.0]])[0] == pytest.approx(
+        1000.0 - terrain.height([100.0], [200.0])[0]
+    )
+    assert terrain.raycast(origin, [[0.0, 0.0, -1.0]])[0] == np.inf
+    assert terrain.raycast([[100.0, 200.0, 0.0]], [[1.0, 0.0, 0.0]])[0] == 0.0
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from flyer_env.aircraft.dynamics import AircraftModel
+from flyer_env.world.terrain import Heightmap
+from flyer_env.world.wind import WindField, WindModel
+
+
+def test_turbulence_intensity():
+    wind = WindModel(n_aircraft=32, dt=0.01, turbulence="moderate", block_size=1000)
+    wind.reset(np.random.default_rng(0))
+    gusts = np.array([wind.gusts(tick) for tick in range(10000)])
+    assert gusts.shape == (10000, 32, 3)
+    assert gusts.std(axis=(0, 1)) == pytest.approx(wind.sigmas, rel=0.05)
+    # Consecutive ticks are correlated, including across block boundaries
+    assert np.abs(gusts[1000] - gusts[999]).max() < 0.5
+
+
+def test_steady_shear():
+    wind = WindModel(n_aircraft=2, speed=10.0, direction=np.pi / 2)
+    wind.reset(np.random.default_rng(0))
+    velocity = wind(0, [10.0, 100.0])
+    assert velocity[0] == pytest.approx([0.0, -10.0, 0.0], abs=1e-9)
+    assert velocity[1, 1] == pytest.approx(-10.0 * 10.0 ** (1.0 / 7.0))
+
+
+def test_model_relative_wind():
+    model = AircraftModel("TO")
+    state = AircraftModel.trim_state(100.0, 1000.0, 0.0, 0.05, heading=0.7)
+    controls = np.array([0.0, -0.05, 0.3, 0.0])
+    # A tailwind along the flight path lowers the airspeed as a slower aircraft would
+    wind = 5.0 * np.array([np.cos(0.7), np.sin(0.7), 0.0])
+    slower = AircraftModel.trim_state(95.0, 1000.0, 0.0, 0.05, heading=0.7)
+    with_wind = model.derivatives(state, controls, wind)
+    assert with_wind[6:] == pytest.approx(
+        model.derivatives(slower, controls)[6:], abs=1e-3
+    )
+    batched = model.step(state, controls, 0.01, np.zeros((4, 3)))
+    assert batched.shape == (4, 12)
+    assert batched[0] == pytest.approx(model.step(state, controls, 0.01))
+
+
+def test_terrain_wind_field():
+    terrain = Heightmap.generate(3, (256, 256))
+    field = WindField.build(terrain, 10.0, direction=0.0)
+    rng = np.random.default_rng(0)
+    position = rng.uniform(-3000.0, 3000.0, (500, 3))
+    position[:, 2] = -rng.uniform(1500.0, 3000.0, 500)
+    wind = field.lookup(position)
+    assert wind.shape == (500, 3)
+    # High above the terrain the wind is the sheared northerly
+    altitude = -position[:, 2] - terrain.height(position[:, 0], position[:, 1])
+    assert wind[:, 0] == pytest.approx(
+        -10.0 * (altitude / 10.0) ** (1.0 / 7.0), rel=0.05
+    )
+    assert np.abs(wind[:, 1:]).max() < 0.5
+    # Grid points are returned exactly
+    point = field.origin + field.spacing * [1, 2, 3]
+    assert field.lookup([[point[0], point[1], -point[2]]])[0] == pytest.approx(
+        field.winds[1, 2, 3]
+    )
+
+    model = WindModel(n_aircraft=500, field=field)
+    model.reset(np.random.default_rng(0))
+    assert model(0, -position[:, 2], position=position) == pytest.approx(wind)